@@ -1,84 +1,235 @@
 import asyncio
-import numpy as np
 from app.voice.audio_stream import MicrophoneStream
-from app.voice.stt_stream import get_stt_service
+from app.voice.stt_stream import get_stt_service, UtteranceTranscriber
+from app.voice.vad import Endpointer
 from app.voice.tts_stream import get_tts_service
-from app.llm.ollama_stream import stream_llm_response
-from app.llm.prompt_builder import build_prompt
+from app.llm.ollama_stream import stream_llm_response, CONNECTION_BROKEN_REPLY, STREAM_FAILED_REPLY
+from app.llm.prompt_builder import pack_prompt
+from app.llm.chat_session import ChatSession
+from app.llm.response_cache import get_response_cache, replay_reply
 from app.journal.journal_service import JournalService
-from app.memory.database import SessionLocal
+from app.journal.retrieval import transcript_similarity
 from app.core.logger import logger
 from app.config import settings
 
+JOURNAL_CONFIRMATION = "I have recorded your words. They are etched in memory."
+# Spoken verbatim, so they are pre-rendered into the TTS audio cache at startup
+CANNED_PHRASES = (JOURNAL_CONFIRMATION, CONNECTION_BROKEN_REPLY, STREAM_FAILED_REPLY)
+
 class KratosOrchestrator:
+    """
+    Full-duplex voice loop: the microphone and VAD keep running while Kratos
+    speaks, because each reply runs as its own task. When the user talks over
+    a reply for BARGE_IN_MIN_SPEECH_SECONDS, the reply is cancelled (closing
+    the Ollama stream and flushing the TTS queue) and the new utterance is
+    handled as soon as it ends. With BARGE_IN off (speakers without echo
+    cancellation), speech that starts during a reply is ignored instead.
+
+    Memory retrieval starts speculatively on each partial transcript, and the
+    final transcript reuses the last run when the words match closely
+    (RETRIEVAL_SPECULATIVE_MIN_SIMILARITY), so the LLM request goes out right
+    after the endpoint instead of after another embedding and search.
+
+    With RESPONSE_CACHE_ENABLED, a question close to a recent one that
+    retrieved the same memories is answered with the earlier reply, spoken
+    through the same TTS path without calling Ollama.
+    """
+
     def __init__(self):
         self.mic = MicrophoneStream()
         self.stt = get_stt_service()
         self.tts = get_tts_service()
-        self.db = SessionLocal()
-        self.journal = JournalService(self.db)
-        self.silence_timer = 0
+        self.journal = JournalService()
+        self.chat = ChatSession()
+        self.response_cache = get_response_cache()
+        self._response = None  # Task producing the current reply
+        self._speculation = None  # (transcript, retrieval task) started before the endpoint
         self.is_running = False
 
+    @property
+    def responding(self) -> bool:
+        return self._response is not None and not self._response.done()
+
     async def run(self):
         self.is_running = True
+        await self.journal.start_background_jobs()
         logger.info("Kratos Orchestrator started. Speak now.")
         
-        audio_buffer = []
+        endpointer = Endpointer()
+        utterance = None
+        ignored = False
+        max_samples = int(settings.MAX_UTTERANCE_SECONDS * settings.SAMPLE_RATE)
+        barge_in_samples = int(settings.BARGE_IN_MIN_SPEECH_SECONDS * settings.SAMPLE_RATE)
         
         async for chunk, is_silent in self.mic.stream():
             if not self.is_running:
                 break
-                
-            audio_buffer.append(chunk)
             
-            if is_silent:
-                self.silence_timer += len(chunk) / settings.SAMPLE_RATE
-            else:
-                self.silence_timer = 0
+            event = endpointer.update(not is_silent, self.mic.position, len(chunk))
+            if event == "start":
+                # Without barge-in, speech over a reply is most likely Kratos' own echo
+                ignored = self.responding and not settings.BARGE_IN
+                self._drop_speculation()
+                on_partial = self._speculate if settings.RETRIEVAL_SPECULATIVE else None
+                utterance = UtteranceTranscriber(self.stt, on_partial) if settings.STT_STREAMING and not ignored else None
+            if not endpointer.in_utterance and event != "end":
+                continue
             
-            # End of speech detection
-            if self.silence_timer >= settings.SILENCE_DURATION and len(audio_buffer) > 5:
-                # Combine and flatten buffer (remove channels dimension)
-                full_audio = np.concatenate(audio_buffer).flatten()
-                audio_buffer = [] # Reset buffer
-                self.silence_timer = 0
+            # Zero-copy view of the utterance so far (with pre-roll before the onset)
+            audio = self.mic.recent(endpointer.start_position)
+            if utterance is not None:
+                # Decodes in the background while the user is still talking
+                utterance.push(audio, is_silent)
+            
+            # Barge-in: the user has been talking over the reply long enough to be sure
+            onset = endpointer.start_position + endpointer.preroll
+            if (settings.BARGE_IN and self.responding and endpointer.state == "speech"
+                    and self.mic.position - onset >= barge_in_samples):
+                self.interrupt()
+            
+            # End of speech (hangover elapsed) or the utterance hit its maximum length
+            if event == "end" or len(audio) >= max_samples:
+                if event == "end":
+                    # Drop most of the hangover silence; it only costs decode time
+                    audio = audio[:endpointer.speech_end + endpointer.preroll - endpointer.start_position]
+                else:
+                    endpointer.force_end()
+                if ignored:
+                    continue
                 
-                # Transcribe
-                text = await self.stt.transcribe_chunk(full_audio)
+                # Transcribe from a copy: a long final decode can outlast the ring's slack
+                audio = audio.copy()
+                if utterance is not None:
+                    text = await utterance.finalize(audio)
+                    utterance = None
+                else:
+                    text = await self.stt.transcribe_chunk(audio)
+                context = self._claim_speculation(text)
                 if not text:
                     continue
                     
                 logger.info("User: {}", text)
                 
-                # Check intent: journaling or conversation
-                # Simple keyword heuristic as requested
-                journal_keywords = ["journal", "record", "remember", "write down", "log"]
-                is_journaling = any(kw in text.lower() for kw in journal_keywords)
-                
-                if is_journaling:
-                    await self.handle_journal(text)
-                else:
-                    await self.handle_conversation(text)
+                # A new request supersedes whatever is still being said
+                self.interrupt()
+                self._response = asyncio.create_task(self.respond(text, context))
+                self._response.add_done_callback(self._response_done)
+
+    async def respond(self, text: str, context: asyncio.Task = None):
+        """Answer one utterance; `context` is a retrieval task already running for it, if any."""
+        # Check intent: journaling or conversation
+        # Simple keyword heuristic as requested
+        journal_keywords = ["journal", "record", "remember", "write down", "log"]
+        is_journaling = any(kw in text.lower() for kw in journal_keywords)
+        
+        if is_journaling:
+            if context is not None:
+                context.cancel()
+            await self.handle_journal(text)
+        else:
+            await self.handle_conversation(text, context)
+
+    def interrupt(self):
+        """Cancel the reply in progress: its Ollama stream and everything queued for TTS."""
+        if not self.responding:
+            return
+        self._response.cancel()
+        dropped = self.tts.cancel()
+        logger.info("Reply interrupted ({} queued sentences dropped).", dropped)
+
+    def _response_done(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Reply failed: {}", task.exception())
+
+    def _speculate(self, stable: str, partial: str):
+        """UtteranceTranscriber callback: retrieve for the transcript so far, replacing any older run."""
+        text = f"{stable} {partial}".strip()
+        if not text or (self._speculation is not None and self._speculation[0] == text):
+            return
+        self._drop_speculation()
+        self._speculation = (text, asyncio.create_task(self.retrieve_context(text)))
+
+    def _claim_speculation(self, text: str):
+        """The speculative retrieval task if its transcript matches `text` closely enough, else None."""
+        if self._speculation is None:
+            return None
+        spoken, task = self._speculation
+        similarity = transcript_similarity(spoken, text) if text else 0.0
+        if similarity < settings.RETRIEVAL_SPECULATIVE_MIN_SIMILARITY:
+            logger.debug("Speculative retrieval discarded (similarity {:.2f}): {!r}", similarity, spoken)
+            self._drop_speculation()
+            return None
+        self._speculation = None
+        return task
+
+    def _drop_speculation(self):
+        if self._speculation is None:
+            return
+        _, task = self._speculation
+        self._speculation = None
+        task.cancel()
+        if task.done() and not task.cancelled():
+            task.exception()  # Retrieved, so a failed run is not reported as never awaited
 
     async def handle_journal(self, text: str):
-        # Background task so we don't block response
-        asyncio.create_task(self.journal.add_entry(text))
-        await self.tts.speak_sentence("I have recorded your words. They are etched in memory.")
-
-    async def handle_conversation(self, text: str):
-        # 1. Retrieve memories
-        memories = await self.journal.search_memory(text)
-        weekly = await self.journal.get_latest_weekly_summary()
+        # Only the insert is awaited (summary and indexing are durable background jobs),
+        # so the confirmation is true by the time it is spoken
+        await self.journal.add_entry(text)
+        await self.tts.speak_sentence(JOURNAL_CONFIRMATION)
+
+    async def retrieve_context(self, text: str) -> tuple[list, str, object]:
+        """
+        Memories for `text` as (entry_id, text, score) and the weekly summary,
+        looked up concurrently, plus the query embedding (the response cache key).
+        """
+        async def memories():
+            embedding = await self.journal.embeddings.embed(text)
+            return await self.journal.retrieve(text, query_embedding=embedding), embedding
+
+        (hits, embedding), weekly = await asyncio.gather(memories(), self.journal.get_latest_weekly_summary())
+        return hits, weekly, embedding
+
+    async def handle_conversation(self, text: str, context: asyncio.Task = None):
+        # 1. Retrieve memories (reusing the speculative run on the partial transcript if there was one)
+        hits = weekly = embedding = None
+        if context is not None:
+            try:
+                hits, weekly, embedding = await context
+            except Exception as e:
+                logger.warning("Speculative retrieval failed: {}", e)
+        if hits is None:
+            hits, weekly, embedding = await self.retrieve_context(text)
+        memories = [(memory, score) for _, memory, score in hits]
+        memory_ids = [entry_id for entry_id, _, _ in hits]
         
-        # 2. Build prompt
-        prompt = build_prompt(text, memories, weekly)
+        # 2. A near-duplicate of a recent question over the same memories gets the same answer
+        if settings.RESPONSE_CACHE_ENABLED:
+            # Keyed by the embedding retrieval used; for a speculative run that is the partial
+            # transcript, which matched the final one closely enough to reuse its memories
+            reply = self.response_cache.lookup(embedding, memory_ids)
+            if reply is not None:
+                logger.info("Answering from the response cache.")
+                if settings.LLM_CONVERSATION_MODE == "chat":
+                    self.chat.record(text, memories, weekly, reply)
+                await self.tts.stream_sentences(replay_reply(reply))
+                return
         
-        # 3. Stream LLM -> TTS
-        token_stream = stream_llm_response(prompt)
+        # 3. Stream LLM -> TTS (chat mode reuses the evaluated prefix across turns)
+        if settings.LLM_CONVERSATION_MODE == "chat":
+            token_stream = self.chat.stream(text, memories, weekly)
+        else:
+            packed = pack_prompt(text, memories, weekly)
+            logger.debug("Packed prompt tokens: {}", packed.tokens)
+            token_stream = stream_llm_response(packed.prompt())
+        if settings.RESPONSE_CACHE_ENABLED:
+            token_stream = self.response_cache.recording(token_stream, embedding, memory_ids)
         await self.tts.stream_sentences(token_stream)
 
     def stop(self):
         self.is_running = False
+        self.interrupt()
+        self._drop_speculation()
+        self.journal.jobs.stop()
         self.mic.stop()
-        self.db.close()
+        self.tts.close()
+        self.journal.vector_store.close()
@@ -11,28 +11,132 @@ class Settings(BaseSettings):
     SAMPLE_RATE: int = 16000
     CHANNELS: int = 1
     CHUNK_SIZE: int = 1024
-    SILENCE_THRESHOLD: float = 0.01
-    SILENCE_DURATION: float = 1.5  # Seconds
+    SILENCE_THRESHOLD: float = 0.01  # RMS, used by the "rms" VAD backend
+    SILENCE_DURATION: float = 1.5  # Seconds of hang time for the "rms" VAD backend
+    VAD_BACKEND: str = "energy"  # rms (fixed SILENCE_THRESHOLD), energy (adaptive noise floor) or silero
+    VAD_FRAME_MS: int = 16  # Feature frame length for the energy VAD
+    VAD_SNR_DB: float = 6.0  # Energy above the noise floor that counts as speech
+    VAD_MIN_ENERGY_DB: float = -55.0  # dBFS below which nothing is speech
+    VAD_SILERO_MODEL: str = str(DATA_DIR / "silero_vad.onnx")
+    VAD_SILERO_THRESHOLD: float = 0.5
+    VAD_HANGOVER_SECONDS: float = 0.6  # Non-speech time that ends an utterance
+    VAD_MIN_SPEECH_SECONDS: float = 0.15  # Consecutive speech needed to start one
+    VAD_PREROLL_SECONDS: float = 0.2  # Audio kept before the detected onset (and after the end)
+    MAX_UTTERANCE_SECONDS: float = 30.0  # Speech is cut into a new utterance past this
+    AUDIO_BUFFER_SLACK_SECONDS: float = 10.0  # Extra ring capacity so utterance views outlive partial decodes
     
     # STT Settings (Whisper)
     WHISPER_MODEL: str = "small"
     WHISPER_DEVICE: str = "cuda"  # Will fallback to cpu if cuda not available
     WHISPER_COMPUTE_TYPE: str = "float16"
+    WHISPER_LANGUAGE: str = ""  # e.g. "en" to pin the decode language (skips detection); empty = auto-detect per utterance
+    WHISPER_SHORT_SECONDS: float = 4.0  # Utterances up to this long decode greedily
+    WHISPER_LONG_SECONDS: float = 12.0  # From this long on, full beam search (dictation)
+    WHISPER_SHORT_BEAM_SIZE: int = 1
+    WHISPER_MEDIUM_BEAM_SIZE: int = 2
+    WHISPER_LONG_BEAM_SIZE: int = 5
+    WHISPER_LONG_VAD_FILTER: bool = True  # Skip pauses inside long dictation
+    WHISPER_FAST_MODEL: str = ""  # e.g. "base.en"; used for very short clips when set
+    WHISPER_FAST_MAX_SECONDS: float = 2.0
+    STT_STREAMING: bool = True  # Decode while the user speaks instead of after the endpoint
+    STT_PARTIAL_INTERVAL: float = 0.5  # Seconds of new audio between background decodes
+    STT_WINDOW_SECONDS: float = 20.0  # Uncommitted audio before segments are committed without agreement
+    
+    # TTS Settings (pyttsx3)
+    TTS_DRIVER: str = ""  # Empty = platform default (sapi5, nsss, espeak)
+    TTS_RATE: int = 150  # Words per minute
+    TTS_VOLUME: float = 1.0
+    TTS_QUEUE_SIZE: int = 4  # Sentences waiting to be spoken before the LLM stream is held back
+    TTS_FIRST_CHUNK_EARLY: bool = True  # Speak the first clause (up to , ; :) without waiting for a full sentence
+    TTS_FIRST_CHUNK_MIN_CHARS: int = 24  # ...but only once it is at least this long
+    BARGE_IN: bool = True  # User speech cuts a reply off; needs headphones or echo cancellation on speakers
+    BARGE_IN_MIN_SPEECH_SECONDS: float = 0.3  # Speech over a reply before it is cut off
+    TTS_CACHE_ENABLED: bool = True  # Play fixed phrases from pre-rendered audio
+    TTS_CACHE_DIR: str = str(DATA_DIR / "tts_cache")
+    TTS_CACHE_MAX_MB: float = 50.0
     
     # LLM Settings (Ollama)
     OLLAMA_URL: str = "http://localhost:11434/api/generate"
+    OLLAMA_CHAT_URL: str = "http://localhost:11434/api/chat"
     OLLAMA_MODEL: str = "llama3.1"
     MAX_TOKENS: int = 200
     TEMPERATURE: float = 0.7
     NUM_CTX: int = 2048
+    OLLAMA_KEEP_ALIVE: str = "30m"  # How long Ollama keeps the model loaded after a request; negative (e.g. "-1m") = forever
+    OLLAMA_POOL_SIZE: int = 8  # Max pooled connections to Ollama
+    OLLAMA_CONNECTION_KEEPALIVE: float = 60.0  # Seconds an idle pooled connection stays open
+    OLLAMA_CONNECT_TIMEOUT: float = 5.0  # Seconds
+    OLLAMA_READ_TIMEOUT: float = 120.0  # Max seconds between chunks (covers model load)
+    OLLAMA_MAX_RETRIES: int = 2
+    OLLAMA_RETRY_BACKOFF: float = 0.5  # Seconds, doubled per attempt
+    LLM_CONVERSATION_MODE: str = "chat"  # chat (/api/chat session with reused prefix) or generate (stateless prompt)
+    CHAT_HISTORY_TURNS: int = 8  # User/assistant exchanges kept in the rolling history
+    PROMPT_TOKENIZER: str = ""  # tokenizer.json path or HF repo id for exact counts; empty = estimate
+    PROMPT_TOKEN_BUDGET: int = 0  # 0 = NUM_CTX - MAX_TOKENS
+    PROMPT_WEEKLY_MAX_TOKENS: int = 200
+    PROMPT_MEMORY_MAX_TOKENS: int = 120  # Per memory
+    RESPONSE_CACHE_ENABLED: bool = False  # Answer near-duplicate questions with an earlier reply
+    RESPONSE_CACHE_MIN_SIMILARITY: float = 0.92  # Question embedding cosine needed for a hit (same memories retrieved too)
+    RESPONSE_CACHE_TTL_SECONDS: float = 600.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 128
     
     # Memory & Database
     DATABASE_URL: str = f"sqlite:///{DATA_DIR}/kratos.db"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # NORMAL is safe with WAL; FULL fsyncs every commit
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE: int = 268435456  # Bytes
     FAISS_INDEX_PATH: str = str(DATA_DIR / "faiss.index")
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND: str = "torch"  # torch, onnx or onnx-int8 (exported to ONNX_MODEL_DIR on first use)
+    ONNX_MODEL_DIR: str = str(DATA_DIR / "onnx")
+    ONNX_NUM_THREADS: int = 0  # 0 = onnxruntime default
+    EMBEDDING_CACHE_PATH: str = str(DATA_DIR / "embedding_cache.db")
+    EMBEDDING_CACHE_MEMORY_SIZE: int = 4096  # Entries in the in-process LRU
+    EMBEDDING_CACHE_MAX_ROWS: int = 500000  # Persistent entries (~1.6 KB each) before LRU eviction
+    EMBEDDING_MAX_BATCH: int = 32  # Queued requests coalesced into one encode call
+    EMBEDDING_MAX_WAIT_MS: float = 5.0  # How long a request waits for its batch to fill
+    
+    # Background Jobs (summaries, indexing and compression after a journal entry)
+    JOB_WORKERS: int = 2
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BACKOFF: float = 2.0  # Seconds before the first retry, doubled per attempt
+    JOB_POLL_INTERVAL: float = 5.0  # Seconds an idle worker waits before looking for due retries
+    JOB_SUMMARY_BATCH: int = 8  # Pending entries summarized in one Ollama call
+    JOB_SUMMARY_BATCH_TOKENS: int = 1200  # Entry text per batched summary prompt
+    JOB_INDEX_BATCH: int = 64  # Pending entries embedded and indexed together
+    JOB_RETENTION_DAYS: float = 7.0  # Finished jobs kept for metrics
+    
+    # Vector Store Persistence
+    VECTOR_FLUSH_BATCH: int = 32  # Buffered adds before appending to the segment log
+    VECTOR_FLUSH_INTERVAL: float = 2.0  # Seconds
+    VECTOR_COMPACT_THRESHOLD: int = 10000  # Log records before writing a full snapshot
+    
+    # Vector Index
+    VECTOR_INDEX_MODE: str = "flat"  # flat, ivf_flat, ivf_pq or hnsw
+    VECTOR_INDEX_TRAIN_THRESHOLD: int = 20000  # Entries before migrating from flat to the configured mode
+    VECTOR_IVF_NLIST: int = 0  # 0 = derive from corpus size
+    VECTOR_IVF_NPROBE: int = 16
+    VECTOR_PQ_M: int = 48  # Sub-quantizers, must divide the embedding dimension
+    VECTOR_HNSW_M: int = 32
+    VECTOR_HNSW_EF_SEARCH: int = 64
+    VECTOR_STORAGE: str = "float32"  # float32, float16 or sq8 (8-bit scalar quantized)
+    VECTOR_MMAP: bool = False  # Memory-map the snapshot read-only instead of loading it into RAM
     
     # Agent Logic
-    JOURNAL_COMPRESSION_THRESHOLD: int = 25
+    JOURNAL_COMPRESSION_THRESHOLD: int = 25  # New entries between rollup passes
+    ROLLUP_DAY_VERBATIM_TOKENS: int = 150  # A day whose entry summaries fit in this is stored as they are, without Ollama
+    ROLLUP_PROMPT_TOKENS: int = 1500  # Summary text per rollup prompt; beyond it, chunks are summarized first (map-reduce)
+    RETRIEVAL_MODE: str = "hybrid"  # hybrid (FTS5 BM25 + vectors, rank-fused) or vector
+    RETRIEVAL_CANDIDATES: int = 20  # Hits taken from each retriever before fusion; deeper lists dilute exact matches
+    RETRIEVAL_RRF_K: int = 60  # Reciprocal rank fusion constant; larger flattens the rank curve
+    RETRIEVAL_HALF_LIFE_DAYS: float = 0.0  # Recency decay half-life; 0 = off
+    RETRIEVAL_DECAY_FLOOR: float = 0.5  # Share of the score that never decays
+    RETRIEVAL_RECENT_WEIGHT: float = 0.5  # Fusion weight of the recent keyword matches; at 1.0 they bury exact old matches
+    RETRIEVAL_SPECULATIVE: bool = True  # Start retrieval on the partial transcript while the user is still talking
+    RETRIEVAL_SPECULATIVE_MIN_SIMILARITY: float = 0.9  # Word overlap with the final transcript needed to reuse it
+    JOURNAL_SUMMARY_CONCURRENCY: int = 4  # Parallel Ollama summary requests during bulk adds
+    IMPORT_BATCH_SIZE: int = 256  # Entries per insert transaction during bulk import
+    IMPORT_EMBED_BATCH_SIZE: int = 1024  # Texts per embed_batch call while re-indexing
     
     class Config:
         env_file = ".env"
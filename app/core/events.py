@@ -2,6 +2,7 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.core.logger import logger
 from app.config import settings
+from app.llm.ollama_client import get_ollama_client
 
 # Placeholder for model registry or dependency injection
 MODELS = {}
@@ -22,9 +23,12 @@ async def lifespan(app: FastAPI):
     # from sentence_transformers import SentenceTransformer
     # MODELS['embeddings'] = SentenceTransformer(...)
     
+    logger.info("Loading LLM into Ollama: {}", settings.OLLAMA_MODEL)
+    await get_ollama_client().warm_up()
+    
     logger.info("Kratos Desk is ready.")
     yield
     
     # Shutdown
     logger.info("Shutting down Kratos Stream Engine...")
-    # Clean up resources if needed
+    await get_ollama_client().close()
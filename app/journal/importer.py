@@ -0,0 +1,242 @@
+import asyncio
+import json
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.memory.models import JournalEntry, ImportCheckpoint
+from app.memory.database import run_db, rebuild_lexical_index
+from app.journal.journal_service import JournalService
+from app.core.logger import logger
+from app.config import settings
+
+_HEADING = re.compile(r"^#{1,6}\s+(.*)$")
+_DATE_FORMATS = ("%B %d, %Y", "%d %B %Y", "%b %d, %Y", "%Y/%m/%d", "%d/%m/%Y")
+
+def parse_timestamp(value) -> datetime:
+    """Best-effort timestamp parsing; returns a naive UTC datetime or None."""
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        timestamp = datetime.fromisoformat(value)
+    except ValueError:
+        for fmt in _DATE_FORMATS:
+            try:
+                timestamp = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            return None
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+def iter_entries(path: Path):
+    """Yield (text, timestamp) pairs from a JSONL or Markdown journal export."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.warning("Skipping malformed line {} in {}: {}", line_no, path.name, e)
+                    continue
+                text = record.get("text") or record.get("raw_text") or record.get("content")
+                if text and text.strip():
+                    timestamp = record.get("timestamp") or record.get("date") or record.get("created_at")
+                    yield text.strip(), parse_timestamp(timestamp)
+        else:
+            # Markdown: one entry per heading (or --- rule); a date heading becomes the timestamp
+            heading, body = None, []
+            for line in f:
+                match = _HEADING.match(line.rstrip())
+                if match or line.strip() == "---":
+                    yield from _markdown_entry(heading, body)
+                    heading, body = (match.group(1).strip() if match else None), []
+                else:
+                    body.append(line.rstrip())
+            yield from _markdown_entry(heading, body)
+
+def _markdown_entry(heading: str, body: list[str]):
+    text = "\n".join(body).strip()
+    if not text:
+        return
+    timestamp = parse_timestamp(heading)
+    if heading and timestamp is None:
+        text = f"{heading}\n{text}"
+    yield text, timestamp
+
+class JournalImporter:
+    """
+    Streaming bulk import and full re-index for the journal.
+
+    Entries flow through a pipeline: batched inserts (each committed together
+    with the import checkpoint, so an interrupted import resumes without
+    duplicates), bounded-concurrency summarization and large embed_batch calls,
+    then one FAISS build over the whole table at the end.
+
+    The journal's VectorStore holds the FAISS index lock from construction,
+    so an importer cannot be created (IndexLockedError) while the voice app
+    has the index open, and the app cannot start during an import.
+    """
+
+    def __init__(self, journal: JournalService = None):
+        self.journal = journal or JournalService()
+        self._summary_slots = asyncio.Semaphore(settings.JOURNAL_SUMMARY_CONCURRENCY)
+
+    async def import_file(self, path: str, summarize: bool = True, on_progress=None) -> int:
+        path = Path(path)
+        source = str(path.resolve())
+        checkpoint = await run_db(self._load_checkpoint, source)
+        if checkpoint and checkpoint.completed_at:
+            logger.info("{} was already imported on {}; skipping.", path.name, checkpoint.completed_at)
+            return 0
+
+        start_position = checkpoint.position if checkpoint else 0
+        if start_position:
+            logger.info("Resuming import of {} after {} entries.", path.name, start_position)
+
+        batches = asyncio.Queue(maxsize=2)
+        imported = 0
+        started = time.perf_counter()
+
+        async def read_and_insert():
+            position = start_position
+            batch = []
+            for index, item in enumerate(iter_entries(path)):
+                if index < start_position:
+                    continue
+                batch.append(item)
+                if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                    position += len(batch)
+                    await batches.put(await run_db(self._insert_batch, source, position, batch))
+                    batch = []
+            if batch:
+                position += len(batch)
+                await batches.put(await run_db(self._insert_batch, source, position, batch))
+            await batches.put(None)
+
+        async def enrich():
+            nonlocal imported
+            while (entries := await batches.get()) is not None:
+                texts = [e.raw_text for e in entries]
+                # Embedding here warms the embedding cache, so the final re-index is cheap
+                stages = [self.journal.embeddings.embed_batch(texts)]
+                if summarize:
+                    stages.append(self._summarize(entries))
+                await asyncio.gather(*stages)
+
+                imported += len(entries)
+                rate = imported / (time.perf_counter() - started)
+                logger.info("Imported {} entries from {} ({:.1f}/s)", start_position + imported, path.name, rate)
+                if on_progress:
+                    on_progress("import", start_position + imported, None)
+
+        async with asyncio.TaskGroup() as group:
+            group.create_task(read_and_insert())
+            group.create_task(enrich())
+
+        if summarize:
+            await self.backfill_summaries(on_progress)
+        await self.reindex(on_progress)
+        await run_db(self._complete_checkpoint, source)
+        logger.info("Import of {} complete: {} new entries in {:.1f}s", path.name, imported, time.perf_counter() - started)
+        return imported
+
+    async def backfill_summaries(self, on_progress=None) -> int:
+        """Summarize every entry still missing a summary (e.g. after an interrupted import)."""
+        done = 0
+        last_id = 0
+        while True:
+            entries = await run_db(self._unsummarized_page, last_id, settings.IMPORT_BATCH_SIZE)
+            if not entries:
+                break
+            await self._summarize(entries)
+            last_id = entries[-1].id
+            done += len(entries)
+            logger.info("Backfilled {} summaries", done)
+            if on_progress:
+                on_progress("summaries", done, None)
+        return done
+
+    async def reindex(self, on_progress=None) -> int:
+        """Rebuild the FAISS and FTS5 indexes from the journal_entries table, FAISS in a single build."""
+        total = await run_db(lambda db: db.query(JournalEntry).count())
+        logger.info("Re-indexing {} journal entries...", total)
+        await run_db(rebuild_lexical_index)
+
+        ids, chunks = [], []
+        last_id = 0
+        started = time.perf_counter()
+        while True:
+            rows = await run_db(self._entry_page, last_id, settings.IMPORT_EMBED_BATCH_SIZE)
+            if not rows:
+                break
+            chunks.append(await self.journal.embeddings.embed_batch([text for _, text in rows]))
+            ids.extend(entry_id for entry_id, _ in rows)
+            last_id = rows[-1][0]
+            logger.info("Embedded {}/{} entries ({:.1f}/s)", len(ids), total, len(ids) / (time.perf_counter() - started))
+            if on_progress:
+                on_progress("reindex", len(ids), total)
+
+        vectors = np.vstack(chunks) if chunks else np.empty((0, self.journal.vector_store.dimension), dtype='float32')
+        await asyncio.to_thread(self.journal.vector_store.rebuild, ids, vectors)
+        return len(ids)
+
+    async def _summarize(self, entries: list[JournalEntry]):
+        async def summarize_one(entry: JournalEntry) -> str:
+            async with self._summary_slots:
+                return await self.journal.summarizer.summarize_entry(entry.raw_text)
+
+        summaries = await asyncio.gather(*(summarize_one(e) for e in entries))
+        await run_db(JournalService._set_summaries, [e.id for e in entries], summaries)
+
+    @staticmethod
+    def _load_checkpoint(db: Session, source: str):
+        return db.query(ImportCheckpoint).filter(ImportCheckpoint.source == source).first()
+
+    @staticmethod
+    def _insert_batch(db: Session, source: str, position: int, batch: list) -> list[JournalEntry]:
+        entries = []
+        for text, timestamp in batch:
+            entry = JournalEntry(raw_text=text)
+            if timestamp is not None:
+                entry.timestamp = timestamp
+            entries.append(entry)
+        db.add_all(entries)
+
+        # Checkpoint moves in the same transaction as the rows it accounts for
+        checkpoint = db.query(ImportCheckpoint).filter(ImportCheckpoint.source == source).first()
+        if checkpoint is None:
+            checkpoint = ImportCheckpoint(source=source)
+            db.add(checkpoint)
+        checkpoint.position = position
+        db.commit()
+        return entries
+
+    @staticmethod
+    def _complete_checkpoint(db: Session, source: str):
+        db.query(ImportCheckpoint).filter(ImportCheckpoint.source == source).update(
+            {ImportCheckpoint.completed_at: datetime.utcnow()}
+        )
+        db.commit()
+
+    @staticmethod
+    def _unsummarized_page(db: Session, after_id: int, limit: int) -> list[JournalEntry]:
+        return (db.query(JournalEntry)
+                .filter(or_(JournalEntry.summary.is_(None), JournalEntry.summary == ""), JournalEntry.id > after_id)
+                .order_by(JournalEntry.id).limit(limit).all())
+
+    @staticmethod
+    def _entry_page(db: Session, after_id: int, limit: int) -> list[tuple[int, str]]:
+        rows = (db.query(JournalEntry.id, JournalEntry.raw_text)
+                .filter(JournalEntry.id > after_id)
+                .order_by(JournalEntry.id).limit(limit).all())
+        return [(row.id, row.raw_text) for row in rows]
@@ -1,72 +1,292 @@
+import asyncio
+from sqlalchemy import update, text, or_
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
-from app.memory.models import JournalEntry, WeeklySummary
-from app.memory.embeddings import get_embedding_service
+from app.memory.models import JournalEntry, WeeklySummary, Job, CompressionState
+from app.memory.database import run_db
+from app.memory.job_queue import JobQueue, SUMMARIZE_JOB, INDEX_JOB, COMPRESS_JOB
+from app.journal.retrieval import RETRIEVAL_MODES, lexical_query, reciprocal_rank_fusion, recency_factor
+from app.journal.rollups import RollupBuilder
+from app.memory.embedding_worker import get_async_embedding_service
 from app.memory.vector_store import get_vector_store
 from app.memory.summarizer import get_summarizer
+from app.llm.response_cache import get_response_cache
 from app.core.logger import logger
-from datetime import datetime
+from app.config import settings
+from datetime import datetime, timedelta
 
 class JournalService:
-    def __init__(self, db: Session):
-        self.db = db
-        self.embeddings = get_embedding_service()
+    def __init__(self):
+        self.embeddings = get_async_embedding_service()
         self.vector_store = get_vector_store()
         self.summarizer = get_summarizer()
+        self.rollups = RollupBuilder(self.summarizer)
+        # Latest weekly summary text; None until first read. Only _compress
+        # writes summaries, and it refreshes this, so reads never go to the database twice
+        self._weekly_summary = None
+        self.jobs = JobQueue(
+            {SUMMARIZE_JOB: self._run_summaries, INDEX_JOB: self._run_indexing, COMPRESS_JOB: self._run_compression},
+            batch_sizes={SUMMARIZE_JOB: settings.JOB_SUMMARY_BATCH, INDEX_JOB: settings.JOB_INDEX_BATCH},
+        )
 
     async def add_entry(self, text: str):
-        logger.info("Adding journal entry...")
-        
-        # 1. Create entry in DB
-        entry = JournalEntry(raw_text=text)
-        self.db.add(entry)
-        self.db.commit()
-        self.db.refresh(entry)
-        
-        # 2. Generate summary and embedding async
-        summary = await self.summarizer.summarize_entry(text)
-        embedding = self.embeddings.embed(text)
+        """
+        Record an entry. Its summary, embedding and any rollup pass are
+        queued as jobs in the same transaction, so this returns as soon as the
+        row is committed and the work survives a restart.
+        """
+        entry = await run_db(self._record_entry, text)
+        self.jobs.notify()
+        logger.info("Journal entry recorded (ID: {}); summary and indexing queued.", entry.id)
+        return entry
+
+    async def start_background_jobs(self):
+        """Queue work for entries left without a summary or vector (crash, older versions), then start the workers."""
+        indexed = await asyncio.to_thread(self.vector_store.ids)
+        queued = await run_db(self._sweep, indexed)
+        if any(queued.values()):
+            logger.info("Startup sweep queued {} summaries and {} index jobs.", queued[SUMMARIZE_JOB], queued[INDEX_JOB])
+        await self.jobs.start()
+
+    async def add_entries_bulk(self, texts: list[str], timestamps: list[datetime] = None, summarize: bool = True):
+        """Insert many entries in one transaction, then summarize, embed and index them as a batch."""
+        if not texts:
+            return []
+        logger.info("Adding {} journal entries in bulk...", len(texts))
         
-        # 3. Update entry with summary
-        entry.summary = summary
-        self.db.commit()
+        entries = await run_db(self._insert_entries, texts, timestamps)
         
-        # 4. Add to vector store
-        self.vector_store.add(entry.id, embedding)
+        if summarize:
+            semaphore = asyncio.Semaphore(settings.JOURNAL_SUMMARY_CONCURRENCY)
+            
+            async def summarize_one(text: str) -> str:
+                async with semaphore:
+                    return await self.summarizer.summarize_entry(text)
+            
+            summaries, embeddings = await asyncio.gather(
+                asyncio.gather(*(summarize_one(t) for t in texts)),
+                self.embeddings.embed_batch(texts),
+            )
+            await run_db(self._set_summaries, [e.id for e in entries], summaries)
+            for entry, summary in zip(entries, summaries):
+                entry.summary = summary
+            get_response_cache().invalidate([e.id for e in entries])
+        else:
+            embeddings = await self.embeddings.embed_batch(texts)
         
-        logger.info("Journal entry added (ID: {}). Summary: {}", entry.id, summary)
+        await asyncio.to_thread(self.vector_store.add_batch, [e.id for e in entries], embeddings)
+        logger.info("Added {} journal entries.", len(entries))
         
-        # 5. Check for weekly compression
-        await self._check_compression()
-        return entry
+        await self._check_compression(entries[-1].id)
+        return entries
 
     async def search_memory(self, query: str, top_k: int = 3) -> list[str]:
-        query_embedding = self.embeddings.embed(query)
-        entry_ids = self.vector_store.search(query_embedding, top_k)
+        return [text for text, _ in await self.search_memory_scored(query, top_k)]
+
+    async def search_memory_scored(self, query: str, top_k: int = 3) -> list[tuple[str, float]]:
+        """Relevant memories as (text, score) pairs, best first."""
+        return [(memory, score) for _, memory, score in await self.retrieve(query, top_k)]
+
+    async def retrieve(self, query: str, top_k: int = 3, query_embedding=None) -> list[tuple[int, str, float]]:
+        """
+        Relevant memories as (entry_id, text, score), best first.
+
+        In hybrid mode the FAISS neighbours and the FTS5 BM25 matches (which
+        catch exact names and dates) are fused with reciprocal rank fusion and
+        the score is the fused score; in vector mode it is cosine similarity.
+        With recency decay on (RETRIEVAL_HALF_LIFE_DAYS), hybrid mode also fuses
+        the keyword matches from the last two half-lives, and every score is
+        weighted by the entry's age. Pass query_embedding if the caller has
+        already embedded the query.
+        """
+        if settings.RETRIEVAL_MODE not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown RETRIEVAL_MODE {settings.RETRIEVAL_MODE!r}; expected one of {RETRIEVAL_MODES}")
+        decay = settings.RETRIEVAL_HALF_LIFE_DAYS > 0
+        # Recency can promote entries from further down the list
+        candidates = max(top_k, settings.RETRIEVAL_CANDIDATES) if settings.RETRIEVAL_MODE == "hybrid" or decay else top_k
+        now = datetime.utcnow()
+        if query_embedding is None:
+            query_embedding = await self.embeddings.embed(query)
         
-        if not entry_ids:
+        if settings.RETRIEVAL_MODE == "hybrid":
+            searches = [
+                asyncio.to_thread(self.vector_store.search_scored, query_embedding, candidates),
+                run_db(self._search_lexical, query, candidates),
+            ]
+            if decay:
+                # Recent matches get their own list, or they rarely make the candidate cut at all
+                since = now - timedelta(days=2 * settings.RETRIEVAL_HALF_LIFE_DAYS)
+                searches.append(run_db(self._search_lexical, query, candidates, since))
+            vector_hits, *lexical_rankings = await asyncio.gather(*searches)
+            weights = [1.0, 1.0, settings.RETRIEVAL_RECENT_WEIGHT][:len(searches)]
+            scores = reciprocal_rank_fusion([[entry_id for entry_id, _ in vector_hits], *lexical_rankings], weights=weights)
+        else:
+            hits = await asyncio.to_thread(self.vector_store.search_scored, query_embedding, candidates)
+            # Embeddings are unit length, so squared L2 distance d maps to cosine 1 - d/2
+            scores = {entry_id: 1 - distance / 2 for entry_id, distance in hits}
+        if not scores:
             return []
         
-        entries = self.db.query(JournalEntry).filter(JournalEntry.id.in_(entry_ids)).all()
-        return [e.summary or e.raw_text[:100] for e in entries]
+        if decay:
+            timestamps = await run_db(self._load_timestamps, list(scores))
+            scores = {i: s * recency_factor(timestamps.get(i), now) for i, s in scores.items()}
+        top = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        
+        # Hydrate only the winners, in rank order (IN (...) returns rows in table order)
+        entries = await run_db(self._load_entries, top)
+        by_id = {e.id: e for e in entries}
+        return [(entry_id, by_id[entry_id].summary or by_id[entry_id].raw_text[:100], scores[entry_id])
+                for entry_id in top if entry_id in by_id]
 
     async def get_latest_weekly_summary(self) -> str:
-        latest = self.db.query(WeeklySummary).order_by(WeeklySummary.created_at.desc()).first()
+        if self._weekly_summary is None:
+            self._weekly_summary = await run_db(self._latest_weekly_text)
+        return self._weekly_summary
+
+    async def _run_summaries(self, entry_ids: list[int]) -> list[int]:
+        """Summarize job handler; returns the ids Ollama gave no summary for, to be retried."""
+        entries = [e for e in await run_db(self._load_entries, entry_ids) if not e.summary]
+        if not entries:
+            return []
+        summaries = await self.summarizer.summarize_entries([e.raw_text for e in entries])
+        done = [(e.id, s) for e, s in zip(entries, summaries) if s]
+        if done:
+            await run_db(self._set_summaries, [i for i, _ in done], [s for _, s in done])
+            # Lexical search can cite an entry (as raw text) before its summary lands
+            get_response_cache().invalidate([i for i, _ in done])
+            # ...and so can a rollup pass that ran alongside this job
+            if await run_db(RollupBuilder.covers, [i for i, _ in done]):
+                await self.jobs.enqueue(COMPRESS_JOB, [done[-1][0]])
+        return [e.id for e, s in zip(entries, summaries) if not s]
+
+    async def _run_indexing(self, entry_ids: list[int]) -> list[int]:
+        """Index job handler: embed and add to FAISS whatever is not in it yet (a retry may find it there)."""
+        missing = await asyncio.to_thread(self.vector_store.missing, entry_ids)
+        entries = await run_db(self._load_entries, missing) if missing else []
+        if entries:
+            embeddings = await self.embeddings.embed_batch([e.raw_text for e in entries])
+            await asyncio.to_thread(self._add_vectors, [e.id for e in entries], embeddings)
+        return []
+
+    async def _run_compression(self, entry_ids: list[int]) -> list[int]:
+        return [] if await self._compress() else entry_ids
+
+    def _add_vectors(self, entry_ids: list[int], embeddings):
+        self.vector_store.add_batch(entry_ids, embeddings)
+        # The job is marked done right after this, so the vectors have to be in the segment log by then
+        self.vector_store.flush()
+
+    async def _check_compression(self, entry_id: int):
+        def check(db: Session) -> bool:
+            queued = self._queue_compression(db, entry_id)
+            db.commit()
+            return queued
+        if await run_db(check):
+            self.jobs.notify()
+
+    async def _compress(self) -> bool:
+        """Update the day, week and month rollups; False if Ollama failed partway (the job retries)."""
+        if not await self.rollups.update():
+            return False
+        weekly = await run_db(self._latest_weekly_text)
+        if weekly != self._weekly_summary:
+            self._weekly_summary = weekly
+            # Every cached reply was generated under the old summary
+            get_response_cache().clear()
+        return True
+
+    @staticmethod
+    def _record_entry(db: Session, text: str) -> JournalEntry:
+        """Insert an entry together with its summarize and index jobs (and compress, at the threshold)."""
+        entry = JournalEntry(raw_text=text)
+        db.add(entry)
+        db.flush()  # Assigns the id
+        JobQueue.add_jobs(db, SUMMARIZE_JOB, [entry.id])
+        JobQueue.add_jobs(db, INDEX_JOB, [entry.id])
+        JournalService._queue_compression(db, entry.id)
+        db.commit()
+        return entry
+
+    @staticmethod
+    def _queue_compression(db: Session, entry_id: int) -> bool:
+        """
+        Add a compress job once JOURNAL_COMPRESSION_THRESHOLD entries have
+        been inserted since the last one, and restart the count. The insert
+        trigger keeps the count, and checking and resetting it in the
+        inserting transaction means bulk or concurrent adds cannot step past
+        the threshold unnoticed.
+        """
+        state = db.get(CompressionState, 1)
+        if state is None or state.pending_entries < settings.JOURNAL_COMPRESSION_THRESHOLD:
+            return False
+        logger.info("Compression threshold reached ({} new entries).", state.pending_entries)
+        state.pending_entries = 0
+        JobQueue.add_jobs(db, COMPRESS_JOB, [entry_id])
+        return True
+
+    @staticmethod
+    def _sweep(db: Session, indexed: set) -> dict:
+        """Add jobs for entries with no summary or no vector that no open job covers."""
+        open_jobs = set(db.query(Job.kind, Job.entry_id).filter(Job.status.in_(("pending", "running"))).all())
+        unsummarized = [i for (i,) in db.query(JournalEntry.id).filter(or_(JournalEntry.summary.is_(None), JournalEntry.summary == ""))
+                        if (SUMMARIZE_JOB, i) not in open_jobs]
+        unindexed = [i for (i,) in db.query(JournalEntry.id) if i not in indexed and (INDEX_JOB, i) not in open_jobs]
+        JobQueue.add_jobs(db, SUMMARIZE_JOB, unsummarized)
+        JobQueue.add_jobs(db, INDEX_JOB, unindexed)
+        db.commit()
+        return {SUMMARIZE_JOB: len(unsummarized), INDEX_JOB: len(unindexed)}
+
+    @staticmethod
+    def _insert_entries(db: Session, texts: list[str], timestamps: list[datetime] = None) -> list[JournalEntry]:
+        entries = [JournalEntry(raw_text=text) for text in texts]
+        if timestamps:
+            for entry, timestamp in zip(entries, timestamps):
+                if timestamp is not None:
+                    entry.timestamp = timestamp
+        db.add_all(entries)
+        db.commit()
+        return entries
+
+    @staticmethod
+    def _set_summaries(db: Session, entry_ids: list[int], summaries: list[str]):
+        db.execute(update(JournalEntry), [{"id": i, "summary": s} for i, s in zip(entry_ids, summaries)])
+        db.commit()
+
+    @staticmethod
+    def _load_entries(db: Session, entry_ids: list[int]) -> list[JournalEntry]:
+        return db.query(JournalEntry).filter(JournalEntry.id.in_(entry_ids)).all()
+
+    @staticmethod
+    def _load_timestamps(db: Session, entry_ids: list[int]) -> dict[int, datetime]:
+        return dict(db.query(JournalEntry.id, JournalEntry.timestamp).filter(JournalEntry.id.in_(entry_ids)).all())
+
+    @staticmethod
+    def _search_lexical(db: Session, query: str, limit: int, since: datetime = None) -> list[int]:
+        """Entry ids matching the query's keywords, best BM25 first (raw text weighs more than the summary)."""
+        match = lexical_query(query)
+        if not match:
+            return []
+        # A join, not rowid IN (...): that makes FTS5 look every recent row up one at a time
+        recent = ("JOIN journal_entries ON journal_entries.id = journal_fts.rowid "
+                  "WHERE journal_entries.timestamp >= :since AND " if since else "WHERE ")
+        try:
+            rows = db.execute(
+                text(f"SELECT journal_fts.rowid FROM journal_fts {recent}journal_fts MATCH :match "
+                     "ORDER BY bm25(journal_fts, 1.0, 0.5) LIMIT :limit"),
+                {"match": match, "limit": limit, "since": since},
+            ).all()
+        except OperationalError as e:
+            # No FTS5 in this SQLite build (init_db already warned)
+            logger.debug("Lexical search unavailable: {}", e)
+            return []
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _latest_weekly_text(db: Session) -> str:
+        """The newest week rollup, else the newest summary from before rollups existed."""
+        latest = RollupBuilder.latest(db, "week") or JournalService._latest_weekly_summary(db)
         return latest.summary_text if latest else ""
 
-    async def _check_compression(self):
-        count = self.db.query(JournalEntry).count()
-        if count > 0 and count % 25 == 0:
-            logger.info("Compression threshold reached ({} entries). Generating weekly summary...", count)
-            # Take last 25 entries
-            entries = self.db.query(JournalEntry).order_by(JournalEntry.timestamp.desc()).limit(25).all()
-            texts = [e.raw_text for e in entries]
-            
-            summary_text = await self.summarizer.summarize_weekly(texts)
-            
-            weekly = WeeklySummary(
-                week_start=entries[-1].timestamp,
-                summary_text=summary_text
-            )
-            self.db.add(weekly)
-            self.db.commit()
-            logger.info("Weekly summary created.")
+    @staticmethod
+    def _latest_weekly_summary(db: Session):
+        return db.query(WeeklySummary).order_by(WeeklySummary.created_at.desc()).first()
@@ -0,0 +1,51 @@
+import re
+from difflib import SequenceMatcher
+from datetime import datetime
+from app.config import settings
+
+RETRIEVAL_MODES = ("hybrid", "vector")
+
+# Too common to say anything about which entry is meant; they only slow BM25 down
+STOPWORDS = frozenset(
+    "a about am an and are as at be been but by can did do does for from had has have he her him his how i if in "
+    "into is it its just me my no not of on or our she so than that the their them then there they this to too "
+    "was we were what when where which who why will with would you your".split()
+)
+
+def lexical_query(text: str, max_terms: int = 16) -> str:
+    """FTS5 MATCH expression OR-ing the distinctive words of `text`; each is quoted so no query syntax leaks in."""
+    terms = []
+    for word in re.findall(r"\w+", text.lower()):
+        if word not in STOPWORDS and word not in terms and (len(word) > 1 or word.isdigit()):
+            terms.append(word)
+    return " OR ".join(f'"{term}"' for term in terms[:max_terms])
+
+def reciprocal_rank_fusion(rankings: list[list[int]], k: int = None, weights: list[float] = None) -> dict[int, float]:
+    """Fuse best-first id lists: each list contributes weight / (k + rank) per id (rank from 1)."""
+    k = k or settings.RETRIEVAL_RRF_K
+    weights = weights or [1.0] * len(rankings)
+    scores = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, entry_id in enumerate(ranking, start=1):
+            scores[entry_id] = scores.get(entry_id, 0.0) + weight / (k + rank)
+    return scores
+
+def recency_factor(timestamp: datetime, now: datetime, half_life_days: float = None) -> float:
+    """
+    Score multiplier for an entry's age: halves the decaying part every
+    half-life, down to RETRIEVAL_DECAY_FLOOR, so old but strongly matching
+    entries can still win. 1.0 when decay is off (half-life 0).
+    """
+    half_life = settings.RETRIEVAL_HALF_LIFE_DAYS if half_life_days is None else half_life_days
+    if half_life <= 0 or timestamp is None:
+        return 1.0
+    age_days = max(0.0, (now - timestamp).total_seconds() / 86400)
+    floor = settings.RETRIEVAL_DECAY_FLOOR
+    return floor + (1 - floor) * 0.5 ** (age_days / half_life)
+
+def transcript_similarity(a: str, b: str) -> float:
+    """Word-level similarity of two transcripts in [0, 1], ignoring case and punctuation."""
+    words_a, words_b = re.findall(r"\w+", a.lower()), re.findall(r"\w+", b.lower())
+    if not words_a and not words_b:
+        return 1.0
+    return SequenceMatcher(None, words_a, words_b, autojunk=False).ratio()
@@ -0,0 +1,187 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from app.memory.models import JournalEntry, Rollup, CompressionState, Job
+from app.memory.job_queue import SUMMARIZE_JOB
+from app.memory.database import run_db
+from app.llm.tokens import count_tokens, truncate_to_tokens
+from app.core.logger import logger
+from app.config import settings
+
+LEVEL_BELOW = {"week": "day", "month": "week"}
+
+def period_start(level: str, timestamp: datetime) -> datetime:
+    """Start of the day, week (Monday) or month containing timestamp."""
+    day = datetime(timestamp.year, timestamp.month, timestamp.day)
+    if level == "day":
+        return day
+    if level == "week":
+        return day - timedelta(days=day.weekday())
+    if level == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unknown rollup level {level!r}")
+
+def period_end(level: str, start: datetime) -> datetime:
+    if level == "day":
+        return start + timedelta(days=1)
+    if level == "week":
+        return start + timedelta(days=7)
+    if level == "month":
+        return (start + timedelta(days=32)).replace(day=1)
+    raise ValueError(f"Unknown rollup level {level!r}")
+
+class RollupBuilder:
+    """
+    Hierarchical journal compression: day rollups from the entries' one-line
+    summaries, week rollups from the days, month rollups from the weeks (a
+    week belongs to the month it starts in), each through
+    Summarizer.summarize_rollup. A day short enough to read as it is
+    (ROLLUP_DAY_VERBATIM_TOKENS) keeps its entry summaries without a call,
+    and a month is summarized once it is over; until then its weeks stand
+    for it.
+
+    A pass only touches the months that gained entries since the last one
+    (past CompressionState.last_entry_id) and the month before each. Each
+    rollup records the newest entry under it and how many of its entries
+    had a summary, and is rebuilt only when either changes, so a pass
+    rebuilds the changed days and the weeks and month above them, a retry
+    after an Ollama failure resumes where it stopped, and lower rollups
+    missing for older entries are built on the way. An entry without a
+    summary is read as raw text. While its summarize job is still open the
+    watermark stops short of it, and JournalService queues another pass
+    when the summary lands; once the job has failed for good, the raw text
+    stays.
+    """
+
+    def __init__(self, summarizer):
+        self.summarizer = summarizer
+        self._lock = asyncio.Lock()  # Compress jobs can overlap; passes must not
+
+    async def update(self) -> bool:
+        """Bring the rollups up to date with the journal; False if a summary failed (retry the pass)."""
+        async with self._lock:
+            upto, months, current = await run_db(self._dirty_months)
+            calls, tokens, start = self.summarizer.calls, self.summarizer.prompt_tokens, time.perf_counter()
+            built = {"day": 0, "week": 0, "month": 0}
+            for month in months:
+                # The month in progress only gets its weeks
+                if not await self._build("month", month, built, summarize=month != current):
+                    return False
+            await run_db(self._advance, upto)
+            if any(built.values()):
+                logger.info("Rollups rebuilt (days/weeks/months): {}/{}/{} in {} Ollama calls "
+                            "({} prompt tokens, {:.1f} s).", built["day"], built["week"], built["month"],
+                            self.summarizer.calls - calls, self.summarizer.prompt_tokens - tokens,
+                            time.perf_counter() - start)
+            return True
+
+    async def _build(self, level: str, start: datetime, built: dict, summarize: bool = True) -> bool:
+        if level in LEVEL_BELOW:
+            for child in await run_db(self._child_periods, level, start):
+                if not await self._build(LEVEL_BELOW[level], child, built):
+                    return False
+        if not summarize:
+            return True
+        texts, entry_count, last_entry_id, summarized = await run_db(self._sources, level, start)
+        if not texts or await run_db(self._built_from, level, start) == (last_entry_id, summarized):
+            return True
+
+        if level == "day" and count_tokens(" ".join(texts)) <= settings.ROLLUP_DAY_VERBATIM_TOKENS:
+            summary = " ".join(texts)
+        else:
+            summary = await self.summarizer.summarize_rollup(level, texts)
+        if not summary:
+            logger.warning("{} rollup for {:%Y-%m-%d} came back empty; will retry.", level.capitalize(), start)
+            return False
+        await run_db(self._save, level, start, summary, entry_count, last_entry_id, summarized)
+        built[level] += 1
+        return True
+
+    @staticmethod
+    def _dirty_months(db: Session) -> tuple[int, list[datetime], datetime]:
+        """
+        The new watermark (newest entry id, or the entry before the first one
+        still waiting for its summary); the months (by week start) holding
+        entries newer than the last pass, and the month before each (it may
+        have just ended); and the month in progress.
+        """
+        state = db.get(CompressionState, 1)
+        since = state.last_entry_id if state else 0
+        rows = db.query(JournalEntry.id, JournalEntry.timestamp, JournalEntry.summary).filter(JournalEntry.id > since).all()
+        # Only a pending or running summarize job can still change an entry; failed ones keep their raw text
+        waiting = [entry_id for (entry_id,) in db.query(Job.entry_id).filter(
+            Job.kind == SUMMARIZE_JOB, Job.status.in_(("pending", "running")),
+            Job.entry_id.in_([entry_id for entry_id, _, summary in rows if not summary]))]
+        upto = min(waiting) - 1 if waiting else max((entry_id for entry_id, _, _ in rows), default=since)
+        months = {period_start("month", period_start("week", timestamp)) for _, timestamp, _ in rows}
+        months |= {period_start("month", month - timedelta(days=1)) for month in months}
+        newest = db.query(JournalEntry.timestamp).order_by(JournalEntry.timestamp.desc()).first()
+        current = period_start("month", period_start("week", newest[0])) if newest else None
+        return upto, sorted(months), current
+
+    @staticmethod
+    def _advance(db: Session, upto: int):
+        db.query(CompressionState).filter(CompressionState.id == 1).update({CompressionState.last_entry_id: upto})
+        db.commit()
+
+    @staticmethod
+    def _child_periods(db: Session, level: str, start: datetime) -> list[datetime]:
+        """Starts of the lower-level periods under this one that have entries."""
+        child, end = LEVEL_BELOW[level], period_end(level, start)
+        # A month's last week runs past its end
+        rows = db.query(JournalEntry.timestamp).filter(
+            JournalEntry.timestamp >= start, JournalEntry.timestamp < end + timedelta(days=7))
+        return sorted({s for s in (period_start(child, timestamp) for (timestamp,) in rows) if s < end})
+
+    @staticmethod
+    def _sources(db: Session, level: str, start: datetime) -> tuple[list[str], int, int, int]:
+        """
+        Texts a rollup is built from (oldest first), the entries under it, the
+        newest entry id, and how many entries have a summary.
+        """
+        end = period_end(level, start)
+        if level == "day":
+            entries = (db.query(JournalEntry).filter(JournalEntry.timestamp >= start, JournalEntry.timestamp < end)
+                       .order_by(JournalEntry.timestamp).all())
+            # Raw text only for entries whose summary job has not run yet
+            texts = [e.summary or truncate_to_tokens(e.raw_text, settings.PROMPT_MEMORY_MAX_TOKENS) for e in entries]
+            return (texts, len(entries), max((e.id for e in entries), default=0),
+                    sum(1 for e in entries if e.summary))
+        children = (db.query(Rollup).filter(Rollup.level == LEVEL_BELOW[level], Rollup.period_start >= start,
+                                            Rollup.period_start < end).order_by(Rollup.period_start).all())
+        return ([r.summary_text for r in children], sum(r.entry_count for r in children),
+                max((r.last_entry_id for r in children), default=0), sum(r.summarized_count for r in children))
+
+    @staticmethod
+    def _built_from(db: Session, level: str, start: datetime):
+        """(newest entry id, summarized entries) the saved rollup was built from, or None."""
+        rollup = (db.query(Rollup.last_entry_id, Rollup.summarized_count)
+                  .filter(Rollup.level == level, Rollup.period_start == start).first())
+        return tuple(rollup) if rollup else None
+
+    @staticmethod
+    def covers(db: Session, entry_ids: list[int]) -> bool:
+        """Whether a day rollup already includes any of these entries (so it was built from their raw text)."""
+        for entry_id, timestamp in db.query(JournalEntry.id, JournalEntry.timestamp).filter(JournalEntry.id.in_(entry_ids)):
+            built = RollupBuilder._built_from(db, "day", period_start("day", timestamp))
+            if built and built[0] >= entry_id:
+                return True
+        return False
+
+    @staticmethod
+    def _save(db: Session, level: str, start: datetime, summary: str, entry_count: int, last_entry_id: int,
+              summarized: int):
+        rollup = db.query(Rollup).filter(Rollup.level == level, Rollup.period_start == start).first()
+        if rollup is None:
+            rollup = Rollup(level=level, period_start=start)
+            db.add(rollup)
+        rollup.summary_text = summary
+        rollup.entry_count = entry_count
+        rollup.last_entry_id = last_entry_id
+        rollup.summarized_count = summarized
+        db.commit()
+
+    @staticmethod
+    def latest(db: Session, level: str):
+        return db.query(Rollup).filter(Rollup.level == level).order_by(Rollup.period_start.desc()).first()
@@ -0,0 +1,98 @@
+from app.config import settings
+from app.core.logger import logger
+from app.llm.ollama_client import get_ollama_client, OllamaError
+from app.llm.ollama_stream import CONNECTION_BROKEN_REPLY, STREAM_FAILED_REPLY
+from app.llm.prompt_builder import pack_prompt, MESSAGE_OVERHEAD_TOKENS
+from app.llm.tokens import count_tokens
+
+class ChatSession:
+    """
+    Multi-turn conversation over /api/chat with a stable prefix.
+
+    Ollama keeps the KV cache of the previous request and only evaluates the
+    tokens after the longest common prefix. The system message (persona plus
+    weekly summary) and the history are therefore sent exactly as they were on
+    earlier turns: user messages are stored with the memories they carried,
+    and the history is trimmed in one step down to half of CHAT_HISTORY_TURNS
+    rather than one exchange per turn, so the cached prefix is only broken
+    every few turns instead of on every one. Oldest exchanges are also dropped
+    when the history no longer fits the prompt token budget.
+    """
+
+    def __init__(self, max_turns: int = None):
+        self.max_turns = max_turns or settings.CHAT_HISTORY_TURNS
+        self.history = []
+        self.last_stats = {}
+        self.last_tokens = {}
+
+    def build_messages(self, user_input: str, memories: list = None, weekly_summary: str = "") -> list[dict]:
+        packed = pack_prompt(user_input, memories, weekly_summary)
+        history_budget = packed.tokens["budget"] - packed.tokens["total"]
+        while self.history and self._history_tokens() > history_budget:
+            self.history = self.history[2:]
+
+        self.last_tokens = {**packed.tokens, "history": self._history_tokens()}
+        self.last_tokens["total"] += self.last_tokens["history"]
+        return [
+            {"role": "system", "content": packed.system_message()},
+            *self.history,
+            {"role": "user", "content": packed.user_message()},
+        ]
+
+    async def stream(self, user_input: str, memories: list = None, weekly_summary: str = ""):
+        messages = self.build_messages(user_input, memories, weekly_summary)
+        payload = {
+            "model": settings.OLLAMA_MODEL,
+            "messages": messages,
+            "options": {
+                "temperature": settings.TEMPERATURE,
+                "num_ctx": settings.NUM_CTX,
+                "num_predict": settings.MAX_TOKENS
+            }
+        }
+
+        reply = []
+        try:
+            async for data in get_ollama_client().stream(payload, url=settings.OLLAMA_CHAT_URL):
+                token = data.get("message", {}).get("content", "")
+                if token:
+                    reply.append(token)
+                    yield token
+                if data.get("done"):
+                    self.last_stats = {
+                        "prompt_eval_count": data.get("prompt_eval_count", 0),
+                        "prompt_eval_ms": data.get("prompt_eval_duration", 0) / 1e6,
+                        "packed_tokens": self.last_tokens.get("total", 0),
+                    }
+                    logger.debug("Chat turn packed {packed_tokens} prompt tokens, evaluated {prompt_eval_count} "
+                                 "in {prompt_eval_ms:.0f} ms",
+                                 **self.last_stats)
+        except OllamaError as e:
+            logger.error("Ollama chat error: {}", e)
+            yield CONNECTION_BROKEN_REPLY
+            return
+        except Exception as e:
+            logger.error("Error streaming chat from Ollama: {}", e)
+            yield STREAM_FAILED_REPLY
+            return
+        finally:
+            # Keep whatever was actually said, even if the consumer stopped early
+            if reply:
+                self._remember(messages[-1], "".join(reply))
+
+    def record(self, user_input: str, memories: list = None, weekly_summary: str = "", reply: str = ""):
+        """Add an exchange answered without Ollama (a cached reply) to the history, as stream() would have."""
+        messages = self.build_messages(user_input, memories, weekly_summary)
+        self._remember(messages[-1], reply)
+
+    def _history_tokens(self) -> int:
+        return sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in self.history)
+
+    def reset(self):
+        self.history = []
+
+    def _remember(self, user_message: dict, reply: str):
+        self.history.extend([user_message, {"role": "assistant", "content": reply}])
+        if len(self.history) > 2 * self.max_turns:
+            keep = max(1, self.max_turns // 2)
+            self.history = self.history[-2 * keep:]
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import random
+import aiohttp
+from app.config import settings
+from app.core.logger import logger
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class OllamaError(Exception):
+    pass
+
+class OllamaClient:
+    """
+    One long-lived HTTP session to Ollama, shared by the conversation stream
+    and the summarizer.
+
+    The connection pool keeps sockets alive between turns, every request
+    carries `keep_alive` so the model stays resident in Ollama, and connection
+    failures or 429/5xx responses are retried with jittered exponential backoff.
+    Streams are only retried before their first token has been yielded.
+    """
+
+    def __init__(self, base_url: str = None):
+        self.url = base_url or settings.OLLAMA_URL
+        self._session = None
+        self._loop = None
+
+    async def generate(self, payload: dict, url: str = None) -> dict:
+        """POST a non-streaming request and return the decoded JSON response."""
+        payload = self._with_defaults(payload, stream=False)
+        for attempt in range(settings.OLLAMA_MAX_RETRIES + 1):
+            try:
+                session = self._get_session()
+                async with session.post(url or self.url, json=payload) as resp:
+                    if resp.status == 200:
+                        return await resp.json()
+                    await self._raise_for_status(resp, attempt)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                await self._backoff(attempt, e)
+        raise OllamaError("Ollama request failed after retries")
+
+    async def stream(self, payload: dict, url: str = None):
+        """POST a streaming request and yield each decoded JSON line until `done`."""
+        payload = self._with_defaults(payload, stream=True)
+        for attempt in range(settings.OLLAMA_MAX_RETRIES + 1):
+            started = False
+            try:
+                session = self._get_session()
+                async with session.post(url or self.url, json=payload) as resp:
+                    if resp.status != 200:
+                        await self._raise_for_status(resp, attempt)
+                        continue
+                    async for line in resp.content:
+                        if not line.strip():
+                            continue
+                        data = json.loads(line.decode("utf-8"))
+                        if "error" in data:
+                            raise OllamaError(data["error"])
+                        started = True
+                        yield data
+                        if data.get("done"):
+                            break
+                    return
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if started:
+                    # Tokens already reached the caller; replaying would duplicate them
+                    raise OllamaError(f"Ollama stream interrupted: {e}") from e
+                await self._backoff(attempt, e)
+        raise OllamaError("Ollama stream failed after retries")
+
+    async def warm_up(self):
+        """Load the model into memory ahead of the first turn (empty prompt, no generation)."""
+        try:
+            await self.generate({"model": settings.OLLAMA_MODEL, "prompt": ""})
+            logger.info("Ollama model {} is resident (keep_alive={})", settings.OLLAMA_MODEL, settings.OLLAMA_KEEP_ALIVE)
+        except Exception as e:
+            logger.warning("Ollama warm-up failed: {}", e)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # aiohttp sessions are bound to the loop that created them (the CLI
+        # import path runs its own asyncio.run), so rebuild on a loop change
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=settings.OLLAMA_POOL_SIZE,
+                keepalive_timeout=settings.OLLAMA_CONNECTION_KEEPALIVE,
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=None,
+                connect=settings.OLLAMA_CONNECT_TIMEOUT,
+                sock_read=settings.OLLAMA_READ_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._loop = loop
+        return self._session
+
+    def _with_defaults(self, payload: dict, stream: bool) -> dict:
+        payload = {"stream": stream, **payload}
+        payload.setdefault("keep_alive", settings.OLLAMA_KEEP_ALIVE)
+        return payload
+
+    async def _raise_for_status(self, resp: aiohttp.ClientResponse, attempt: int):
+        body = (await resp.text())[:200]
+        if resp.status not in RETRY_STATUSES:
+            raise OllamaError(f"Ollama returned {resp.status}: {body}")
+        await self._backoff(attempt, f"HTTP {resp.status}")
+
+    async def _backoff(self, attempt: int, reason):
+        if attempt >= settings.OLLAMA_MAX_RETRIES:
+            raise OllamaError(f"Ollama unavailable: {reason}")
+        delay = settings.OLLAMA_RETRY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5)
+        logger.warning("Ollama request failed ({}); retrying in {:.2f}s", reason, delay)
+        await asyncio.sleep(delay)
+
+# Singleton
+_ollama_client = None
+
+def get_ollama_client():
+    global _ollama_client
+    if _ollama_client is None:
+        _ollama_client = OllamaClient()
+    return _ollama_client
@@ -1,13 +1,15 @@
-import aiohttp
-import json
 from app.config import settings
 from app.core.logger import logger
+from app.llm.ollama_client import get_ollama_client, OllamaError
+
+# Fixed fallback lines (also pre-rendered into the TTS audio cache)
+CONNECTION_BROKEN_REPLY = "I am silent, for the connection is broken."
+STREAM_FAILED_REPLY = "The void consumes my words."
 
 async def stream_llm_response(prompt: str):
     payload = {
         "model": settings.OLLAMA_MODEL,
         "prompt": prompt,
-        "stream": True,
         "options": {
             "temperature": settings.TEMPERATURE,
             "num_ctx": settings.NUM_CTX,
@@ -16,24 +18,13 @@ async def stream_llm_response(prompt: str):
     }
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(settings.OLLAMA_URL, json=payload) as resp:
-                if resp.status != 200:
-                    logger.error("Ollama streaming error: {}", resp.status)
-                    yield "I am silent, for the connection is broken."
-                    return
-
-                async for line in resp.content:
-                    if not line:
-                        continue
-                    
-                    data = json.loads(line.decode("utf-8"))
-                    token = data.get("response", "")
-                    if token:
-                        yield token
-                    
-                    if data.get("done"):
-                        break
+        async for data in get_ollama_client().stream(payload):
+            token = data.get("response", "")
+            if token:
+                yield token
+    except OllamaError as e:
+        logger.error("Ollama streaming error: {}", e)
+        yield CONNECTION_BROKEN_REPLY
     except Exception as e:
         logger.error("Error streaming from Ollama: {}", e)
-        yield "The void consumes my words."
+        yield STREAM_FAILED_REPLY
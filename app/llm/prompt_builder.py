@@ -1,12 +1,16 @@
+from dataclasses import dataclass, field
 from app.config import settings
+from app.llm.tokens import count_tokens, truncate_to_tokens
 
-SYSTEM_PROMPT = """You are Kratos. 
+PERSONA_PROMPT = """You are Kratos. 
 You speak in short, powerful sentences. 
 You guide the user toward strength and resilience. 
 You are emotionally grounded, not aggressive. 
 Never ramble. 
 Be concise.
+"""
 
+SYSTEM_PROMPT = PERSONA_PROMPT + """
 Relevant past memories:
 {memories}
 
@@ -14,13 +18,105 @@ Latest context:
 {weekly_summary}
 """
 
-def build_prompt(user_input: str, memories: list[str] = None, weekly_summary: str = "") -> str:
-    mem_str = "\n".join([f"- {m}" for m in memories]) if memories else "No previous records."
-    
-    full_prompt = SYSTEM_PROMPT.format(
-        memories=mem_str,
-        weekly_summary=weekly_summary or "No summary available."
-    )
-    
-    full_prompt += f"\nUser: {user_input}\nKratos:"
-    return full_prompt
+# Chat mode keeps per-turn memories out of the system message so the
+# system + history prefix stays byte-identical between turns
+CHAT_SYSTEM_PROMPT = PERSONA_PROMPT + """
+Latest context:
+{weekly_summary}
+"""
+
+# Chat-template tokens around each message (role header, end-of-turn)
+MESSAGE_OVERHEAD_TOKENS = 4
+# Below this, a truncated memory carries too little to be worth including
+MIN_MEMORY_TOKENS = 12
+
+@dataclass
+class PackedPrompt:
+    """Prompt parts that fit the token budget, plus per-part token counts for instrumentation."""
+    user_input: str
+    weekly_summary: str
+    memories: list[str]
+    tokens: dict = field(default_factory=dict)
+
+    def system_message(self) -> str:
+        return build_system_message(self.weekly_summary)
+
+    def user_message(self) -> str:
+        return build_user_message(self.user_input, self.memories)
+
+    def prompt(self) -> str:
+        full_prompt = SYSTEM_PROMPT.format(
+            memories=format_memories(self.memories),
+            weekly_summary=self.weekly_summary
+        )
+        return full_prompt + f"\nUser: {self.user_input}\nKratos:"
+
+def prompt_budget() -> int:
+    """Prompt tokens available: PROMPT_TOKEN_BUDGET, or the context window minus room for the reply."""
+    return settings.PROMPT_TOKEN_BUDGET or settings.NUM_CTX - settings.MAX_TOKENS
+
+def rank_memories(memories: list) -> list[str]:
+    """Memories as (text, score) pairs are ordered best-first; plain strings keep their order."""
+    if memories and isinstance(memories[0], tuple):
+        return [text for text, _ in sorted(memories, key=lambda m: m[1], reverse=True)]
+    return list(memories or [])
+
+def format_memories(memories: list[str] = None) -> str:
+    return "\n".join([f"- {m}" for m in memories]) if memories else "No previous records."
+
+def pack_prompt(user_input: str, memories: list = None, weekly_summary: str = "", budget: int = None) -> PackedPrompt:
+    """
+    Fit persona, weekly summary, memories and user turn into the token budget.
+
+    The persona is never cut. The user turn may use up to half the budget, the
+    weekly summary up to PROMPT_WEEKLY_MAX_TOKENS, and memories fill what is
+    left in retrieval-score order, each capped at PROMPT_MEMORY_MAX_TOKENS.
+    """
+    budget = budget or prompt_budget()
+    user_input = truncate_to_tokens(user_input, budget // 2)
+    weekly_summary = truncate_to_tokens(weekly_summary or "No summary available.", settings.PROMPT_WEEKLY_MAX_TOKENS)
+    packed = PackedPrompt(user_input, weekly_summary, [])
+
+    fixed = count_tokens(packed.system_message()) + count_tokens(user_input) + 2 * MESSAGE_OVERHEAD_TOKENS
+    if fixed > budget:
+        # Give up summary text before anything else
+        weekly_tokens = count_tokens(weekly_summary) - (fixed - budget)
+        packed.weekly_summary = truncate_to_tokens(weekly_summary, weekly_tokens) or "No summary available."
+        fixed = count_tokens(packed.system_message()) + count_tokens(user_input) + 2 * MESSAGE_OVERHEAD_TOKENS
+
+    ranked = rank_memories(memories)
+    remaining = budget - fixed - count_tokens("Relevant past memories:\n\n")
+    for memory in ranked:
+        memory = truncate_to_tokens(memory, settings.PROMPT_MEMORY_MAX_TOKENS)
+        cost = count_tokens(f"- {memory}\n")
+        if cost > remaining:
+            if remaining >= MIN_MEMORY_TOKENS:
+                packed.memories.append(truncate_to_tokens(memory, remaining - 2))
+            break
+        packed.memories.append(memory)
+        remaining -= cost
+
+    system_tokens = count_tokens(packed.system_message())
+    user_tokens = count_tokens(packed.user_message())
+    packed.tokens = {
+        "persona": count_tokens(PERSONA_PROMPT),
+        "weekly": count_tokens(packed.weekly_summary),
+        "memories": user_tokens - count_tokens(user_input),
+        "user": count_tokens(user_input),
+        "total": system_tokens + user_tokens + 2 * MESSAGE_OVERHEAD_TOKENS,
+        "budget": budget,
+        "memories_used": len(packed.memories),
+        "memories_dropped": len(ranked) - len(packed.memories),
+    }
+    return packed
+
+def build_prompt(user_input: str, memories: list = None, weekly_summary: str = "") -> str:
+    return pack_prompt(user_input, memories, weekly_summary).prompt()
+
+def build_system_message(weekly_summary: str = "") -> str:
+    return CHAT_SYSTEM_PROMPT.format(weekly_summary=weekly_summary or "No summary available.")
+
+def build_user_message(user_input: str, memories: list[str] = None) -> str:
+    if not memories:
+        return user_input
+    return f"Relevant past memories:\n{format_memories(memories)}\n\n{user_input}"
@@ -0,0 +1,123 @@
+import re
+import time
+from collections import OrderedDict
+from contextlib import aclosing
+from dataclasses import dataclass
+import numpy as np
+from app.config import settings
+from app.core.logger import logger
+from app.llm.ollama_stream import CONNECTION_BROKEN_REPLY, STREAM_FAILED_REPLY
+
+@dataclass
+class CachedReply:
+    embedding: np.ndarray
+    memory_ids: frozenset
+    reply: str
+    created_at: float
+
+class ResponseCache:
+    """
+    In-memory semantic cache of Kratos' replies.
+
+    A reply is reused when the new question's embedding has cosine similarity
+    of at least RESPONSE_CACHE_MIN_SIMILARITY with a cached question and the
+    same journal entries were retrieved for it, so "what did I do yesterday?"
+    asked twice in a few minutes is answered once. Entries expire after
+    RESPONSE_CACHE_TTL_SECONDS and the least recently used are dropped beyond
+    RESPONSE_CACHE_MAX_ENTRIES. New entries change what retrieval returns and
+    so miss on their own; edits to entries already cited (a summary landing
+    after the raw text was indexed) and new weekly summaries are invalidated
+    by JournalService. Only the event loop touches it, so there is no lock.
+    """
+
+    def __init__(self, max_entries: int = None, ttl_seconds: float = None, min_similarity: float = None):
+        self.max_entries = max_entries or settings.RESPONSE_CACHE_MAX_ENTRIES
+        self.ttl = ttl_seconds if ttl_seconds is not None else settings.RESPONSE_CACHE_TTL_SECONDS
+        self.min_similarity = min_similarity if min_similarity is not None else settings.RESPONSE_CACHE_MIN_SIMILARITY
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # id -> CachedReply, least recently used first
+        self._next_id = 0
+
+    def lookup(self, embedding: np.ndarray, memory_ids) -> str:
+        """The cached reply for a question like this one with the same memories, or None."""
+        self._expire()
+        memory_ids = frozenset(memory_ids)
+        best, best_similarity = None, self.min_similarity
+        for key, entry in self._entries.items():
+            if entry.memory_ids != memory_ids:
+                continue
+            # Embeddings are unit length, so the dot product is the cosine
+            similarity = float(np.dot(entry.embedding, embedding))
+            if similarity >= best_similarity:
+                best, best_similarity = key, similarity
+        if best is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(best)
+        self.hits += 1
+        logger.debug("Response cache hit (cosine {:.3f})", best_similarity)
+        return self._entries[best].reply
+
+    def store(self, embedding: np.ndarray, memory_ids, reply: str):
+        reply = reply.strip()
+        # Failures are spoken as canned lines; never replay them as answers
+        if not reply or reply in (CONNECTION_BROKEN_REPLY, STREAM_FAILED_REPLY):
+            return
+        self._entries[self._next_id] = CachedReply(np.asarray(embedding, dtype=np.float32), frozenset(memory_ids),
+                                                   reply, time.monotonic())
+        self._next_id += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def recording(self, token_generator, embedding: np.ndarray, memory_ids):
+        """
+        Pass tokens through, caching the reply only if the stream ran to the
+        end (not cut off by barge-in) without failing. The LLM streams report
+        a failure by yielding a canned line as one token, possibly after part
+        of the reply, so that line anywhere in the stream rules it out.
+        """
+        tokens, failed = [], False
+        async with aclosing(token_generator) as stream:
+            async for token in stream:
+                failed = failed or token in (CONNECTION_BROKEN_REPLY, STREAM_FAILED_REPLY)
+                tokens.append(token)
+                yield token
+        if not failed:
+            self.store(embedding, memory_ids, "".join(tokens))
+
+    def invalidate(self, entry_ids) -> int:
+        """Drop replies built on any of these journal entries; returns how many."""
+        entry_ids = set(entry_ids)
+        stale = [key for key, entry in self._entries.items() if entry.memory_ids & entry_ids]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            logger.debug("Response cache: {} replies invalidated by journal changes", len(stale))
+        return len(stale)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def _expire(self):
+        deadline = time.monotonic() - self.ttl
+        stale = [key for key, entry in self._entries.items() if entry.created_at < deadline]
+        for key in stale:
+            del self._entries[key]
+
+async def replay_reply(reply: str):
+    """Token stream for a cached reply, word by word, so it goes through the same TTS segmentation."""
+    for token in re.findall(r"\S+\s*", reply):
+        yield token
+
+# Singleton
+_response_cache = None
+
+def get_response_cache():
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
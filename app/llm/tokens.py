@@ -0,0 +1,60 @@
+import re
+from functools import lru_cache
+from pathlib import Path
+from app.config import settings
+from app.core.logger import logger
+
+# Rough chars-per-token for English text with Llama-style BPE vocabularies
+CHARS_PER_TOKEN = 4
+_SENTENCE_END = re.compile(r"[.!?](?=\s|$)")
+
+@lru_cache(maxsize=1)
+def get_tokenizer():
+    """
+    Load the prompt tokenizer once (a tokenizer.json path or a Hugging Face repo id).
+
+    Returns None when PROMPT_TOKENIZER is unset or cannot be loaded, in which
+    case counts fall back to a character estimate.
+    """
+    if not settings.PROMPT_TOKENIZER:
+        return None
+    try:
+        from tokenizers import Tokenizer
+        if Path(settings.PROMPT_TOKENIZER).exists():
+            return Tokenizer.from_file(settings.PROMPT_TOKENIZER)
+        return Tokenizer.from_pretrained(settings.PROMPT_TOKENIZER)
+    except Exception as e:
+        logger.warning("Could not load prompt tokenizer {} ({}); estimating token counts.", settings.PROMPT_TOKENIZER, e)
+        return None
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    # Cached: the persona, weekly summary and memories repeat across turns
+    if not text:
+        return 0
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens, preferring a sentence end, then a word boundary."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    budget = max_tokens - 1  # Room for the ellipsis
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        cut = text[:budget * CHARS_PER_TOKEN]
+    else:
+        encoding = tokenizer.encode(text, add_special_tokens=False)
+        cut = text[:encoding.offsets[budget - 1][1]] if budget > 0 else ""
+
+    sentence_ends = [m.end() for m in _SENTENCE_END.finditer(cut)]
+    if sentence_ends and sentence_ends[-1] >= len(cut) * 0.6:
+        return cut[:sentence_ends[-1]]
+    if " " in cut:
+        cut = cut[:cut.rindex(" ")]
+    return cut.rstrip(" ,;:-") + "..."
@@ -11,8 +11,13 @@ import uvicorn
 import asyncio
 from fastapi import FastAPI
 from app.core.events import lifespan
-from app.memory.database import init_db
-from app.agent.orchestrator import KratosOrchestrator
+from app.memory.database import init_db, run_db
+from app.memory.job_queue import JobQueue
+from app.agent.orchestrator import KratosOrchestrator, CANNED_PHRASES
+from app.journal.importer import JournalImporter
+from app.memory.vector_store import IndexLockedError
+from app.llm.ollama_client import get_ollama_client
+from app.voice.tts_stream import get_tts_service
 from app.core.logger import logger
 
 # Add NVIDIA DLLs to search path on Windows
@@ -42,9 +47,14 @@ app = FastAPI(title="Kratos Desk", lifespan=lifespan)
 async def health():
     return {"status": "alive", "name": "Kratos"}
 
+@app.get("/jobs")
+async def jobs():
+    # Read from the jobs table, so this also reports on a voice loop running in another process
+    return await run_db(JobQueue.collect_metrics)
+
 async def run_voice_loop():
     # Wait for models to "warm up" (the lifespan event handles this in a real setup)
-    await asyncio.sleep(2)
+    await asyncio.gather(asyncio.sleep(2), get_ollama_client().warm_up(), get_tts_service().prewarm(CANNED_PHRASES))
     orchestrator = KratosOrchestrator()
     try:
         await orchestrator.run()
@@ -53,6 +63,25 @@ async def run_voice_loop():
         logger.info("Kratos is resting.")
     except Exception as e:
         logger.exception("Orchestrator failed: {}", e)
+    finally:
+        await get_ollama_client().close()
+
+async def run_import(path: str = None):
+    try:
+        importer = JournalImporter()
+    except IndexLockedError:
+        # Re-indexing under a running voice loop would wipe its new vectors at its next compaction
+        logger.error("Kratos is running and has the FAISS index open; stop it before importing.")
+        await get_ollama_client().close()
+        return
+    try:
+        if path:
+            await importer.import_file(path)
+        else:
+            await importer.reindex()
+    finally:
+        importer.journal.vector_store.close()
+        await get_ollama_client().close()
 
 if __name__ == "__main__":
     # Initialize DB
@@ -62,6 +91,11 @@ if __name__ == "__main__":
     # Check for CLI mode or Web mode
     if len(sys.argv) > 1 and sys.argv[1] == "--server":
         uvicorn.run(app, host="0.0.0.0", port=8000)
+    elif len(sys.argv) > 2 and sys.argv[1] == "--import":
+        # Bulk import a JSONL/Markdown export; safe to re-run after an interruption
+        asyncio.run(run_import(sys.argv[2]))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--reindex":
+        asyncio.run(run_import())
     else:
         # Run the voice Loop directly
         try:
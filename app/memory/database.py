@@ -1,15 +1,99 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
 from app.config import settings
+from app.core.logger import logger
 from app.memory.models import Base
 import os
 
 # SQLite setup
 engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if engine.dialect.name != "sqlite":
+        return
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed during writes; synchronous=NORMAL is durable across app crashes in WAL mode
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+# Rows outlive their session (they are handed back to the event loop), so don't expire them on commit
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=False)
+
+# All ORM work runs on one dedicated thread: SQLite serializes writers anyway,
+# and it keeps blocking driver calls off the event loop.
+_db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kratos-db")
+
+# FTS5 mirror of journal_entries for keyword (BM25) retrieval. External content:
+# the text lives only in journal_entries and the triggers keep the index in sync.
+LEXICAL_INDEX_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS journal_fts USING fts5("
+    "raw_text, summary, content='journal_entries', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS journal_fts_ai AFTER INSERT ON journal_entries BEGIN "
+    "INSERT INTO journal_fts(rowid, raw_text, summary) VALUES (new.id, new.raw_text, coalesce(new.summary, '')); END",
+    "CREATE TRIGGER IF NOT EXISTS journal_fts_ad AFTER DELETE ON journal_entries BEGIN "
+    "INSERT INTO journal_fts(journal_fts, rowid, raw_text, summary) "
+    "VALUES ('delete', old.id, old.raw_text, coalesce(old.summary, '')); END",
+    "CREATE TRIGGER IF NOT EXISTS journal_fts_au AFTER UPDATE OF raw_text, summary ON journal_entries BEGIN "
+    "INSERT INTO journal_fts(journal_fts, rowid, raw_text, summary) "
+    "VALUES ('delete', old.id, old.raw_text, coalesce(old.summary, '')); "
+    "INSERT INTO journal_fts(rowid, raw_text, summary) VALUES (new.id, new.raw_text, coalesce(new.summary, '')); END",
+]
+
+# Entries since the last compression, counted on insert so the threshold check
+# never needs COUNT(*). Rollups start after the entries already in the database;
+# older days are only summarized when a week or month they belong to is rebuilt.
+COMPRESSION_COUNTER_DDL = [
+    "INSERT OR IGNORE INTO compression_state (id, pending_entries, last_entry_id) "
+    "SELECT 1, 0, coalesce(max(id), 0) FROM journal_entries",
+    "CREATE TRIGGER IF NOT EXISTS compression_count_ai AFTER INSERT ON journal_entries BEGIN "
+    "UPDATE compression_state SET pending_entries = pending_entries + 1 WHERE id = 1; END",
+]
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    # create_all skips indexes on tables that already exist, so add any new ones explicitly
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    _create_lexical_index()
+    _create_compression_counter()
+
+def _create_lexical_index():
+    if engine.dialect.name != "sqlite":
+        return
+    try:
+        with engine.begin() as conn:
+            exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'journal_fts'")).first()
+            for statement in LEXICAL_INDEX_DDL:
+                conn.execute(text(statement))
+            if not exists:
+                # Index the entries written before the FTS table existed
+                conn.execute(text("INSERT INTO journal_fts(journal_fts) VALUES ('rebuild')"))
+    except OperationalError as e:
+        logger.warning("SQLite FTS5 unavailable ({}); memory search will be vector-only.", e)
+
+def _create_compression_counter():
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        for statement in COMPRESSION_COUNTER_DDL:
+            conn.execute(text(statement))
+
+def rebuild_lexical_index(db: Session):
+    """Re-derive the FTS5 index from journal_entries (after bulk edits that bypassed the triggers)."""
+    try:
+        db.execute(text("INSERT INTO journal_fts(journal_fts) VALUES ('rebuild')"))
+        db.commit()
+    except OperationalError as e:
+        logger.warning("Could not rebuild the FTS5 index: {}", e)
 
 def get_db():
     db = SessionLocal()
@@ -17,3 +101,17 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def run_db(fn, *args):
+    """Run fn(session, *args) on the DB thread as one unit of work with its own session."""
+    def unit_of_work():
+        db = SessionLocal()
+        try:
+            return fn(db, *args)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    return await asyncio.get_running_loop().run_in_executor(_db_executor, unit_of_work)
@@ -0,0 +1,130 @@
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+import numpy as np
+from app.config import settings
+from app.core.logger import logger
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+class EmbeddingCache:
+    """
+    Two-level embedding cache: an in-process LRU in front of a SQLite table.
+
+    Keys are sha256(model name + normalized text), so a model change never
+    serves stale vectors. The table is trimmed back to EMBEDDING_CACHE_MAX_ROWS
+    by least-recent use.
+    """
+
+    def __init__(self, model_name: str, path: str = None):
+        self.model_name = model_name
+        self.path = path or settings.EMBEDDING_CACHE_PATH
+        self.memory_size = settings.EMBEDDING_CACHE_MEMORY_SIZE
+        self.max_rows = settings.EMBEDDING_CACHE_MAX_ROWS
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key BLOB PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._rows = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model_name}\0{normalize_text(text)}".encode("utf-8")).digest()
+
+    def get_many(self, texts: list[str]) -> list:
+        """Cached vector for each text, or None where it has to be encoded."""
+        keys = [self.key(t) for t in texts]
+        results = [None] * len(texts)
+        missing = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = vector
+                    self.memory_hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+
+            if missing:
+                placeholders = ",".join("?" * len(missing))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", list(missing)
+                ).fetchall()
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(time.time(), key) for key, _ in rows],
+                    )
+                    self._conn.commit()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(key, vector)
+                    for i in missing.pop(key):
+                        results[i] = vector
+                        self.disk_hits += 1
+
+            self.misses += sum(len(v) for v in missing.values())
+        return results
+
+    def put_many(self, texts: list[str], vectors: np.ndarray):
+        now = time.time()
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = self.key(text)
+                vector = np.ascontiguousarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((key, vector.tobytes(), now))
+
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows)
+            self._rows += self._conn.total_changes - before
+            if self._rows > self.max_rows:
+                self._evict()
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": self._rows,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _remember(self, key: bytes, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        # Trim to 90% so eviction is not paid on every insert once full
+        excess = self._rows - int(self.max_rows * 0.9)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (excess,)
+        )
+        self._rows -= excess
+        logger.debug("Evicted {} embeddings from the persistent cache.", excess)
@@ -0,0 +1,97 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from app.config import settings
+from app.core.logger import logger
+from app.memory.embeddings import get_embedding_service
+
+class AsyncEmbeddingService:
+    """
+    Awaitable front end for EmbeddingService.
+
+    Requests are queued and coalesced into `embed_batch` calls (up to
+    EMBEDDING_MAX_BATCH texts, waiting at most EMBEDDING_MAX_WAIT_MS for the
+    batch to fill) that run on a dedicated worker thread, so encoding never
+    blocks the event loop driving audio and TTS.
+    """
+
+    def __init__(self, service=None):
+        self.service = service or get_embedding_service()
+        self.max_batch = settings.EMBEDDING_MAX_BATCH
+        self.max_wait = settings.EMBEDDING_MAX_WAIT_MS / 1000
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kratos-embed")
+        self._queue = None
+        self._worker = None
+
+    async def embed(self, text: str) -> np.ndarray:
+        return (await self.embed_batch([text]))[0]
+
+    async def embed_batch(self, texts: list[str]) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        if len(texts) >= self.max_batch:
+            # Already a full batch; no point trickling it through the queue
+            return await loop.run_in_executor(self._executor, self.service.embed_batch, texts)
+
+        self._ensure_worker()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._queue.put_nowait((text, future))
+            futures.append(future)
+        return np.vstack(await asyncio.gather(*futures))
+
+    def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        self._executor.shutdown(wait=False)
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            batch = [(text, future) for text, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+
+            try:
+                vectors = await loop.run_in_executor(
+                    self._executor, self.service.embed_batch, [text for text, _ in batch]
+                )
+            except Exception as e:
+                logger.error("Embedding batch of {} failed: {}", len(batch), e)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+# Singleton instance
+_async_embedding_service = None
+
+def get_async_embedding_service():
+    global _async_embedding_service
+    if _async_embedding_service is None:
+        _async_embedding_service = AsyncEmbeddingService()
+    return _async_embedding_service
@@ -1,19 +1,62 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
 from app.config import settings
 from app.core.logger import logger
+from app.memory.embedding_cache import EmbeddingCache
 
-class EmbeddingService:
-    def __init__(self):
-        logger.info("Loading embedding model: {}", settings.EMBEDDING_MODEL)
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+class TorchEmbeddingBackend:
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
         # Using CPU for embeddings to save VRAM for LLM/Whisper
-        self.model = SentenceTransformer(settings.EMBEDDING_MODEL, device="cpu")
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        return self.model.encode(texts, convert_to_numpy=True)
+
+class EmbeddingService:
+    def __init__(self, backend: str = None):
+        self.backend_name = backend or settings.EMBEDDING_BACKEND
+        logger.info("Loading embedding model: {} ({})", settings.EMBEDDING_MODEL, self.backend_name)
+        if self.backend_name == "torch":
+            self.backend = TorchEmbeddingBackend(settings.EMBEDDING_MODEL)
+        elif self.backend_name in ("onnx", "onnx-int8"):
+            from app.memory.onnx_embeddings import OnnxEmbeddingBackend, OnnxParityError
+            try:
+                self.backend = OnnxEmbeddingBackend(settings.EMBEDDING_MODEL, quantized=self.backend_name == "onnx-int8")
+            except OnnxParityError as e:
+                logger.warning("{}; falling back to torch embeddings.", e)
+                self.backend_name = "torch"
+                self.backend = TorchEmbeddingBackend(settings.EMBEDDING_MODEL)
+        else:
+            raise ValueError(f"Unknown EMBEDDING_BACKEND: {self.backend_name}")
+
+        # Quantized vectors drift slightly, so non-torch backends get their own cache namespace
+        cache_model = settings.EMBEDDING_MODEL if self.backend_name == "torch" else f"{settings.EMBEDDING_MODEL}:{self.backend_name}"
+        self.cache = EmbeddingCache(cache_model)
         
     def embed(self, text: str) -> np.ndarray:
-        return self.model.encode(text, convert_to_numpy=True)
+        return self.embed_batch([text])[0]
     
     def embed_batch(self, texts: list[str]) -> np.ndarray:
-        return self.model.encode(texts, convert_to_numpy=True)
+        if not texts:
+            return self.backend.encode(texts)
+
+        vectors = self.cache.get_many(texts)
+        # Encode each distinct uncached text once
+        missing = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(texts[i], []).append(i)
+
+        if missing:
+            pending = list(missing)
+            encoded = self.backend.encode(pending)
+            self.cache.put_many(pending, encoded)
+            for text, vector in zip(pending, encoded):
+                for i in missing[text]:
+                    vectors[i] = vector
+        return np.vstack(vectors)
 
 # Singleton instance
 _embedding_service = None
@@ -0,0 +1,182 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.memory.models import Job
+from app.memory.database import run_db
+from app.core.logger import logger
+from app.config import settings
+
+# Job kinds (handlers are registered by JournalService)
+SUMMARIZE_JOB = "summarize"
+INDEX_JOB = "index"
+COMPRESS_JOB = "compress"
+MAX_DB_RETRY_DELAY = 60.0  # Seconds between a worker's attempts to reach a failing database
+
+class JobQueue:
+    """
+    Durable background work backed by the jobs table.
+
+    Jobs are rows (kind, entry_id), usually inserted in the same transaction
+    as the entry they belong to, so nothing is lost if the process exits
+    before the work is done. JOB_WORKERS workers claim the oldest due job and
+    up to batch_sizes[kind] more of the same kind, and pass the entry ids to
+    that kind's handler. The handler returns the ids that failed (or raises
+    for the whole batch); failures are retried with exponential backoff up to
+    JOB_MAX_ATTEMPTS, then left as failed. start() puts jobs that were
+    running when the process died back to pending. Claims go through the
+    single DB thread, so two workers never take the same job; the queue
+    assumes one process runs workers at a time.
+    """
+
+    def __init__(self, handlers: dict, batch_sizes: dict = None, workers: int = None):
+        self.handlers = handlers
+        self.batch_sizes = batch_sizes or {}
+        self.workers = workers or settings.JOB_WORKERS
+        self._tasks = []
+        self._wakeup = None
+
+    @staticmethod
+    def add_jobs(db: Session, kind: str, entry_ids: list[int]):
+        """Add jobs inside the caller's transaction; they run once it commits and a worker is notified."""
+        db.add_all([Job(kind=kind, entry_id=entry_id) for entry_id in entry_ids])
+
+    async def enqueue(self, kind: str, entry_ids: list[int]):
+        def add(db: Session):
+            self.add_jobs(db, kind, entry_ids)
+            db.commit()
+        await run_db(add)
+        self.notify()
+
+    def notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self):
+        if self._tasks:
+            return
+        recovered = await run_db(self._recover)
+        if recovered:
+            logger.info("Re-queued {} jobs interrupted by the last shutdown.", recovered)
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work(n)) for n in range(self.workers)]
+        for task in self._tasks:
+            task.add_done_callback(self._worker_exited)
+
+    def stop(self):
+        """Cancel the workers; a batch in flight stays running in the table and is re-queued by the next start()."""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def metrics(self) -> dict:
+        return await run_db(self.collect_metrics)
+
+    async def _work(self, worker: int):
+        while True:
+            jobs = await self._run_db(self._claim)
+            if not jobs:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            kind = jobs[0].kind
+            entry_ids = [job.entry_id for job in jobs]
+            start = time.perf_counter()
+            try:
+                failed, error = set(await self.handlers[kind](entry_ids)), "handler reported failure"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("{} job batch of {} failed: {}", kind, len(jobs), e)
+                failed, error = set(entry_ids), str(e)
+            await self._run_db(self._finish, jobs, failed, error)
+            self.notify()  # Retries and follow-up jobs may be due
+            logger.debug("Worker {} ran {} {} jobs in {:.0f} ms ({} failed)",
+                         worker, len(jobs), kind, (time.perf_counter() - start) * 1000, len(failed))
+
+    async def _run_db(self, fn, *args):
+        """run_db, retried with backoff: a transient error ("database is locked") must not end a worker."""
+        delay = settings.JOB_RETRY_BACKOFF
+        while True:
+            try:
+                return await run_db(fn, *args)
+            except Exception as e:
+                logger.warning("Job queue {} failed: {}; retrying in {:.1f} s", fn.__name__.lstrip("_"), e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_DB_RETRY_DELAY)
+
+    @staticmethod
+    def _worker_exited(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Job worker stopped unexpectedly: {}", task.exception())
+
+    def _claim(self, db: Session) -> list[Job]:
+        now = datetime.utcnow()
+        due = db.query(Job).filter(Job.status == "pending", Job.run_after <= now)
+        first = due.order_by(Job.id).first()
+        if first is None:
+            return []
+        jobs = due.filter(Job.kind == first.kind).order_by(Job.id).limit(self.batch_sizes.get(first.kind, 1)).all()
+        for job in jobs:
+            job.status = "running"
+            job.started_at = now
+            job.attempts += 1
+        db.commit()
+        return jobs
+
+    @staticmethod
+    def _finish(db: Session, jobs: list[Job], failed: set, error: str):
+        now = datetime.utcnow()
+        for job in db.query(Job).filter(Job.id.in_([job.id for job in jobs])):
+            job.finished_at = now
+            if job.entry_id not in failed:
+                job.status = "done"
+                job.last_error = None
+            elif job.attempts >= settings.JOB_MAX_ATTEMPTS:
+                job.status = "failed"
+                job.last_error = error
+                logger.error("{} job for entry {} gave up after {} attempts: {}", job.kind, job.entry_id, job.attempts, error)
+            else:
+                job.status = "pending"
+                job.last_error = error
+                job.run_after = now + timedelta(seconds=settings.JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1))
+        db.commit()
+
+    @staticmethod
+    def _recover(db: Session) -> int:
+        cutoff = datetime.utcnow() - timedelta(days=settings.JOB_RETENTION_DAYS)
+        db.query(Job).filter(Job.status == "done", Job.finished_at < cutoff).delete(synchronize_session=False)
+        recovered = db.query(Job).filter(Job.status == "running").update(
+            {Job.status: "pending", Job.run_after: datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+        return recovered
+
+    @staticmethod
+    def collect_metrics(db: Session) -> dict:
+        """Queue depth (pending + running), job counts by kind and status, and latency of recent finished jobs."""
+        depth = {}
+        for kind, status, count in db.query(Job.kind, Job.status, func.count(Job.id)).group_by(Job.kind, Job.status):
+            depth.setdefault(kind, {})[status] = count
+
+        # Latency of the last 500 finished jobs: queued -> done, and the run itself
+        recent = (db.query(Job.kind, Job.created_at, Job.started_at, Job.finished_at)
+                  .filter(Job.status == "done").order_by(Job.finished_at.desc()).limit(500).all())
+        latency = {}
+        for kind in {row.kind for row in recent}:
+            rows = [row for row in recent if row.kind == kind]
+            total = [(row.finished_at - row.created_at).total_seconds() * 1000 for row in rows]
+            run = [(row.finished_at - row.started_at).total_seconds() * 1000 for row in rows]
+            latency[kind] = {
+                "count": len(rows),
+                "p50_ms": float(np.percentile(total, 50)),
+                "p95_ms": float(np.percentile(total, 95)),
+                "run_p50_ms": float(np.percentile(run, 50)),
+            }
+        pending = sum(statuses.get("pending", 0) + statuses.get("running", 0) for statuses in depth.values())
+        return {"queue_depth": pending, "jobs": depth, "latency": latency}
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -8,7 +8,7 @@ class JournalEntry(Base):
     __tablename__ = "journal_entries"
     
     id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
     raw_text = Column(Text, nullable=False)
     summary = Column(Text)
     mood = Column(String(50))
@@ -20,4 +20,49 @@ class WeeklySummary(Base):
     id = Column(Integer, primary_key=True, index=True)
     week_start = Column(DateTime, default=datetime.utcnow)
     summary_text = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class Rollup(Base):
+    """A summary of one day, week (from Monday) or month, built from the level below it."""
+    __tablename__ = "rollups"
+    __table_args__ = (UniqueConstraint("level", "period_start"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    level = Column(String(8), nullable=False)  # day, week or month
+    period_start = Column(DateTime, nullable=False, index=True)
+    summary_text = Column(Text, nullable=False)
+    entry_count = Column(Integer, default=0)
+    last_entry_id = Column(Integer, default=0)  # Newest entry under it; a newer one makes it stale
+    summarized_count = Column(Integer, default=0)  # Entries under it read as summaries, not raw text
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class CompressionState(Base):
+    """Single row (id 1): entries added since the last compression was queued, kept by a trigger."""
+    __tablename__ = "compression_state"
+    
+    id = Column(Integer, primary_key=True)
+    pending_entries = Column(Integer, default=0)
+    last_entry_id = Column(Integer, default=0)  # Newest entry the rollups cover
+
+class ImportCheckpoint(Base):
+    __tablename__ = "import_checkpoints"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String(1024), unique=True, nullable=False)
+    position = Column(Integer, default=0)  # Source entries already inserted
+    completed_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Job(Base):
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(32), nullable=False)  # summarize, index or compress
+    entry_id = Column(Integer, index=True)
+    status = Column(String(16), default="pending", index=True)  # pending, running, done or failed
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
+    run_after = Column(DateTime, default=datetime.utcnow)  # Retry backoff
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
@@ -0,0 +1,165 @@
+import json
+from pathlib import Path
+import numpy as np
+import onnxruntime as ort
+from tokenizers import Tokenizer
+from app.config import settings
+from app.core.logger import logger
+
+PARITY_TEXTS = [
+    "I lifted heavier today than I have in months.",
+    "Work was brutal and I snapped at my brother.",
+    "Slept badly, skipped training, felt weak.",
+    "Finished the project. Quiet pride, no celebration.",
+]
+MIN_PARITY = 0.99  # Min cosine vs torch on PARITY_TEXTS for an exported variant to be used
+
+class OnnxParityError(ValueError):
+    """The exported model drifted too far from the torch one to share its vectors."""
+
+def onnx_model_dir(model_name: str) -> Path:
+    return Path(settings.ONNX_MODEL_DIR) / model_name.replace("/", "__")
+
+def export_onnx(model_name: str, model_dir: Path):
+    """
+    One-time export of a SentenceTransformer to ONNX (fp32 + int8 dynamic quantized).
+
+    Needs torch, sentence-transformers and onnx; the runtime path only needs
+    onnxruntime. Each variant's parity with torch is recorded in export.json,
+    and OnnxEmbeddingBackend refuses a variant below MIN_PARITY.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    logger.info("Exporting {} to ONNX in {}...", model_name, model_dir)
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0]
+    pooling = next(m for m in st_model if isinstance(m, Pooling))
+    if pooling.pooling_mode_mean_tokens:
+        pooling_mode = "mean"
+    elif pooling.pooling_mode_cls_token:
+        pooling_mode = "cls"
+    else:
+        raise ValueError(f"Unsupported pooling for ONNX export: {pooling.get_pooling_mode_str()}")
+
+    model_dir.mkdir(parents=True, exist_ok=True)
+    transformer.tokenizer.save_pretrained(str(model_dir))
+
+    class _Encoder(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(*inputs)[0]
+
+    dummy = transformer.tokenizer(["Kratos"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in dummy]
+    dynamic_axes = {n: {0: "batch", 1: "sequence"} for n in input_names + ["last_hidden_state"]}
+    fp32_path = model_dir / "model.onnx"
+    torch.onnx.export(
+        _Encoder(transformer.auto_model).eval(),
+        tuple(dummy[n] for n in input_names),
+        str(fp32_path),
+        input_names=input_names,
+        output_names=["last_hidden_state"],
+        dynamic_axes=dynamic_axes,
+        opset_version=17,
+        dynamo=False,
+    )
+    quantize_dynamic(str(fp32_path), str(model_dir / "model.int8.onnx"), weight_type=QuantType.QInt8)
+
+    config = {
+        "model_name": model_name,
+        "max_seq_length": st_model.max_seq_length,
+        "pooling": pooling_mode,
+        "normalize": any(isinstance(m, Normalize) for m in st_model),
+        "pad_token": transformer.tokenizer.pad_token,
+        "pad_id": transformer.tokenizer.pad_token_id,
+    }
+    with open(model_dir / "export.json", "w") as f:
+        json.dump(config, f, indent=2)
+
+    # Torch is already loaded here, so check parity once for both variants
+    reference = st_model.encode(PARITY_TEXTS, convert_to_numpy=True)
+    config["parity"] = {}
+    for quantized in (False, True):
+        variant = "int8" if quantized else "fp32"
+        cosine = parity(OnnxEmbeddingBackend(model_name, quantized=quantized), reference)
+        config["parity"][variant] = cosine
+        level = "info" if cosine >= MIN_PARITY else "warning"
+        getattr(logger, level)("ONNX {} parity vs torch: min cosine {:.4f}", variant, cosine)
+    with open(model_dir / "export.json", "w") as f:
+        json.dump(config, f, indent=2)
+
+def parity(backend, reference: np.ndarray) -> float:
+    """Minimum cosine similarity between backend embeddings and reference embeddings of PARITY_TEXTS."""
+    vectors = backend.encode(PARITY_TEXTS)
+    cosines = np.sum(vectors * reference, axis=1) / (
+        np.linalg.norm(vectors, axis=1) * np.linalg.norm(reference, axis=1)
+    )
+    return float(cosines.min())
+
+class OnnxEmbeddingBackend:
+    """SentenceTransformer-compatible encoder on onnxruntime, with mean/CLS pooling done in numpy."""
+
+    def __init__(self, model_name: str, quantized: bool = False):
+        model_dir = onnx_model_dir(model_name)
+        model_path = model_dir / ("model.int8.onnx" if quantized else "model.onnx")
+        if not model_path.exists() or not (model_dir / "export.json").exists():
+            export_onnx(model_name, model_dir)
+
+        with open(model_dir / "export.json") as f:
+            self.config = json.load(f)
+        # Absent while export_onnx itself is measuring it (and in exports that predate the check)
+        cosine = self.config.get("parity", {}).get("int8" if quantized else "fp32")
+        if cosine is not None and cosine < MIN_PARITY:
+            raise OnnxParityError(f"ONNX {'int8' if quantized else 'fp32'} export of {model_name} has parity "
+                                  f"{cosine:.4f} with torch (< {MIN_PARITY})")
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_id"], pad_token=self.config["pad_token"])
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if settings.ONNX_NUM_THREADS:
+            options.intra_op_num_threads = settings.ONNX_NUM_THREADS
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, texts: list[str], batch_size: int = 32) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        # Length-sorted batches keep padding to a minimum
+        order = np.argsort([len(t) for t in texts])
+        vectors = [None] * len(texts)
+        for start in range(0, len(texts), batch_size):
+            idx = order[start:start + batch_size]
+            for i, vector in zip(idx, self._encode_batch([texts[i] for i in idx])):
+                vectors[i] = vector
+        return np.vstack(vectors)
+
+    def _encode_batch(self, texts: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": mask,
+        }
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        hidden = self.session.run(None, feeds)[0]
+        if self.config["pooling"] == "cls":
+            pooled = hidden[:, 0]
+        else:
+            weights = mask[:, :, None].astype(np.float32)
+            pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+
+        if self.config["normalize"]:
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
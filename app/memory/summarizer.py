@@ -1,38 +1,123 @@
-import aiohttp
-import json
+import re
 from app.config import settings
 from app.core.logger import logger
+from app.llm.ollama_client import get_ollama_client, OllamaError
+from app.llm.tokens import count_tokens, truncate_to_tokens
+
+ENTRY_SUMMARY_INSTRUCTION = "focusing on the core emotion and event. Be concise and Kratos-like"
+_NUMBERED_LINE = re.compile(r"^\s*(\d+)[.):]\s*(.+?)\s*$")
+# What each rollup level is built from, and how long it should be
+ROLLUP_PROMPTS = {
+    "day": "Summarize this day from these journal entry summaries in 1-2 sentences",
+    "week": "Provide a powerful weekly summary from these daily summaries. Highlight progress and areas of struggle. Keep it short (2-3 sentences)",
+    "month": "Provide a powerful monthly summary from these weekly summaries. Highlight progress and areas of struggle. Keep it short (3-4 sentences)",
+}
 
 class Summarizer:
+    def __init__(self):
+        # Totals across all calls, for measuring what compression costs
+        self.calls = 0
+        self.prompt_tokens = 0
+
     async def summarize_entry(self, text: str) -> str:
-        prompt = f"Summarize this journal entry in 10-15 words, focusing on the core emotion and event. Be concise and Kratos-like:\n\n{text}"
+        prompt = f"Summarize this journal entry in 10-15 words, {ENTRY_SUMMARY_INSTRUCTION}:\n\n{text}"
         return await self._call_ollama(prompt)
 
-    async def summarize_weekly(self, texts: list[str]) -> str:
-        combined = "\n---\n".join(texts)
-        prompt = f"Provide a powerful weekly summary for these journal entries. Highlight progress and areas of struggle. Keep it short (2-3 sentences):\n\n{combined}"
-        return await self._call_ollama(prompt)
+    async def summarize_entries(self, texts: list[str]) -> list[str]:
+        """
+        Summaries for several entries, packed into as few Ollama calls as
+        JOB_SUMMARY_BATCH_TOKENS allows (one numbered line per entry). Entries
+        the model skipped, and any too long to share a prompt, are summarized
+        one by one. Failed summaries come back as "" (all of a group, if its
+        batched call failed outright).
+        """
+        summaries = [""] * len(texts)
+        groups, group, tokens = [], [], 0
+        for i, text in enumerate(texts):
+            cost = count_tokens(text)
+            if group and tokens + cost > settings.JOB_SUMMARY_BATCH_TOKENS:
+                groups.append(group)
+                group, tokens = [], 0
+            group.append(i)
+            tokens += cost
+        if group:
+            groups.append(group)
 
-    async def _call_ollama(self, prompt: str) -> str:
+        for group in groups:
+            if len(group) > 1:
+                batch = await self._summarize_group([texts[i] for i in group])
+                if not any(batch):
+                    continue  # Ollama is failing; one call per entry would only fail more slowly
+                for i, summary in zip(group, batch):
+                    summaries[i] = summary
+            for i in group:
+                if not summaries[i]:
+                    summaries[i] = await self.summarize_entry(texts[i])
+        return summaries
+
+    async def summarize_rollup(self, level: str, texts: list[str]) -> str:
+        """
+        One summary of `texts` (lower-level summaries, oldest first) for a day,
+        week or month. If they exceed ROLLUP_PROMPT_TOKENS they are summarized
+        in consecutive chunks first and those partial summaries combined
+        (map-reduce), so no prompt is cut off by num_ctx. "" if Ollama failed.
+        """
+        budget = settings.ROLLUP_PROMPT_TOKENS
+        texts = [truncate_to_tokens(" ".join(t.split()), budget // 2) for t in texts if t and t.strip()]
+        chunks, chunk, tokens = [], [], 0
+        for text in texts:
+            cost = count_tokens(text) + 1
+            if chunk and tokens + cost > budget:
+                chunks.append(chunk)
+                chunk, tokens = [], 0
+            chunk.append(text)
+            tokens += cost
+        if chunk:
+            chunks.append(chunk)
+        if not chunks:
+            return ""
+        if len(chunks) == 1:
+            return await self._call_ollama(f"{ROLLUP_PROMPTS[level]}:\n\n" + "\n".join(f"- {t}" for t in chunks[0]),
+                                           num_ctx=settings.NUM_CTX)
+
+        partials = []
+        for chunk in chunks:
+            partial = await self.summarize_rollup(level, chunk)
+            if not partial:
+                return ""  # A summary missing a chunk would silently drop part of the period
+            partials.append(partial)
+        return await self.summarize_rollup(level, partials)
+
+    async def _summarize_group(self, texts: list[str]) -> list[str]:
+        numbered = "\n".join(f"{n}. {' '.join(text.split())}" for n, text in enumerate(texts, 1))
+        prompt = (f"Summarize each of these {len(texts)} journal entries in 10-15 words, {ENTRY_SUMMARY_INSTRUCTION}. "
+                  f"Answer with exactly one line per entry, numbered to match, and nothing else:\n\n{numbered}")
+        response = await self._call_ollama(prompt, num_ctx=settings.NUM_CTX)
+        summaries = [""] * len(texts)
+        for line in response.splitlines():
+            match = _NUMBERED_LINE.match(line)
+            if match and 1 <= int(match.group(1)) <= len(texts):
+                summaries[int(match.group(1)) - 1] = match.group(2)
+        return summaries
+
+    async def _call_ollama(self, prompt: str, num_ctx: int = 1024) -> str:
+        self.calls += 1
+        self.prompt_tokens += count_tokens(prompt)
         payload = {
             "model": settings.OLLAMA_MODEL,
             "prompt": prompt,
-            "stream": False,
             "options": {
                 "temperature": 0.3,
-                "num_ctx": 1024
+                "num_ctx": num_ctx
             }
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(settings.OLLAMA_URL, json=payload) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        return data.get("response", "").strip()
-                    else:
-                        logger.error("Ollama summary request failed: {}", resp.status)
-                        return ""
+            data = await get_ollama_client().generate(payload)
+            return data.get("response", "").strip()
+        except OllamaError as e:
+            logger.error("Ollama summary request failed: {}", e)
+            return ""
         except Exception as e:
             logger.error("Error calling Ollama for summary: {}", e)
             return ""
@@ -1,53 +1,451 @@
 import faiss
 import numpy as np
 import os
+import threading
+import time
+from filelock import FileLock, Timeout
 from app.config import settings
 from app.core.logger import logger
 
+INDEX_MODES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+STORAGE_MODES = ("float32", "float16", "sq8")
+
+_QTYPES = {
+    "float16": faiss.ScalarQuantizer.QT_fp16,
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+class IndexLockedError(RuntimeError):
+    """Another process (the voice app or an import) has the FAISS index open."""
+
 class VectorStore:
-    def __init__(self, dimension: int = 384):
+    """
+    FAISS index persisted as a full snapshot plus an append-only segment log.
+
+    The index is wrapped in an id map, so searches return JournalEntry ids
+    directly. It starts out flat and is rebuilt in the configured mode
+    (IVF / HNSW) and storage (float32 / float16 / sq8) once the corpus passes
+    VECTOR_INDEX_TRAIN_THRESHOLD.
+
+    Adds go into the in-memory index immediately and are buffered; the buffer is
+    appended to the log (fixed-size float32 vector records + int64 id records)
+    in batches or by a timer. Once the log grows past the compaction threshold
+    it is folded into a new snapshot and truncated.
+
+    With VECTOR_MMAP the snapshot is memory-mapped read-only and new vectors
+    live in a small in-RAM delta index until the next compaction.
+
+    A store holds a lockfile next to the index until it is closed: compaction
+    rewrites the snapshot and truncates the log, so a second process writing
+    the same files would lose the other's vectors.
+    """
+
+    def __init__(self, dimension: int = 384, index_path: str = None):
         self.dimension = dimension
-        self.index = faiss.IndexFlatL2(dimension)
-        self.id_map = []  # FAISS index to DB entry ID
-        
-        if os.path.exists(settings.FAISS_INDEX_PATH):
+        self.index_path = index_path or settings.FAISS_INDEX_PATH
+        self.vec_log_path = f"{self.index_path}.vec.log"
+        self.ids_log_path = f"{self.index_path}.ids.log"
+
+        if settings.VECTOR_INDEX_MODE not in INDEX_MODES:
+            raise ValueError(f"Unknown VECTOR_INDEX_MODE: {settings.VECTOR_INDEX_MODE}")
+        if settings.VECTOR_STORAGE not in STORAGE_MODES:
+            raise ValueError(f"Unknown VECTOR_STORAGE: {settings.VECTOR_STORAGE}")
+        self._file_lock = FileLock(f"{self.index_path}.lock")
+        try:
+            self._file_lock.acquire(timeout=0)
+        except Timeout:
+            raise IndexLockedError(f"{self.index_path} is in use by another process") from None
+
+        # float16 needs no training, so it can be used from the first entry
+        self.mode = "flat"
+        self.storage = "float16" if settings.VECTOR_STORAGE == "float16" else "float32"
+        self.index = self._build_index(self.mode, self.storage, np.empty((0, dimension), dtype='float32'),
+                                       np.empty(0, dtype=np.int64))
+        self._delta = None
+        self._mmapped = False
+
+        self._lock = threading.RLock()
+        self._pending_ids = []
+        self._pending_vectors = []
+        self._log_count = 0
+        self._flush_timer = None
+        self._id_set = None  # Copy of the index's ids, made on first missing() call and kept up to date by adds
+
+        if os.path.exists(self.index_path) or os.path.exists(self.vec_log_path):
             self.load()
-            
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal + (self._delta.ntotal if self._delta is not None else 0)
+
     def add(self, entry_id: int, embedding: np.ndarray):
-        if embedding.ndim == 1:
-            embedding = embedding.reshape(1, -1)
-        self.index.add(embedding.astype('float32'))
-        self.id_map.append(entry_id)
-        self.save()
-        
+        self.add_batch([entry_id], embedding)
+
+    def add_batch(self, entry_ids: list[int], embeddings: np.ndarray):
+        if embeddings.ndim == 1:
+            embeddings = embeddings.reshape(1, -1)
+        embeddings = np.ascontiguousarray(embeddings, dtype='float32')
+        ids = np.asarray(entry_ids, dtype=np.int64)
+
+        with self._lock:
+            target = self._delta if self._mmapped else self.index
+            target.add_with_ids(embeddings, ids)
+            if self._id_set is not None:
+                self._id_set.update(ids.tolist())
+            self._pending_ids.extend(ids.tolist())
+            self._pending_vectors.append(embeddings)
+
+            if self._needs_migration():
+                self._migrate()
+            elif len(self._pending_ids) >= settings.VECTOR_FLUSH_BATCH:
+                self.flush()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(settings.VECTOR_FLUSH_INTERVAL, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def ids(self) -> set[int]:
+        """Every entry id in the index, flushed or not."""
+        with self._lock:
+            ids = set(faiss.vector_to_array(self.index.id_map).tolist())
+            if self._delta is not None:
+                ids.update(faiss.vector_to_array(self._delta.id_map).tolist())
+        return ids
+
+    def missing(self, entry_ids: list[int]) -> list[int]:
+        """The given ids that are not in the index; after the first call this costs O(len(entry_ids))."""
+        with self._lock:
+            if self._id_set is None:
+                self._id_set = self.ids()
+            return [entry_id for entry_id in entry_ids if entry_id not in self._id_set]
+
     def search(self, query_embedding: np.ndarray, top_k: int = 5) -> list[int]:
+        return [entry_id for entry_id, _ in self.search_scored(query_embedding, top_k)]
+
+    def search_scored(self, query_embedding: np.ndarray, top_k: int = 5) -> list[tuple[int, float]]:
+        """Nearest entries as (entry_id, squared L2 distance), closest first."""
         if query_embedding.ndim == 1:
             query_embedding = query_embedding.reshape(1, -1)
-        
-        distances, indices = self.index.search(query_embedding.astype('float32'), top_k)
-        
-        entry_ids = []
-        for idx in indices[0]:
-            if idx != -1 and idx < len(self.id_map):
-                entry_ids.append(self.id_map[idx])
-        return entry_ids
+        query_embedding = query_embedding.astype('float32')
+
+        with self._lock:
+            distances, labels = self.index.search(query_embedding, top_k)
+            distances, labels = distances[0], labels[0]
+            if self._delta is not None and self._delta.ntotal:
+                delta_distances, delta_labels = self._delta.search(query_embedding, top_k)
+                distances = np.concatenate([distances, delta_distances[0]])
+                labels = np.concatenate([labels, delta_labels[0]])
+                order = np.argsort(distances, kind="stable")[:top_k]
+                distances, labels = distances[order], labels[order]
+        return [(int(label), float(distance)) for label, distance in zip(labels, distances) if label != -1]
+
+    def rebuild(self, entry_ids: list[int], embeddings: np.ndarray):
+        """
+        Replace the whole index with these vectors in a single build and snapshot.
+
+        Used by bulk import / re-index; adds made while the caller was collecting
+        vectors are discarded along with the old index.
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype='float32').reshape(-1, self.dimension)
+        ids = np.asarray(entry_ids, dtype=np.int64)
+        mode, storage = self._target_layout()
+        if (mode != "flat" or storage == "sq8") and len(ids) < settings.VECTOR_INDEX_TRAIN_THRESHOLD:
+            mode, storage = "flat", ("float16" if storage == "float16" else "float32")
+
+        with self._lock:
+            start = time.perf_counter()
+            self.index = self._build_index(mode, storage, embeddings, ids)
+            self.mode, self.storage = mode, storage
+            self._delta = None
+            self._mmapped = False
+            self._id_set = None
+            self._apply_search_params()
+            logger.info("FAISS index rebuilt from {} vectors as {}/{} in {:.2f}s",
+                        len(ids), mode, storage, time.perf_counter() - start)
+            self.save()
+
+    def flush(self):
+        """Append buffered vectors to the segment log, compacting if it grew too large."""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._pending_ids:
+                return
+
+            vectors = np.vstack(self._pending_vectors)
+            ids = np.asarray(self._pending_ids, dtype=np.int64)
+            # Vectors first: a record only counts once its id has landed too
+            self._append(self.vec_log_path, vectors.tobytes())
+            self._append(self.ids_log_path, ids.tobytes())
+
+            self._log_count += len(ids)
+            self._pending_ids = []
+            self._pending_vectors = []
+
+            if self._log_count >= settings.VECTOR_COMPACT_THRESHOLD:
+                self.save()
 
     def save(self):
-        faiss.write_index(self.index, settings.FAISS_INDEX_PATH)
-        # In a production app, we'd also persist id_map to a file (e.g. JSON/Pickle)
-        # For simplicity in this local version, we'll keep it in memory or extend below
-        with open(f"{settings.FAISS_INDEX_PATH}.ids", "w") as f:
-            f.write(",".join(map(str, self.id_map)))
+        """Write a full snapshot and truncate the segment log."""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            start = time.perf_counter()
+
+            if self._mmapped:
+                # Fold the delta into a writable copy of the snapshot. Dropping the
+                # mapping first also lets os.replace succeed on Windows.
+                full = faiss.read_index(self.index_path)
+                if self._delta.ntotal:
+                    full.add_with_ids(*self._export_index(self._delta, "flat"))
+                self.index = full
+                self._delta = None
+                self._mmapped = False
+
+            # The log is only truncated once the new snapshot is on disk under its name
+            tmp_path = f"{self.index_path}.tmp"
+            faiss.write_index(self.index, tmp_path)
+            with open(tmp_path, "rb+") as f:
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.index_path)
+            self._fsync_dir(os.path.dirname(os.path.abspath(self.index_path)))
+
+            for path in (self.vec_log_path, self.ids_log_path):
+                with open(path, "wb"):
+                    pass
+            for suffix in (".ids", ".ids.bin"):
+                legacy_ids_path = f"{self.index_path}{suffix}"
+                if os.path.exists(legacy_ids_path):
+                    os.remove(legacy_ids_path)
+
+            self._log_count = 0
+            self._pending_ids = []
+            self._pending_vectors = []
+            logger.info("FAISS snapshot written ({} vectors, {}/{}) in {:.2f}s",
+                        self.index.ntotal, self.mode, self.storage, time.perf_counter() - start)
+
+            if settings.VECTOR_MMAP:
+                self._open_mmap()
+
+    def close(self):
+        self.flush()
+        self._file_lock.release()
 
     def load(self):
-        logger.info("Loading FAISS index from {}", settings.FAISS_INDEX_PATH)
-        self.index = faiss.read_index(settings.FAISS_INDEX_PATH)
-        id_path = f"{settings.FAISS_INDEX_PATH}.ids"
-        if os.path.exists(id_path):
-            with open(id_path, "r") as f:
+        legacy = False
+        self._id_set = None
+        if os.path.exists(self.index_path):
+            logger.info("Loading FAISS index from {}{}", self.index_path, " (mmap)" if settings.VECTOR_MMAP else "")
+            index = faiss.read_index(self.index_path, self._mmap_flags() if settings.VECTOR_MMAP else 0)
+            if isinstance(index, faiss.IndexIDMap):
+                self.index = index
+                self.mode, self.storage = self._detect_layout(faiss.downcast_index(self.index.index))
+                self._apply_search_params()
+                if settings.VECTOR_MMAP:
+                    self._delta = self._new_delta()
+                    self._mmapped = True
+            else:
+                self._import_legacy(index)
+                legacy = True
+
+        self._replay_log()
+
+        if self._needs_migration():
+            self._migrate()
+        elif legacy:
+            self.save()
+
+    def _open_mmap(self):
+        self.index = faiss.read_index(self.index_path, self._mmap_flags())
+        self._apply_search_params()
+        self._delta = self._new_delta()
+        self._mmapped = True
+
+    @staticmethod
+    def _mmap_flags() -> int:
+        # IO_FLAG_MMAP_IFC (FAISS >= 1.11) maps codes and inverted lists in place;
+        # older builds only support mmap for IVF lists. Mixing the two is rejected.
+        if hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+            return faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+        return faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+
+    def _new_delta(self):
+        return faiss.IndexIDMap(faiss.IndexFlatL2(self.dimension))
+
+    def _import_legacy(self, index):
+        """Wrap a pre-IDMap snapshot (flat index + separate id file) into an id-mapped index."""
+        ids = self._load_legacy_ids()
+        count = min(len(ids), index.ntotal)
+        if count < index.ntotal:
+            logger.warning("Legacy FAISS index has {} vectors but only {} ids; dropping the unmapped tail.",
+                           index.ntotal, len(ids))
+
+        vectors = index.reconstruct_n(0, count) if count else np.empty((0, self.dimension), dtype='float32')
+        self.mode, self.storage = "flat", "float32"
+        self.index = self._build_index(self.mode, self.storage, vectors, np.asarray(ids[:count], dtype=np.int64))
+        logger.info("Migrated legacy FAISS index ({} vectors) to native id mapping.", count)
+
+    def _load_legacy_ids(self) -> list[int]:
+        ids_bin_path = f"{self.index_path}.ids.bin"
+        if os.path.exists(ids_bin_path):
+            return np.fromfile(ids_bin_path, dtype=np.int64).tolist()
+
+        legacy_ids_path = f"{self.index_path}.ids"
+        if os.path.exists(legacy_ids_path):
+            with open(legacy_ids_path, "r") as f:
                 content = f.read()
                 if content:
-                    self.id_map = [int(x) for x in content.split(",")]
+                    return [int(x) for x in content.split(",")]
+        return []
+
+    def _replay_log(self):
+        if not os.path.exists(self.vec_log_path) or not os.path.exists(self.ids_log_path):
+            return
+
+        record_size = self.dimension * 4
+        count = min(os.path.getsize(self.vec_log_path) // record_size,
+                    os.path.getsize(self.ids_log_path) // 8)
+
+        # Drop any torn record left behind by a crash mid-append
+        os.truncate(self.vec_log_path, count * record_size)
+        os.truncate(self.ids_log_path, count * 8)
+        self._log_count = count
+        if count == 0:
+            return
+
+        vectors = np.fromfile(self.vec_log_path, dtype='float32', count=count * self.dimension)
+        vectors = vectors.reshape(count, self.dimension)
+        ids = np.fromfile(self.ids_log_path, dtype=np.int64, count=count)
+
+        # Records already folded into the snapshot (crash before truncation) are skipped
+        keep = ~np.isin(ids, faiss.vector_to_array(self.index.id_map))
+        if keep.any():
+            target = self._delta if self._mmapped else self.index
+            target.add_with_ids(np.ascontiguousarray(vectors[keep]), ids[keep])
+        logger.info("Replayed {} vectors from FAISS segment log.", int(keep.sum()))
+
+    def _target_layout(self) -> tuple[str, str]:
+        mode = settings.VECTOR_INDEX_MODE
+        # PQ codes are their own compression; the storage setting does not apply
+        return mode, ("pq" if mode == "ivf_pq" else settings.VECTOR_STORAGE)
+
+    def _needs_migration(self) -> bool:
+        mode, storage = self._target_layout()
+        if (self.mode, self.storage) == (mode, storage):
+            return False
+        if mode == "flat" and storage != "sq8":
+            return True
+        return self.ntotal >= settings.VECTOR_INDEX_TRAIN_THRESHOLD
+
+    def _migrate(self):
+        """Rebuild the index in the configured layout and snapshot it."""
+        mode, storage = self._target_layout()
+        start = time.perf_counter()
+        logger.info("Rebuilding FAISS index: {}/{} -> {}/{} ({} vectors)...",
+                    self.mode, self.storage, mode, storage, self.ntotal)
+
+        vectors, ids = self._export_index(self.index, self.mode)
+        if self._delta is not None and self._delta.ntotal:
+            delta_vectors, delta_ids = self._export_index(self._delta, "flat")
+            vectors = np.vstack([vectors, delta_vectors])
+            ids = np.concatenate([ids, delta_ids])
+
+        self.index = self._build_index(mode, storage, vectors, ids)
+        self.mode, self.storage = mode, storage
+        self._delta = None
+        self._mmapped = False
+        self._apply_search_params()
+        logger.info("FAISS index rebuilt as {}/{} in {:.2f}s", mode, storage, time.perf_counter() - start)
+        self.save()
+
+    def _export_index(self, index, mode: str) -> tuple[np.ndarray, np.ndarray]:
+        ids = faiss.vector_to_array(index.id_map).astype(np.int64)
+        inner = faiss.downcast_index(index.index)
+        if mode in ("ivf_flat", "ivf_pq"):
+            inner.make_direct_map()
+        vectors = inner.reconstruct_n(0, inner.ntotal) if inner.ntotal else np.empty((0, self.dimension), dtype='float32')
+        return vectors, ids
+
+    def _build_index(self, mode: str, storage: str, vectors: np.ndarray, ids: np.ndarray):
+        d = self.dimension
+        n = len(vectors)
+        qtype = _QTYPES.get(storage)
+
+        if mode == "flat":
+            inner = faiss.IndexFlatL2(d) if qtype is None else faiss.IndexScalarQuantizer(d, qtype, faiss.METRIC_L2)
+        elif mode == "hnsw":
+            if qtype is None:
+                inner = faiss.IndexHNSWFlat(d, settings.VECTOR_HNSW_M)
+            else:
+                inner = faiss.IndexHNSWSQ(d, qtype, settings.VECTOR_HNSW_M)
+        else:
+            # FAISS wants ~39 training points per centroid
+            nlist = settings.VECTOR_IVF_NLIST or int(4 * np.sqrt(max(n, 1)))
+            nlist = max(1, min(nlist, n // 39))
+            quantizer = faiss.IndexFlatL2(d)
+            if mode == "ivf_pq":
+                inner = faiss.IndexIVFPQ(quantizer, d, nlist, settings.VECTOR_PQ_M, 8)
+            elif qtype is None:
+                inner = faiss.IndexIVFFlat(quantizer, d, nlist, faiss.METRIC_L2)
+            else:
+                inner = faiss.IndexIVFScalarQuantizer(quantizer, d, nlist, qtype, faiss.METRIC_L2)
+
+        if not inner.is_trained:
+            sample = vectors
+            if n > 100_000:
+                sample = vectors[np.random.default_rng(0).choice(n, 100_000, replace=False)]
+            inner.train(np.ascontiguousarray(sample))
+
+        # IndexIDMap2 keeps a reverse id map in RAM; low-memory mode skips it
+        index = faiss.IndexIDMap(inner) if settings.VECTOR_MMAP else faiss.IndexIDMap2(inner)
+        if n:
+            index.add_with_ids(np.ascontiguousarray(vectors), ids)
+        return index
+
+    def _apply_search_params(self):
+        inner = faiss.downcast_index(self.index.index)
+        if self.mode in ("ivf_flat", "ivf_pq"):
+            inner.nprobe = settings.VECTOR_IVF_NPROBE
+        elif self.mode == "hnsw":
+            inner.hnsw.efSearch = settings.VECTOR_HNSW_EF_SEARCH
+
+    @staticmethod
+    def _detect_layout(inner) -> tuple[str, str]:
+        if isinstance(inner, faiss.IndexHNSW):
+            mode = "hnsw"
+            inner = faiss.downcast_index(inner.storage)
+        elif isinstance(inner, faiss.IndexIVFPQ):
+            return "ivf_pq", "pq"
+        elif isinstance(inner, faiss.IndexIVF):
+            mode = "ivf_flat"
+        else:
+            mode = "flat"
+
+        if isinstance(inner, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+            storage = "float16" if inner.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "sq8"
+        else:
+            storage = "float32"
+        return mode, storage
+
+    @staticmethod
+    def _fsync_dir(path: str):
+        """Persist a rename in this directory; Windows cannot open directories (NTFS journals renames)."""
+        if os.name == "nt":
+            return
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _append(path: str, data: bytes):
+        with open(path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
 
 # Singleton instance
 _vector_store = None
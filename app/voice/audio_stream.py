@@ -3,6 +3,8 @@ import numpy as np
 import sounddevice as sd
 from app.config import settings
 from app.core.logger import logger
+from app.voice.ring_buffer import AudioRingBuffer
+from app.voice.vad import create_vad
 
 class MicrophoneStream:
     def __init__(self):
@@ -11,14 +13,30 @@ class MicrophoneStream:
         self.queue = asyncio.Queue()
         self.loop = asyncio.get_event_loop()
         self.active = False
+        self.position = 0  # Ring position just past the last yielded chunk
+        # Longest utterance plus slack, so views stay valid through the background partial decodes
+        capacity = int((settings.MAX_UTTERANCE_SECONDS + settings.AUDIO_BUFFER_SLACK_SECONDS) * self.sample_rate)
+        self.ring = AudioRingBuffer(capacity)
+        self.vad = create_vad()
+        self._mixdown = np.zeros(self.chunk_size, dtype=np.float32)
+        self._max_lag = int(settings.AUDIO_BUFFER_SLACK_SECONDS * self.sample_rate)
 
     def _callback(self, indata, frames, time, status):
         if status:
             logger.warning("Sounddevice status: {}", status)
-        # Put raw audio into the queue
-        self.loop.call_soon_threadsafe(self.queue.put_nowait, indata.copy())
+        # Copy straight into the ring (mono); only positions cross to the loop
+        if indata.shape[1] == 1:
+            samples = indata[:, 0]
+        else:
+            if len(self._mixdown) < frames:
+                self._mixdown = np.zeros(frames, dtype=np.float32)
+            samples = np.mean(indata, axis=1, out=self._mixdown[:frames])
+        start = self.ring.total
+        end = self.ring.write(samples)
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, (start, end))
 
     async def stream(self):
+        """Yield (chunk, is_silent); chunk is a read-only view into `ring` ending at `position`."""
         self.active = True
         logger.info("Starting microphone stream ({} Hz)...", self.sample_rate)
         
@@ -30,14 +48,24 @@ class MicrophoneStream:
             dtype='float32'
         ):
             while self.active:
-                chunk = await self.queue.get()
+                start, end = await self.queue.get()
+                if self.ring.total - start > self._max_lag:
+                    # Backlog from while the loop was busy (e.g. speaking); too old to keep
+                    logger.debug("Dropping stale audio chunk at {}", start)
+                    self.vad.reset()
+                    continue
                 
-                # Check for silence detection (RMS)
-                rms = np.sqrt(np.mean(chunk**2))
-                is_silent = rms < settings.SILENCE_THRESHOLD
+                chunk = self.ring.view(start, end)
+                is_silent = not self.vad.is_speech(chunk)
                 
+                self.position = end
                 yield chunk, is_silent
 
+    def recent(self, start: int) -> np.ndarray:
+        """Zero-copy view from `start` (clamped to what is still buffered) up to `position`."""
+        start = max(start, self.ring.total - self.ring.capacity, self.position - self.ring.capacity)
+        return self.ring.view(start, self.position)
+
     def stop(self):
         self.active = False
         logger.info("Microphone stream stopped.")
@@ -0,0 +1,49 @@
+import numpy as np
+
+class AudioRingBuffer:
+    """
+    Fixed-capacity float32 sample buffer with zero-copy views.
+
+    Every sample is written twice (at p and p + capacity), so any span of up
+    to `capacity` recent samples is contiguous and can be handed out as a
+    plain slice: no concatenation, no copies. Positions are absolute sample
+    counts since the buffer was created. A view stays valid until `capacity`
+    more samples have been written after it.
+
+    Single writer (the audio callback thread); readers only take views of
+    samples written before they read `total`.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buf = np.zeros(2 * capacity, dtype=np.float32)
+        self.total = 0
+
+    def write(self, samples: np.ndarray) -> int:
+        """Append samples (at most `capacity`); returns the new total."""
+        n = len(samples)
+        pos = self.total % self.capacity
+        head = min(n, self.capacity - pos)
+        self._buf[pos:pos + head] = samples[:head]
+        self._buf[pos + self.capacity:pos + self.capacity + head] = samples[:head]
+        if head < n:
+            self._buf[:n - head] = samples[head:]
+            self._buf[self.capacity:self.capacity + n - head] = samples[head:]
+        self.total += n
+        return self.total
+
+    def view(self, start: int, end: int = None) -> np.ndarray:
+        """Read-only view of samples [start, end) by absolute position."""
+        end = self.total if end is None else end
+        if end - start > self.capacity or start < self.total - self.capacity or end > self.total:
+            raise ValueError(f"Samples {start}-{end} are outside the buffered range")
+        pos = start % self.capacity
+        view = self._buf[pos:pos + end - start]
+        view.flags.writeable = False
+        return view
+
+def rms(samples: np.ndarray) -> float:
+    """Root mean square without the squared-array temporary of sqrt(mean(x**2))."""
+    if len(samples) == 0:
+        return 0.0
+    return float(np.sqrt(np.dot(samples, samples) / len(samples)))
@@ -0,0 +1,88 @@
+from app.config import settings
+
+SENTENCE_ENDS = ".!?"
+CLAUSE_ENDS = ",;:"
+CLOSERS = "\"')]»”’"
+# Words whose trailing period does not end a sentence
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "fig", "approx", "e.g", "i.e"}
+
+class SentenceSegmenter:
+    """
+    Incremental splitter of a token stream into speakable chunks.
+
+    Each character is examined once: `feed` resumes scanning where the last
+    call stopped and returns every chunk completed by the new text. A chunk
+    ends at ., ! or ? (plus any closing quotes/brackets) followed by
+    whitespace or the end of the text so far, or at a newline. A period or
+    comma after a digit, or a period after an abbreviation or initial, at the
+    very end of the buffer waits for the next token, so "3.5", "3,000" and
+    "Dr. Smith" are not split. With first_chunk_early, the first chunk may
+    also end at a clause break (, ; :) once it has min_chars, so speech
+    starts before the first full sentence is generated.
+    """
+
+    def __init__(self, first_chunk_early: bool = None, min_chars: int = None):
+        self.first_chunk_early = settings.TTS_FIRST_CHUNK_EARLY if first_chunk_early is None else first_chunk_early
+        self.min_chars = settings.TTS_FIRST_CHUNK_MIN_CHARS if min_chars is None else min_chars
+        self._buffer = ""
+        self._pos = 0  # Next character to examine
+        self._emitted = 0
+
+    def feed(self, text: str) -> list[str]:
+        self._buffer += text
+        chunks = []
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            c = buffer[i]
+            end = None
+            if c == "\n":
+                end = i + 1
+            elif c in SENTENCE_ENDS or (c in CLAUSE_ENDS and self._wants_clause(i)):
+                j = i + 1
+                while j < len(buffer) and buffer[j] in CLOSERS:
+                    j += 1
+                if j == len(buffer):
+                    if self._ambiguous(c, i):
+                        break  # Decide once the next character arrives
+                    end = j
+                elif buffer[j].isspace() and (c != "." or not self._is_abbreviation(i)):
+                    end = j
+                i = j - 1
+            i += 1
+            if end is not None:
+                # Punctuation left over from the previous chunk (a late quote, "..") is dropped
+                chunk = buffer[:end].strip().lstrip(SENTENCE_ENDS + CLAUSE_ENDS + CLOSERS).lstrip()
+                buffer = self._buffer = buffer[end:]
+                i = 0
+                if self._speakable(chunk):
+                    chunks.append(chunk)
+                    self._emitted += 1
+        self._buffer, self._pos = buffer, i
+        return chunks
+
+    def flush(self) -> str:
+        """Return whatever is left (the end of the reply) and reset."""
+        tail = self._buffer.strip()
+        self._buffer, self._pos, self._emitted = "", 0, 0
+        return tail if self._speakable(tail) else ""
+
+    def _wants_clause(self, i: int) -> bool:
+        return self.first_chunk_early and self._emitted == 0 and len(self._buffer[:i].strip()) >= self.min_chars
+
+    def _ambiguous(self, c: str, i: int) -> bool:
+        if c in ".," and i > 0 and self._buffer[i - 1].isdigit():
+            return True
+        return c == "." and self._is_abbreviation(i)
+
+    def _is_abbreviation(self, i: int) -> bool:
+        start = i
+        while start > 0 and not self._buffer[start - 1].isspace():
+            start -= 1
+        word = self._buffer[start:i].lstrip("\"'([")
+        # Single capitals are initials ("J. R. R."), except the pronoun "I"
+        return (len(word) == 1 and word.isupper() and word != "I") or word.lower() in ABBREVIATIONS
+
+    @staticmethod
+    def _speakable(chunk: str) -> bool:
+        return any(ch.isalnum() for ch in chunk)
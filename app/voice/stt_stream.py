@@ -1,55 +1,201 @@
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from faster_whisper import WhisperModel
 from app.config import settings
 from app.core.logger import logger
 import asyncio
 
+def decoding_profile(seconds: float) -> tuple[str, dict]:
+    """
+    Whisper decode options for an utterance of this length.
+
+    Short commands decode greedily with no temperature fallback (and the
+    language pinned, if WHISPER_LANGUAGE is set); long dictation gets full beam search and faster-whisper's VAD
+    filter to skip pauses; everything in between uses a narrow beam.
+    """
+    language = settings.WHISPER_LANGUAGE or None
+    if seconds <= settings.WHISPER_SHORT_SECONDS:
+        return "short", {
+            "beam_size": settings.WHISPER_SHORT_BEAM_SIZE,
+            "language": language,
+            "temperature": 0.0,
+            "condition_on_previous_text": False,
+        }
+    if seconds >= settings.WHISPER_LONG_SECONDS:
+        return "long", {
+            "beam_size": settings.WHISPER_LONG_BEAM_SIZE,
+            "language": language,
+            "vad_filter": settings.WHISPER_LONG_VAD_FILTER,
+        }
+    return "medium", {"beam_size": settings.WHISPER_MEDIUM_BEAM_SIZE, "language": language}
+
 class StreamingTranscriber:
     def __init__(self):
-        logger.info("Initializing Whisper model: {} on {}", settings.WHISPER_MODEL, settings.WHISPER_DEVICE)
+        # One decode at a time: partial and final passes share the model
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kratos-stt")
+        self.device = settings.WHISPER_DEVICE
+        self.compute_type = settings.WHISPER_COMPUTE_TYPE
+        self._load_models()
+
+    def _load_models(self):
+        """Load the main model and the optional fast tier; blocking, so never on the event loop."""
+        self.model = self._load_model(settings.WHISPER_MODEL)
+        self._fast_model = self._load_model(settings.WHISPER_FAST_MODEL) if settings.WHISPER_FAST_MODEL else None
+
+    def _load_model(self, name: str) -> WhisperModel:
+        logger.info("Initializing Whisper model: {} on {}", name, self.device)
         try:
-            self.model = WhisperModel(
-                settings.WHISPER_MODEL,
-                device=settings.WHISPER_DEVICE,
-                compute_type=settings.WHISPER_COMPUTE_TYPE
-            )
+            return WhisperModel(name, device=self.device, compute_type=self.compute_type)
         except Exception as e:
-            logger.warning("Failed to load Whisper on GPU: {}. Falling back to CPU.", e)
-            self.model = WhisperModel(
-                settings.WHISPER_MODEL,
-                device="cpu",
-                compute_type="int8"
-            )
+            if self.device == "cpu" and self.compute_type == "int8":
+                raise
+            if self.device == "cpu":
+                logger.warning("Failed to load Whisper with compute type {}: {}. Falling back to int8.", self.compute_type, e)
+            else:
+                logger.warning("Failed to load Whisper on {}: {}. Falling back to CPU.", self.device, e)
+            self.device, self.compute_type = "cpu", "int8"
+            return WhisperModel(name, device="cpu", compute_type="int8")
+
+    def _model_for(self, seconds: float) -> WhisperModel:
+        # Optional small-model tier for very short clips ("log this", "stop")
+        if self._fast_model is not None and seconds <= settings.WHISPER_FAST_MAX_SECONDS:
+            return self._fast_model
+        return self.model
 
     async def transcribe_chunk(self, audio_buffer: np.ndarray):
+        segments = await self.transcribe_segments(audio_buffer)
+        return "".join(text for _, _, text in segments).strip()
+
+    async def transcribe_segments(self, audio_buffer: np.ndarray, initial_prompt: str = None) -> list[tuple[float, float, str]]:
+        """Decode audio into (start, end, text) segments, times in seconds from the start of the buffer."""
         try:
-            return await self._transcribe(audio_buffer)
+            return await self._transcribe(audio_buffer, initial_prompt)
         except Exception as e:
             if "cublas" in str(e).lower() or "cuda" in str(e).lower():
                 logger.warning("CUDA error detected: {}. Falling back to CPU for STT.", e)
-                # Re-initialize on CPU
-                self.model = WhisperModel(
-                    settings.WHISPER_MODEL,
-                    device="cpu",
-                    compute_type="int8"
-                )
-                return await self._transcribe(audio_buffer)
+                # Re-initialize on CPU, on the STT thread so the event loop keeps running
+                self.device, self.compute_type = "cpu", "int8"
+                await asyncio.get_running_loop().run_in_executor(self._executor, self._load_models)
+                return await self._transcribe(audio_buffer, initial_prompt)
             else:
                 logger.error("Transcription error: {}", e)
-                return ""
-
-    async def _transcribe(self, audio_buffer: np.ndarray):
-        # faster-whisper is blocking, run in executor
-        loop = asyncio.get_event_loop()
-        segments, info = await loop.run_in_executor(
-            None, 
-            lambda: self.model.transcribe(audio_buffer, beam_size=5)
-        )
-        
-        text = ""
-        for segment in segments:
-            text += segment.text
-        return text.strip()
+                return []
+
+    async def _transcribe(self, audio_buffer: np.ndarray, initial_prompt: str = None):
+        seconds = len(audio_buffer) / settings.SAMPLE_RATE
+        profile, options = decoding_profile(seconds)
+        model = self._model_for(seconds)
+
+        # faster-whisper is blocking and decodes lazily while the segments
+        # generator is consumed, so materialize it on the worker thread too
+        def run():
+            segments, info = model.transcribe(audio_buffer, initial_prompt=initial_prompt, **options)
+            return [(segment.start, segment.end, segment.text) for segment in segments]
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        segments = await loop.run_in_executor(self._executor, run)
+        logger.debug("Transcribed {:.1f}s ({} profile{}) in {:.0f} ms", seconds, profile,
+                     ", fast model" if model is not self.model else "", (loop.time() - start) * 1000)
+        return segments
+
+class UtteranceTranscriber:
+    """
+    Incremental transcription of one utterance while it is being spoken.
+
+    Every STT_PARTIAL_INTERVAL seconds of new audio, the uncommitted tail
+    (capped at STT_WINDOW_SECONDS) is decoded in the background. Words that
+    two consecutive hypotheses agree on are reported as stable, and the rest
+    as partial. Whole segments that agree, except the last, are committed, and
+    the window start moves past them, so each pass only re-decodes the tail.
+    A pass is also kicked off as soon as speech stops. If no speech follows
+    before the endpoint fires, finalize() reuses that result and only waits
+    on a decode that already ran during the silence hang time.
+    """
+
+    def __init__(self, stt: StreamingTranscriber = None, on_partial=None):
+        self.stt = stt or get_stt_service()
+        self.on_partial = on_partial
+        self.sample_rate = settings.SAMPLE_RATE
+        self.committed = []  # Committed segment texts
+        self.window_start = 0  # Sample offset of the first uncommitted sample
+        self.voiced_until = 0  # Sample count at the end of the last voiced chunk
+        self.stable_text = ""
+        self.partial_text = ""
+        self._received = 0
+        self._last_decode_at = 0
+        self._was_silent = True
+        self._previous = []  # Last hypothesis segments, absolute times
+        self._previous_words = []
+        self._decode_task = None
+        self._decoded = None  # (audio length, hypothesis segments) of the latest pass
+
+    def push(self, audio: np.ndarray, is_silent: bool):
+        """Report the utterance so far and whether its last chunk was silent; may start a background decode."""
+        self._received = len(audio)
+        if not is_silent:
+            self.voiced_until = self._received
+
+        speech_ended = is_silent and not self._was_silent
+        self._was_silent = is_silent
+        due = self._received - self._last_decode_at >= settings.STT_PARTIAL_INTERVAL * self.sample_rate
+        if not (due or speech_ended) or self.voiced_until == 0:
+            return
+        if self._decode_task is not None and not self._decode_task.done():
+            return
+        self._last_decode_at = self._received
+        # Views into the microphone ring stay valid for the decode's lifetime
+        self._decode_task = asyncio.create_task(self._decode(audio))
+
+    async def finalize(self, audio: np.ndarray) -> str:
+        """Full transcript at end of speech, decoding only what the background passes have not covered."""
+        if self._decode_task is not None:
+            await asyncio.gather(self._decode_task, return_exceptions=True)
+
+        if self._decoded is not None and self._decoded[0] >= self.voiced_until:
+            hypothesis = self._decoded[1]
+        else:
+            hypothesis = await self._decode_window(audio)
+        return "".join(self.committed + [text for _, _, text in hypothesis]).strip()
+
+    async def _decode(self, audio: np.ndarray):
+        hypothesis = await self._decode_window(audio)
+        self._decoded = (len(audio), hypothesis)
+
+        # Commit leading segments both passes agree on (never the still-growing last one)
+        agreed = 0
+        for (_, _, text), (_, _, previous) in zip(hypothesis[:-1], self._previous):
+            if text.strip() != previous.strip():
+                break
+            agreed += 1
+        window_seconds = (len(audio) - self.window_start) / self.sample_rate
+        if agreed == 0 and window_seconds > settings.STT_WINDOW_SECONDS and len(hypothesis) > 1:
+            agreed = len(hypothesis) - 1  # Window is full; commit without agreement
+        if agreed:
+            self.committed.extend(text for _, _, text in hypothesis[:agreed])
+            self.window_start = int(hypothesis[agreed - 1][1] * self.sample_rate)
+            hypothesis = hypothesis[agreed:]
+            self._decoded = (len(audio), hypothesis)
+        self._previous = hypothesis
+
+        words = "".join(self.committed + [text for _, _, text in hypothesis]).split()
+        stable = 0
+        while stable < min(len(words), len(self._previous_words)) and words[stable] == self._previous_words[stable]:
+            stable += 1
+        self._previous_words = words
+        self.stable_text = " ".join(words[:stable])
+        self.partial_text = " ".join(words[stable:])
+        logger.debug("STT partial: [{}] {}", self.stable_text, self.partial_text)
+        if self.on_partial:
+            self.on_partial(self.stable_text, self.partial_text)
+
+    async def _decode_window(self, audio: np.ndarray) -> list[tuple[float, float, str]]:
+        """Decode from the window start, returning segments with times relative to the utterance start."""
+        start = self.window_start
+        prompt = "".join(self.committed)[-200:] or None
+        segments = await self.stt.transcribe_segments(audio[start:], initial_prompt=prompt)
+        offset = start / self.sample_rate
+        return [(s + offset, e + offset, text) for s, e, text in segments]
 
 # Singleton
 _stt_service = None
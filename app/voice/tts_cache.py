@@ -0,0 +1,89 @@
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from app.config import settings
+from app.core.logger import logger
+
+class TTSAudioCache:
+    """
+    On-disk LRU of synthesized speech for phrases that repeat verbatim.
+
+    Files are rendered through the engine's save_to_file path and named by
+    sha256(voice + rate + volume + text), so a voice or rate change never
+    plays stale audio. Recency is the file mtime (touched on every hit), which
+    keeps the LRU order across restarts; the directory is trimmed back to
+    TTS_CACHE_MAX_MB. Only the TTS worker thread uses it, so there is no lock.
+    """
+
+    def __init__(self, directory: str = None, max_bytes: int = None):
+        self.directory = Path(directory or settings.TTS_CACHE_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes if max_bytes is not None else int(settings.TTS_CACHE_MAX_MB * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> size, least recently used first
+        for partial in self.directory.glob("*.part.wav"):
+            partial.unlink(missing_ok=True)
+        for path in sorted(self.directory.glob("*.wav"), key=lambda p: p.stat().st_mtime):
+            self._entries[path.stem] = path.stat().st_size
+        self._bytes = sum(self._entries.values())
+
+    def key(self, text: str, voice: str) -> str:
+        return hashlib.sha256(f"{voice}\0{' '.join(text.split())}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str, voice: str):
+        """Path of the cached audio for `text` in `voice`, or None."""
+        key = self.key(text, voice)
+        if key not in self._entries:
+            self.misses += 1
+            return None
+        path = self.directory / f"{key}.wav"
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return path
+
+    def render(self, engine, text: str, voice: str):
+        """Synthesize `text` to a file with `engine` (on its owning thread); returns the path or None."""
+        key = self.key(text, voice)
+        path = self.directory / f"{key}.wav"
+        partial = self.directory / f"{key}.part.wav"
+        try:
+            engine.save_to_file(text, str(partial))
+            engine.runAndWait()
+            # Anything up to a bare WAV header means the driver wrote no audio
+            if not partial.exists() or partial.stat().st_size <= 44:
+                raise RuntimeError("driver wrote no audio")
+            os.replace(partial, path)
+        except Exception as e:
+            logger.warning("Could not cache speech for {!r}: {}", text, e)
+            partial.unlink(missing_ok=True)
+            return None
+
+        if key in self._entries:
+            self._bytes -= self._entries[key]
+        self._entries[key] = path.stat().st_size
+        self._entries.move_to_end(key)
+        self._bytes += self._entries[key]
+        self._evict()
+        return path
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._bytes}
+
+    def _drop(self, key: str):
+        self._bytes -= self._entries.pop(key)
+        (self.directory / f"{key}.wav").unlink(missing_ok=True)
+
+    def _evict(self):
+        # Never evict the entry just written
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            self._drop(key)
+            logger.debug("Evicted cached speech {}", key)
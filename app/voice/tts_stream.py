@@ -1,58 +1,190 @@
 import pyttsx3
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
+import time
+from contextlib import aclosing
+import sounddevice as sd
+import soundfile as sf
+from app.config import settings
 from app.core.logger import logger
-import re
+from app.voice.segmenter import SentenceSegmenter
+from app.voice.tts_cache import TTSAudioCache
 
 class StreamingTTS:
+    """
+    Speech output through one long-lived pyttsx3 engine.
+
+    The engine is created (and its voice chosen) once, on a dedicated worker
+    thread that owns it for the process lifetime, since SAPI/NSSS engines must
+    be driven from the thread that created them. Sentences are played strictly
+    in submission order; at most TTS_QUEUE_SIZE may be waiting, so a fast LLM
+    stream is held back instead of queueing an unbounded backlog.
+
+    Sentences already in the on-disk audio cache (the canned confirmations
+    and error lines, rendered by `prewarm` at startup) are played back from
+    their WAV instead of being synthesized again.
+
+    `cancel` (barge-in) drops everything queued and cuts off the sentence
+    being spoken: every queued item carries the generation it was queued in,
+    and the engine checks the current generation at each word boundary.
+    """
+
     def __init__(self):
-        self._executor = ThreadPoolExecutor(max_workers=1)
-        self._sentence_regex = re.compile(r'[^.!?]+[.!?]')
-        
-    def _speak(self, text: str):
+        self._queue = queue.Queue()
+        self._slots = None
+        self.cache = TTSAudioCache() if settings.TTS_CACHE_ENABLED else None
+        self.voice_key = ""
+        self._generation = 0
+        self._speaking = 0  # Generation of the sentence being spoken
+        self._ready = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="kratos-tts", daemon=True)
+        self._worker.start()
+
+    def _init_engine(self):
+        engine = pyttsx3.init(settings.TTS_DRIVER or None)
+        # Kratos style: slow, deep
+        engine.setProperty('rate', settings.TTS_RATE)
+        engine.setProperty('volume', settings.TTS_VOLUME)
+        voices = engine.getProperty('voices')
+        # Select a male voice if available
+        for voice in voices:
+            if "male" in voice.name.lower() or "david" in voice.name.lower():
+                engine.setProperty('voice', voice.id)
+                break
+        engine.connect('started-word', lambda name, location, length: self._check_cancelled(engine))
+        # Everything that changes the rendered audio, for the cache key
+        self.voice_key = f"{engine.getProperty('voice')}|{settings.TTS_RATE}|{settings.TTS_VOLUME}"
+        return engine
+
+    def _run(self):
+        engine = None
+        while True:
+            if engine is None:
+                try:
+                    engine = self._init_engine()
+                except Exception as e:
+                    logger.error("TTS engine init failed: {}", e)
+                self._ready.set()
+
+            item = self._queue.get()
+            if item is None:
+                break
+            text, loop, done, render_only, generation = item
+            try:
+                if engine is None or generation != self._generation:
+                    continue  # Cancelled while it was waiting
+                self._speaking = generation
+                if render_only:
+                    if self.cache.get(text, self.voice_key) is None:
+                        self.cache.render(engine, text, self.voice_key)
+                elif not self._play_cached(text, generation):
+                    engine.say(text)
+                    engine.runAndWait()
+            except Exception as e:
+                logger.error("TTS Error: {}", e)
+                engine = None  # Rebuild it for the next sentence
+            finally:
+                try:
+                    loop.call_soon_threadsafe(self._finish, done)
+                except RuntimeError:
+                    pass  # The loop closed (shutdown mid-sentence); nobody is waiting on done
+
+    def _check_cancelled(self, engine):
+        # Runs on the worker thread inside runAndWait, the only safe place to stop the engine
+        if self._speaking != self._generation:
+            engine.stop()
+
+    def _play_cached(self, text: str, generation: int) -> bool:
+        path = self.cache.get(text, self.voice_key) if self.cache is not None else None
+        if path is None:
+            return False
         try:
-            engine = pyttsx3.init()
-            # Kratos style: slow, deep
-            engine.setProperty('rate', 150)
-            engine.setProperty('volume', 1.0)
-            voices = engine.getProperty('voices')
-            # Select a male voice if available
-            for voice in voices:
-                if "male" in voice.name.lower() or "david" in voice.name.lower():
-                    engine.setProperty('voice', voice.id)
+            data, sample_rate = sf.read(path, dtype="float32")
+            sd.play(data, sample_rate)
+            stream = sd.get_stream()
+            while stream.active:
+                if generation != self._generation:
+                    sd.stop()
                     break
-            
-            engine.say(text)
-            engine.runAndWait()
+                time.sleep(0.01)
+            return True
         except Exception as e:
-            logger.error("TTS Error: {}", e)
+            logger.warning("Cached speech playback failed ({}); synthesizing instead.", e)
+            return False
+
+    def wait_until_ready(self, timeout: float = None) -> bool:
+        """Block until the worker has created its engine (e.g. to warm it at startup)."""
+        return self._ready.wait(timeout)
+
+    def _finish(self, done: asyncio.Future):
+        self._slots.release()
+        if not done.done():
+            done.set_result(None)
+
+    async def enqueue(self, text: str, render_only: bool = False) -> asyncio.Future:
+        """Queue a sentence behind everything already queued; waits while the queue is full."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(settings.TTS_QUEUE_SIZE)
+        await self._slots.acquire()
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        if not render_only:
+            logger.info("Speaking: {}", text)
+        self._queue.put((text, loop, done, render_only, self._generation))
+        return done
+
+    async def prewarm(self, phrases):
+        """Render fixed phrases into the audio cache (skipping those already there) without playing them."""
+        if self.cache is None:
+            return
+        pending = [await self.enqueue(phrase, render_only=True) for phrase in phrases]
+        await asyncio.gather(*pending)
+        logger.info("TTS audio cache ready: {}", self.cache.stats())
 
     async def speak_sentence(self, text: str):
         if not text.strip():
             return
-        logger.info("Speaking: {}", text)
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(self._executor, self._speak, text)
+        await (await self.enqueue(text))
 
     async def stream_sentences(self, token_generator):
         """
-        Buffers tokens and speaks as soon as a sentence is complete.
+        Queues each sentence (or, first, an early clause) as soon as it is complete.
+        Returns once every sentence has finished playing.
         """
-        buffer = ""
-        async for token in token_generator:
-            buffer += token
-            
-            # Find complete sentences
-            match = self._sentence_regex.search(buffer)
-            if match:
-                sentence = match.group(0)
-                buffer = buffer[match.end():]
-                # Speak in background without blocking token stream
-                asyncio.create_task(self.speak_sentence(sentence))
-        
+        pending = []
+        segmenter = SentenceSegmenter()
+        # Closing the generator (also on cancellation) closes the Ollama response, which stops generation
+        async with aclosing(token_generator) as tokens:
+            async for token in tokens:
+                # Plays in order on the worker while tokens keep streaming
+                for sentence in segmenter.feed(token):
+                    pending.append(await self.enqueue(sentence))
+
         # Speak remaining buffer
-        if buffer.strip():
-            await self.speak_sentence(buffer)
+        tail = segmenter.flush()
+        if tail:
+            pending.append(await self.enqueue(tail))
+        await asyncio.gather(*pending)
+
+    def cancel(self) -> int:
+        """Barge-in: drop every queued sentence and cut off the current one. Returns how many were dropped."""
+        self._generation += 1
+        dropped = 0
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # Keep the shutdown request
+                break
+            self._finish(item[2])
+            dropped += 1
+        return dropped
+
+    def close(self):
+        self._queue.put(None)
 
 # Singleton
 _tts_service = None
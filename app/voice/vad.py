@@ -0,0 +1,180 @@
+from pathlib import Path
+import numpy as np
+from app.config import settings
+from app.core.logger import logger
+from app.voice.ring_buffer import rms
+
+VAD_BACKENDS = ("rms", "energy", "silero")
+
+def frame_features(samples: np.ndarray, frame_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """Per-frame energy (dBFS) and zero-crossing rate for whole frames of `samples`, vectorized."""
+    n = len(samples) // frame_size
+    frames = samples[:n * frame_size].reshape(n, frame_size)
+    power = np.einsum("ij,ij->i", frames, frames) / frame_size
+    energy_db = 10 * np.log10(power + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame_size
+    return energy_db, zcr
+
+class RmsVAD:
+    """The original fixed threshold: a chunk is speech when its RMS reaches SILENCE_THRESHOLD."""
+
+    def is_speech(self, chunk: np.ndarray) -> bool:
+        return rms(chunk) >= settings.SILENCE_THRESHOLD
+
+    def reset(self):
+        pass
+
+class EnergyVAD:
+    """
+    Energy VAD against an adaptive noise floor.
+
+    A frame is speech when it is VAD_SNR_DB above the tracked noise floor (and
+    above VAD_MIN_ENERGY_DB). Broadband, hiss-like frames (high zero-crossing
+    rate) need a further 6 dB. The floor follows quiet frames quickly downward
+    and slowly upward, and creeps up even during "speech", so a fan switched
+    on mid-session is absorbed instead of holding the endpoint open forever.
+    """
+
+    HISS_ZCR = 0.35
+    HISS_MARGIN_DB = 6.0
+    FLOOR_DOWN, FLOOR_UP, FLOOR_CREEP = 0.3, 0.02, 0.002
+
+    def __init__(self, sample_rate: int = None):
+        self.frame_size = int((sample_rate or settings.SAMPLE_RATE) * settings.VAD_FRAME_MS / 1000)
+        self.noise_floor = None
+
+    def is_speech(self, chunk: np.ndarray) -> bool:
+        energy_db, zcr = frame_features(chunk, self.frame_size)
+        if len(energy_db) == 0:
+            return False
+        if self.noise_floor is None:
+            self.noise_floor = float(energy_db.min())
+
+        speech_frames = 0
+        for energy, crossings in zip(energy_db.tolist(), zcr.tolist()):
+            margin = settings.VAD_SNR_DB + (self.HISS_MARGIN_DB if crossings > self.HISS_ZCR else 0.0)
+            speech = energy > self.noise_floor + margin and energy > settings.VAD_MIN_ENERGY_DB
+            speech_frames += speech
+            if speech:
+                rate = self.FLOOR_CREEP
+            else:
+                rate = self.FLOOR_DOWN if energy < self.noise_floor else self.FLOOR_UP
+            self.noise_floor += rate * (energy - self.noise_floor)
+        return speech_frames * 2 >= len(energy_db)
+
+    def reset(self):
+        self.noise_floor = None
+
+class SileroVAD:
+    """Silero VAD v5 ONNX model on onnxruntime (512-sample windows at 16 kHz, 64-sample context)."""
+
+    WINDOW = 512
+    CONTEXT = 64
+
+    def __init__(self, model_path: str = None):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = 1
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path or settings.VAD_SILERO_MODEL, options,
+                                            providers=["CPUExecutionProvider"])
+        self.sr = np.array(16000, dtype=np.int64)
+        self.reset()
+
+    def is_speech(self, chunk: np.ndarray) -> bool:
+        pending = np.concatenate([self._pending, chunk])
+        n = len(pending) // self.WINDOW
+        self._pending = pending[n * self.WINDOW:]
+        if n == 0:
+            return self._last
+        probs = []
+        for window in pending[:n * self.WINDOW].reshape(n, self.WINDOW):
+            x = np.concatenate([self._context, window])[None, :]
+            prob, self._state = self.session.run(None, {"input": x, "state": self._state, "sr": self.sr})
+            self._context = window[-self.CONTEXT:]
+            probs.append(float(prob[0][0]))
+        self._last = max(probs) >= settings.VAD_SILERO_THRESHOLD
+        return self._last
+
+    def reset(self):
+        self._state = np.zeros((2, 1, 128), dtype=np.float32)
+        self._context = np.zeros(self.CONTEXT, dtype=np.float32)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._last = False
+
+def create_vad(backend: str = None):
+    backend = backend or settings.VAD_BACKEND
+    if backend not in VAD_BACKENDS:
+        raise ValueError(f"Unknown VAD_BACKEND {backend!r}; expected one of {VAD_BACKENDS}")
+    if backend == "silero":
+        if settings.SAMPLE_RATE == 16000 and Path(settings.VAD_SILERO_MODEL).exists():
+            return SileroVAD()
+        logger.warning("Silero VAD model not found at {} (or SAMPLE_RATE is not 16 kHz); using energy VAD.",
+                       settings.VAD_SILERO_MODEL)
+        backend = "energy"
+    return EnergyVAD() if backend == "energy" else RmsVAD()
+
+class Endpointer:
+    """
+    Hangover state machine turning per-chunk speech decisions into utterances.
+
+    silence -> onset on a speech chunk; onset -> speech ("start") once
+    VAD_MIN_SPEECH_SECONDS of consecutive speech confirm it (shorter blips are
+    dropped); speech -> hangover on the first non-speech chunk; hangover ->
+    speech if talking resumes, or -> silence ("end") after the hangover time.
+    Positions are absolute sample counts (the microphone ring positions).
+    """
+
+    def __init__(self, hangover_seconds: float = None):
+        sample_rate = settings.SAMPLE_RATE
+        if hangover_seconds is None:
+            # The fixed-threshold backend keeps its original hang time
+            hangover_seconds = settings.SILENCE_DURATION if settings.VAD_BACKEND == "rms" else settings.VAD_HANGOVER_SECONDS
+        self.hangover = int(hangover_seconds * sample_rate)
+        self.min_speech = int(settings.VAD_MIN_SPEECH_SECONDS * sample_rate)
+        self.preroll = int(settings.VAD_PREROLL_SECONDS * sample_rate)
+        self.state = "silence"
+        self.start_position = 0
+        self.speech_end = 0
+        self._onset = 0
+        self._run = 0
+
+    @property
+    def in_utterance(self) -> bool:
+        return self.state in ("speech", "hangover")
+
+    def update(self, is_speech: bool, position: int, n: int):
+        """Feed the decision for the n samples ending at `position`; returns "start", "end" or None."""
+        if self.state == "silence":
+            if is_speech:
+                self.state, self._onset, self._run = "onset", position - n, n
+                return self._confirm()
+        elif self.state == "onset":
+            if is_speech:
+                self._run += n
+                return self._confirm()
+            self.state = "silence"
+        elif self.state == "speech":
+            if not is_speech:
+                self.state, self.speech_end, self._run = "hangover", position - n, n
+        elif self.state == "hangover":
+            if is_speech:
+                self.state = "speech"
+            else:
+                self._run += n
+                if self._run >= self.hangover:
+                    self.state = "silence"
+                    return "end"
+        return None
+
+    def force_end(self):
+        """End the current utterance now (e.g. it reached its maximum length)."""
+        self.state = "silence"
+
+    def _confirm(self):
+        if self._run >= self.min_speech:
+            self.state = "speech"
+            self.start_position = max(0, self._onset - self.preroll)
+            return "start"
+        return None
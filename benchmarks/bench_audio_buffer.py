@@ -0,0 +1,94 @@
+"""
+Per-chunk cost of microphone buffering: list of copies + concatenate (old path)
+versus AudioRingBuffer with zero-copy utterance views.
+
+Simulates sounddevice blocks of CHUNK_SIZE samples forming utterances of
+--seconds each. Per chunk: the callback copy, the RMS silence check, and the
+orchestrator's buffering. Per utterance: assembling the audio handed to STT.
+Transient bytes are tracemalloc peak minus current around each step, i.e.
+the temporaries it allocated.
+
+    python benchmarks/bench_audio_buffer.py --seconds 10 --utterances 20
+"""
+import sys
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+import numpy as np
+from app.config import settings
+from app.voice.ring_buffer import AudioRingBuffer, rms
+
+def old_path(blocks: list[np.ndarray], chunks_per_utterance: int):
+    buffer = []
+    for i, indata in enumerate(blocks):
+        chunk = indata.copy()                        # MicrophoneStream._callback
+        _ = np.sqrt(np.mean(chunk ** 2)) < 0.01      # MicrophoneStream.stream
+        buffer.append(chunk)                         # KratosOrchestrator.run
+        if (i + 1) % chunks_per_utterance == 0:
+            yield "utterance", np.concatenate(buffer).flatten()
+            buffer = []
+        else:
+            yield "chunk", None
+
+def new_path(blocks: list[np.ndarray], chunks_per_utterance: int):
+    ring = AudioRingBuffer(int((settings.MAX_UTTERANCE_SECONDS + settings.AUDIO_BUFFER_SLACK_SECONDS) * settings.SAMPLE_RATE))
+    start = 0
+    for i, indata in enumerate(blocks):
+        samples = indata[:, 0]
+        ring.write(samples)
+        _ = rms(samples) < 0.01
+        if (i + 1) % chunks_per_utterance == 0:
+            yield "utterance", ring.view(start)
+            start = ring.total
+        else:
+            yield "chunk", None
+
+def measure(name: str, path, blocks: list[np.ndarray], chunks_per_utterance: int):
+    # Timing pass (no tracing overhead)
+    timings = {"chunk": [], "utterance": []}
+    steps = path(blocks, chunks_per_utterance)
+    while True:
+        t0 = time.perf_counter_ns()
+        try:
+            kind, _ = next(steps)
+        except StopIteration:
+            break
+        timings[kind].append(time.perf_counter_ns() - t0)
+
+    # Allocation pass
+    transient = {"chunk": [], "utterance": []}
+    tracemalloc.start()
+    steps = path(blocks, chunks_per_utterance)
+    while True:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        try:
+            kind, _ = next(steps)
+        except StopIteration:
+            break
+        current, peak = tracemalloc.get_traced_memory()
+        transient[kind].append(peak - before)
+    tracemalloc.stop()
+
+    print(f"{name:>6} | {np.median(timings['chunk']) / 1000:>12.2f} | {np.median(timings['utterance']) / 1000:>16.1f} | "
+          f"{np.median(transient['chunk']):>15.0f} | {np.median(transient['utterance']) / 1024:>17.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10.0, help="Utterance length")
+    parser.add_argument("--utterances", type=int, default=20)
+    args = parser.parse_args()
+
+    chunks_per_utterance = int(args.seconds * settings.SAMPLE_RATE / settings.CHUNK_SIZE)
+    rng = np.random.default_rng(0)
+    blocks = [rng.standard_normal((settings.CHUNK_SIZE, 1)).astype(np.float32) * 0.05
+              for _ in range(chunks_per_utterance * args.utterances)]
+    print(f"{'path':>6} | {'chunk us p50':>12} | {'utterance us p50':>16} | {'chunk bytes p50':>15} | {'utterance KiB p50':>17}")
+    measure("list", old_path, blocks, chunks_per_utterance)
+    measure("ring", new_path, blocks, chunks_per_utterance)
@@ -0,0 +1,225 @@
+"""
+Barge-in reaction time and queue depth for the full-duplex orchestrator.
+
+Runs the real KratosOrchestrator loop (MicrophoneStream, VAD, Endpointer,
+ChatSession, StreamingTTS) with three stand-ins: the sound card replays a
+synthetic session in real time, the speech engine "speaks" at TTS_RATE words
+per minute and honours stop() at word boundaries like SAPI, and Ollama is the
+local stub. Each round the user asks something, Kratos starts a long reply,
+and the user talks over it. Reported per round:
+
+    detect ms    barge-in onset -> reply cancelled (interrupt())
+    silent ms    barge-in onset -> the engine actually stopped speaking
+    next ms      end of the barge-in utterance -> its reply started
+
+plus the deepest microphone queue and TTS queue seen over the run, which must
+stay bounded while Kratos is talking.
+
+    python benchmarks/bench_barge_in.py --rounds 5
+    python benchmarks/bench_barge_in.py --no-barge-in   # echo-safe mode, for contrast
+"""
+import sys
+import argparse
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+import numpy as np
+import pyttsx3
+from app.config import settings
+from app.agent import orchestrator as orchestrator_module
+from app.llm.ollama_client import get_ollama_client
+from app.voice import audio_stream
+from benchmarks.bench_vad_replay import voiced
+from benchmarks.ollama_stub import OllamaStub, start_stub
+
+SR = 16000
+
+class ReplayInputStream:
+    """sounddevice.InputStream stand-in feeding a recorded signal to the callback in real time."""
+
+    def __init__(self, signal: np.ndarray, samplerate, channels, blocksize, callback, dtype):
+        self.signal, self.blocksize, self.callback = signal, blocksize, callback
+        self.started_at = None
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+
+    def _run(self):
+        self.started_at = time.perf_counter()
+        for i, start in enumerate(range(0, len(self.signal) - self.blocksize, self.blocksize)):
+            delay = self.started_at + (start + self.blocksize) / SR - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if self._stop.is_set():
+                return
+            self.callback(self.signal[start:start + self.blocksize, None], self.blocksize, None, None)
+
+class SimulatedEngine:
+    """pyttsx3 engine stand-in: speaks at TTS_RATE wpm, fires started-word, stops at word boundaries."""
+
+    def __init__(self, spoken: list):
+        self.spoken = spoken  # (start, end) of each utterance
+        self.callbacks = []
+        self.text = ""
+        self._stopped = False
+
+    def setProperty(self, name, value):
+        pass
+
+    def getProperty(self, name):
+        return [] if name == "voices" else "simulated"
+
+    def connect(self, topic, callback):
+        if topic == "started-word":
+            self.callbacks.append(callback)
+
+    def say(self, text):
+        self.text = text
+
+    def stop(self):
+        self._stopped = True
+
+    def runAndWait(self):
+        self._stopped = False
+        start = time.perf_counter()
+        word_s = 60 / settings.TTS_RATE
+        for word in self.text.split():
+            for callback in self.callbacks:
+                callback(None, 0, len(word))
+            if self._stopped:
+                break
+            time.sleep(word_s)
+        self.spoken.append((start, time.perf_counter()))
+
+class NoEmbeddings:
+    async def embed(self, text: str) -> np.ndarray:
+        return np.zeros(384, dtype=np.float32)
+
+class NoMemories:
+    embeddings = NoEmbeddings()
+
+    async def start_background_jobs(self):
+        pass
+
+    async def retrieve(self, query: str, top_k: int = 3, query_embedding=None):
+        return []
+
+    async def get_latest_weekly_summary(self) -> str:
+        return ""
+
+class FixedTranscriber:
+    async def transcribe_chunk(self, audio) -> str:
+        await asyncio.sleep(0.05)
+        return "Tell me about the war."
+
+def make_session(rounds: int, rng: np.random.Generator):
+    """Silence / question / Kratos replies / user talks over him; returns (signal, barge-in spans in seconds)."""
+    parts, spans, t = [], [], 0.0
+    def add(seconds, speech=False):
+        nonlocal t
+        noise = (rng.standard_normal(int(seconds * SR)) * 10 ** (-60 / 20)).astype(np.float32)
+        parts.append(noise + voiced(seconds, rng, -20) if speech else noise)
+        t += seconds
+    add(1.0)
+    for _ in range(rounds):
+        add(1.2, speech=True)      # Question
+        add(3.0)                   # Kratos starts answering
+        spans.append((t, t + 1.5))
+        add(1.5, speech=True)      # Barge-in
+        add(4.0)                   # Its reply plays
+    return np.concatenate(parts), spans
+
+async def main(rounds: int, barge_in: bool):
+    settings.BARGE_IN = barge_in
+    settings.STT_STREAMING = False
+    settings.TTS_CACHE_ENABLED = False
+    settings.LLM_CONVERSATION_MODE = "chat"
+
+    stub = OllamaStub(load_ms=0, token_ms=25, tokens=200, sentence_words=6)
+    runner, base_url = await start_stub(stub)
+    settings.OLLAMA_URL = f"{base_url}/api/generate"
+    settings.OLLAMA_CHAT_URL = f"{base_url}/api/chat"
+
+    signal, spans = make_session(rounds, np.random.default_rng(0))
+    replay = {}
+    def input_stream(**kwargs):
+        replay["stream"] = ReplayInputStream(signal, **kwargs)
+        return replay["stream"]
+    audio_stream.sd.InputStream = input_stream
+    spoken = []
+    pyttsx3.init = lambda driver=None: SimulatedEngine(spoken)
+
+    orch = orchestrator_module.KratosOrchestrator.__new__(orchestrator_module.KratosOrchestrator)
+    orch.mic = audio_stream.MicrophoneStream()
+    orch.stt = FixedTranscriber()
+    orch.tts = orchestrator_module.get_tts_service()
+    orch.journal = NoMemories()
+    orch.chat = orchestrator_module.ChatSession()
+    orch._response = None
+    orch._speculation = None
+    orch.is_running = False
+
+    interrupts, starts = [], []
+    interrupt, respond = orch.interrupt, orch.respond
+    def timed_interrupt():
+        if orch.responding:
+            interrupts.append(time.perf_counter())
+        interrupt()
+    async def timed_respond(text, context=None):
+        starts.append(time.perf_counter())
+        await respond(text, context)
+    orch.interrupt, orch.respond = timed_interrupt, timed_respond
+
+    depth = {"mic": 0, "tts": 0}
+    async def sample_queues():
+        while True:
+            depth["mic"] = max(depth["mic"], orch.mic.queue.qsize())
+            depth["tts"] = max(depth["tts"], orch.tts._queue.qsize())
+            await asyncio.sleep(0.01)
+
+    sampler = asyncio.create_task(sample_queues())
+    run = asyncio.create_task(orch.run())
+    await asyncio.sleep(len(signal) / SR + 0.5)
+    orch.is_running = False
+    interrupt()
+    orch.mic.stop()
+    orch.tts.close()
+    run.cancel()
+    sampler.cancel()
+    await asyncio.gather(run, sampler, return_exceptions=True)
+    await get_ollama_client().close()
+    await runner.cleanup()
+
+    t0 = replay["stream"].started_at
+    print(f"barge-in {'on' if barge_in else 'off'}; {rounds} rounds; "
+          f"min speech {settings.BARGE_IN_MIN_SPEECH_SECONDS * 1000:.0f} ms, hangover {settings.VAD_HANGOVER_SECONDS * 1000:.0f} ms")
+    print(f"{'round':>5} | {'detect ms':>9} | {'silent ms':>9} | {'next ms':>8}")
+    for i, (onset, end) in enumerate(spans):
+        onset_at, end_at = t0 + onset, t0 + end
+        detect = next((t for t in interrupts if onset_at <= t <= end_at + 2), None)
+        # Quiet at the end of whatever was being said when the reply was cancelled
+        silent = detect and next((e for s, e in spoken if s <= detect <= e), detect)
+        nxt = next((t for t in starts if t >= end_at), None)
+        fmt = lambda v, ref: f"{(v - ref) * 1000:.0f}" if v is not None else "-"
+        print(f"{i:>5} | {fmt(detect, onset_at):>9} | {fmt(silent, onset_at):>9} | {fmt(nxt, end_at):>8}")
+    print(f"replies started: {len(starts)}; Ollama streams aborted: {stub.aborted}; "
+          f"deepest mic queue: {depth['mic']} chunks; deepest TTS queue: {depth['tts']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--no-barge-in", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.rounds, not args.no_barge_in))
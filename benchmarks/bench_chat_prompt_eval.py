@@ -0,0 +1,93 @@
+"""
+Prompt-eval cost per turn over a scripted 20-turn conversation, against the
+Ollama stub (which, like Ollama, only evaluates tokens after the cached prefix).
+
+    stateless        build_prompt + /api/generate, no dialogue history (old path)
+    stateless+hist   the same prompt with the history appended; per-turn memories
+                     sit ahead of the history, so the whole history is re-evaluated
+    chat session     ChatSession over /api/chat with a stable system/history prefix
+
+    python benchmarks/bench_chat_prompt_eval.py --turns 20 --prompt-ms-per-token 1.0
+"""
+import sys
+import argparse
+import asyncio
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+import numpy as np
+from app.config import settings
+from benchmarks.ollama_stub import OllamaStub, start_stub
+
+WEEKLY = "A hard week of training. Progress on discipline, struggle with sleep and patience at work."
+TOPICS = ["training", "sleep", "work", "my brother", "diet", "the project", "fear", "patience", "rest", "anger"]
+
+def scripted_turn(i: int):
+    topic = TOPICS[i % len(TOPICS)]
+    memories = [f"Day {i * 3 + k}: wrote about {topic}, felt {'strong' if k % 2 else 'tired'} and kept going." for k in range(3)]
+    return f"Turn {i}: what should I do about {topic} this week?", memories
+
+async def stateless(client, turns: int, with_history: bool):
+    from app.llm.prompt_builder import build_prompt
+    history, stats = [], []
+    for i in range(turns):
+        text, memories = scripted_turn(i)
+        prompt = build_prompt(text, memories, WEEKLY)
+        if with_history:
+            head, _, tail = prompt.rpartition("\nUser: ")
+            prompt = head + "".join(history) + "\nUser: " + tail
+        reply = []
+        async for data in client.stream({"model": "stub", "prompt": prompt}):
+            reply.append(data.get("response", ""))
+            if data.get("done"):
+                stats.append((data["prompt_eval_count"], data["prompt_eval_duration"] / 1e6))
+        history.append(f"\nUser: {text}\nKratos: {''.join(reply)}")
+        history = history[-settings.CHAT_HISTORY_TURNS:]
+    return stats
+
+async def session(turns: int):
+    from app.llm.chat_session import ChatSession
+    chat, stats = ChatSession(), []
+    for i in range(turns):
+        text, memories = scripted_turn(i)
+        async for _ in chat.stream(text, memories, WEEKLY):
+            pass
+        stats.append((chat.last_stats["prompt_eval_count"], chat.last_stats["prompt_eval_ms"]))
+    return stats
+
+async def main(turns: int, prompt_ms_per_token: float):
+    stub = OllamaStub(load_ms=0, prompt_ms_per_token=prompt_ms_per_token, token_ms=0.5, tokens=30)
+    runner, base_url = await start_stub(stub)
+    settings.OLLAMA_URL = f"{base_url}/api/generate"
+    settings.OLLAMA_CHAT_URL = f"{base_url}/api/chat"
+    from app.llm.ollama_client import get_ollama_client
+    client = get_ollama_client()
+    try:
+        results = {}
+        for name, run in (("stateless", lambda: stateless(client, turns, with_history=False)),
+                          ("stateless+hist", lambda: stateless(client, turns, with_history=True)),
+                          ("chat session", lambda: session(turns))):
+            stub.cached_prompt = ""
+            results[name] = await run()
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+    names = list(results)
+    print("turn | " + " | ".join(f"{n:>22}" for n in names))
+    print("     | " + " | ".join(f"{'tokens':>10} {'ms':>11}" for _ in names))
+    for t in range(turns):
+        print(f"{t + 1:>4} | " + " | ".join(f"{results[n][t][0]:>10} {results[n][t][1]:>11.1f}" for n in names))
+    print("mean | " + " | ".join(
+        f"{np.mean([s[0] for s in results[n][1:]]):>10.0f} {np.mean([s[1] for s in results[n][1:]]):>11.1f}" for n in names))
+    print("(mean excludes turn 1)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--prompt-ms-per-token", type=float, default=1.0, help="Simulated prompt-eval cost")
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.prompt_ms_per_token))
@@ -0,0 +1,84 @@
+"""
+Startup time, per-query latency and parity of each EmbeddingService backend.
+
+Each backend is loaded in a fresh interpreter, so startup includes its imports
+(torch vs onnxruntime). Parity is the minimum cosine similarity against the
+torch embeddings and should stay >= 0.99.
+
+    python benchmarks/bench_embedding_backends.py --queries 200
+"""
+import sys
+import argparse
+import json
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+def measure(backend: str, queries: int, out_path: str):
+    """Runs in a child process so startup cost is measured from a cold interpreter."""
+    start = time.perf_counter()
+    import numpy as np
+    from app.memory.embeddings import EmbeddingService
+    from app.memory.onnx_embeddings import PARITY_TEXTS
+
+    service = EmbeddingService(backend)
+    startup = time.perf_counter() - start
+
+    # Time the backend directly so the embedding cache does not hide encode cost
+    service.backend.encode(["warm up"])
+    timings = []
+    for i in range(queries):
+        t0 = time.perf_counter()
+        service.backend.encode([f"What did I do on day {i} of training?"])
+        timings.append((time.perf_counter() - t0) * 1000)
+
+    np.save(out_path, service.backend.encode(PARITY_TEXTS))
+    print(json.dumps({"startup": startup, "p50": float(np.percentile(timings, 50)),
+                      "p99": float(np.percentile(timings, 99))}))
+
+def run(queries: int):
+    import numpy as np
+    from app.config import settings
+    from app.memory.onnx_embeddings import export_onnx, onnx_model_dir
+
+    # Export up front so the one-time conversion is not counted as startup
+    model_dir = onnx_model_dir(settings.EMBEDDING_MODEL)
+    if not (model_dir / "export.json").exists():
+        export_onnx(settings.EMBEDDING_MODEL, model_dir)
+
+    print(f"{'backend':>10} | {'startup s':>9} | {'p50 ms':>7} | {'p99 ms':>7} | {'min cosine':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        reference = None
+        for backend in BACKENDS:
+            out_path = str(Path(tmp) / f"{backend}.npy")
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", backend, str(queries), out_path],
+                check=True, capture_output=True, text=True,
+            ).stdout.strip().splitlines()[-1]
+            result = json.loads(out)
+
+            vectors = np.load(out_path)
+            if reference is None:
+                reference = vectors
+            cosine = np.sum(vectors * reference, axis=1) / (
+                np.linalg.norm(vectors, axis=1) * np.linalg.norm(reference, axis=1)
+            )
+            print(f"{backend:>10} | {result['startup']:>9.2f} | {result['p50']:>7.2f} | "
+                  f"{result['p99']:>7.2f} | {cosine.min():>10.4f}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        measure(sys.argv[2], int(sys.argv[3]), sys.argv[4])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    run(args.queries)
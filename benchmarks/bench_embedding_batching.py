@@ -0,0 +1,66 @@
+"""
+Throughput and latency of embedding requests at 1, 8 and 64 concurrent callers.
+
+Compares one encode per request on a worker thread ("direct") with the
+micro-batching AsyncEmbeddingService ("batched"). Every text is unique and the
+persistent cache lives in a temp directory, so each request really is encoded.
+
+    python benchmarks/bench_embedding_batching.py --requests 20
+"""
+import sys
+import argparse
+import asyncio
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+import numpy as np
+from app.config import settings
+
+CALLERS = (1, 8, 64)
+
+async def caller(embed, prefix: str, requests: int, latencies: list):
+    for i in range(requests):
+        t0 = time.perf_counter()
+        await embed(f"{prefix} request {i}: today I trained hard and felt the weight of the week lift.")
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+async def run_mode(name: str, embed, callers: int, requests: int):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(caller(embed, f"{name}-{callers}-{c}", requests, latencies) for c in range(callers)))
+    elapsed = time.perf_counter() - start
+    print(f"{name:>8} | {callers:>7} | {len(latencies) / elapsed:>9.1f} | "
+          f"{np.percentile(latencies, 50):>7.1f} | {np.percentile(latencies, 99):>7.1f}")
+
+async def main(requests: int):
+    from app.memory.embeddings import EmbeddingService
+    from app.memory.embedding_worker import AsyncEmbeddingService
+
+    service = EmbeddingService()
+    batched = AsyncEmbeddingService(service)
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    async def direct(text: str):
+        return await asyncio.get_running_loop().run_in_executor(executor, service.embed, text)
+
+    await direct("warm up")
+    print(f"{'mode':>8} | {'callers':>7} | {'embeds/s':>9} | {'p50 ms':>7} | {'p99 ms':>7}")
+    for callers in CALLERS:
+        await run_mode("direct", direct, callers, requests)
+        await run_mode("batched", batched.embed, callers, requests)
+    batched.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20, help="Sequential requests per caller")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.EMBEDDING_CACHE_PATH = str(Path(tmp) / "cache.db")
+        asyncio.run(main(args.requests))
@@ -0,0 +1,162 @@
+"""
+Retrieval quality and latency: FAISS only, FTS5 BM25 only, and the hybrid
+(reciprocal rank fusion) JournalService.retrieve, on a synthetic journal.
+
+Entries are templated sentences about one of 40 topics, mentioning one of
+3000 people and a date, spread over three years. Their embeddings stand in
+for MiniLM: the topic dominates the vector, the person contributes only a
+faint component (as names do in sentence embeddings), plus noise. Query sets:
+
+    topic    "How has my <topic> been going?"           relevant: entries on the topic
+    person   "What did <name> say about <topic>?"        relevant: that person and topic
+    date     "What happened with <topic> on <date>?"    relevant: that date and topic
+    recent   "Lately, how is my <topic>?"               relevant: topic, last 30 days
+
+Reported per method: hit@3 (a relevant entry in the top 3) per query set and
+retrieve() latency. The recent set is also run with recency decay on.
+
+    python benchmarks/bench_hybrid_retrieval.py --entries 100000 --queries 200
+"""
+import sys
+import os
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_tmp.name) / 'bench.db'}"
+
+import numpy as np
+from app.config import settings
+from app.memory.database import SessionLocal, init_db, run_db
+from app.memory.vector_store import VectorStore
+from app.journal.journal_service import JournalService
+
+DIM = 384
+BULK_BATCH = 5_000
+NOW = datetime.utcnow()  # retrieve() measures recency against the wall clock
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August",
+          "September", "October", "November", "December"]
+TOPICS = ["training", "sleep", "diet", "work", "debt", "marriage", "son", "daughter", "anger", "grief",
+          "running", "lifting", "reading", "writing", "garden", "house", "car", "doctor", "knee", "back",
+          "meditation", "drinking", "smoking", "church", "travel", "money", "promotion", "layoff", "exam", "music",
+          "painting", "fishing", "hunting", "boxing", "climbing", "swimming", "cooking", "friendship", "father", "mother"]
+TEMPLATES = [
+    "Today the {topic} took everything out of me. Talked it over with {name} on {date}.",
+    "{name} and I argued about {topic} on {date}; I kept my temper.",
+    "Small win with {topic}. {name} noticed on {date}.",
+    "Could not face the {topic} on {date}. {name} told me to keep going.",
+]
+
+class SyntheticEmbeddings:
+    """Returns the precomputed vector for each query text."""
+
+    def __init__(self, vectors: dict):
+        self.vectors = vectors
+
+    async def embed(self, text: str) -> np.ndarray:
+        return self.vectors[text]
+
+def unit(v: np.ndarray) -> np.ndarray:
+    return (v / np.linalg.norm(v, axis=-1, keepdims=True)).astype(np.float32)
+
+def make_journal(entries: int, rng: np.random.Generator):
+    names = [f"{first} {last}" for first, last in zip(
+        rng.choice(["Atreus", "Mimir", "Freya", "Brok", "Sindri", "Thor", "Sif", "Tyr", "Odin", "Baldur"], 3000),
+        [f"Name{i:04d}" for i in range(3000)])]
+    topic_vecs = rng.standard_normal((len(TOPICS), DIM)).astype(np.float32)
+    name_vecs = rng.standard_normal((len(names), DIM)).astype(np.float32)
+
+    topic = rng.integers(0, len(TOPICS), entries)
+    person = rng.integers(0, len(names), entries)
+    stamps = [NOW - timedelta(minutes=int(m)) for m in rng.integers(0, 3 * 365 * 24 * 60, entries)]
+    dates = [f"{MONTHS[s.month - 1]} {s.day} {s.year}" for s in stamps]
+    texts = [TEMPLATES[i % len(TEMPLATES)].format(topic=TOPICS[t], name=names[p], date=d)
+             for i, (t, p, d) in enumerate(zip(topic, person, dates))]
+    vectors = unit(topic_vecs[topic] + 0.15 * name_vecs[person] + 0.8 * rng.standard_normal((entries, DIM)).astype(np.float32))
+    return dict(names=names, topic_vecs=topic_vecs, name_vecs=name_vecs, topic=topic, person=person,
+                stamps=stamps, dates=dates, texts=texts, vectors=vectors)
+
+def make_queries(j: dict, n: int, rng: np.random.Generator):
+    """Query sets as lists of (text, vector, set of relevant entry ids); entry ids are 1-based row ids."""
+    sets = {"topic": [], "person": [], "date": [], "recent": []}
+    ids = np.arange(1, len(j["texts"]) + 1)
+    recent = np.array([(NOW - s).days <= 30 for s in j["stamps"]])
+    dates = np.array(j["dates"])
+    for _ in range(n):  # Repeated query texts share one vector
+        i = int(rng.integers(len(j["texts"])))
+        t, p = j["topic"][i], j["person"][i]
+        noise = lambda: 0.5 * rng.standard_normal(DIM).astype(np.float32)
+        sets["topic"].append((f"How has my {TOPICS[t]} been going?",
+                              unit(j["topic_vecs"][t] + noise()), set(ids[j["topic"] == t])))
+        sets["person"].append((f"What did {j['names'][p]} say about {TOPICS[t]}?",
+                               unit(j["topic_vecs"][t] + 0.15 * j["name_vecs"][p] + noise()),
+                               set(ids[(j["topic"] == t) & (j["person"] == p)])))
+        same_date = dates == j["dates"][i]
+        sets["date"].append((f"What happened with {TOPICS[t]} on {j['dates'][i]}?",
+                             unit(j["topic_vecs"][t] + noise()), set(ids[(j["topic"] == t) & same_date])))
+        sets["recent"].append((f"Lately, how is my {TOPICS[t]}?",
+                               unit(j["topic_vecs"][t] + noise()), set(ids[(j["topic"] == t) & recent])))
+    return sets
+
+def load(j: dict, index_path: str) -> VectorStore:
+    init_db()
+    db = SessionLocal()
+    start = time.perf_counter()
+    for offset in range(0, len(j["texts"]), BULK_BATCH):
+        JournalService._insert_entries(db, j["texts"][offset:offset + BULK_BATCH], j["stamps"][offset:offset + BULK_BATCH])
+    db.close()
+    print(f"inserted {len(j['texts'])} entries (FTS5 kept in sync by triggers) in {time.perf_counter() - start:.1f} s")
+    store = VectorStore(DIM, index_path=index_path)
+    store.rebuild(list(range(1, len(j["texts"]) + 1)), j["vectors"])
+    return store
+
+async def run_set(journal: JournalService, queries, method: str):
+    hits, timings = 0, []
+    for text, _, relevant in queries:
+        start = time.perf_counter()
+        if method == "lexical":
+            top = (await run_db(JournalService._search_lexical, text, 3))[:3]
+        else:
+            settings.RETRIEVAL_MODE = method
+            top = [entry_id for entry_id, _, _ in await journal.retrieve(text, 3)]
+        timings.append((time.perf_counter() - start) * 1000)
+        hits += bool(relevant.intersection(top))
+    return hits / len(queries), timings
+
+async def main(entries: int, queries: int):
+    rng = np.random.default_rng(0)
+    j = make_journal(entries, rng)
+    sets = make_queries(j, queries, rng)
+    store = load(j, str(Path(_tmp.name) / "faiss.index"))
+
+    journal = JournalService.__new__(JournalService)
+    journal.vector_store = store
+    journal.embeddings = SyntheticEmbeddings({text: vec for qs in sets.values() for text, vec, _ in qs})
+
+    print(f"{'method':<14} | " + " | ".join(f"{name + ' hit@3':>13}" for name in sets) + f" | {'p50 ms':>7} | {'p95 ms':>7}")
+    for method, half_life in (("vector", 0.0), ("lexical", 0.0), ("hybrid", 0.0), ("hybrid", 14.0)):
+        settings.RETRIEVAL_HALF_LIFE_DAYS = half_life
+        rates, timings = [], []
+        for qs in sets.values():
+            rate, t = await run_set(journal, qs, method)
+            rates.append(rate)
+            timings += t
+        label = method + (f" +{half_life:g}d" if half_life else "")
+        print(f"{label:<14} | " + " | ".join(f"{r:>13.2f}" for r in rates)
+              + f" | {np.percentile(timings, 50):>7.2f} | {np.percentile(timings, 95):>7.2f}")
+    store.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.entries, args.queries))
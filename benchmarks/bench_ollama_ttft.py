@@ -0,0 +1,85 @@
+"""
+Time-to-first-token against the Ollama stub: a new ClientSession per request
+without keep_alive (the old stream_llm_response) versus the shared OllamaClient.
+
+Two phases per mode: back-to-back turns, which isolate connection setup, and
+turns separated by an idle gap longer than the stub's default keep-alive. The
+clock is compressed: the stub's default keep-alive stands in for Ollama's 5
+minutes and the gap for a pause between conversations, so only the pooled
+client (which sends OLLAMA_KEEP_ALIVE) avoids reloading the model.
+
+    python benchmarks/bench_ollama_ttft.py --turns 20 --load-ms 800
+"""
+import sys
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+import aiohttp
+import numpy as np
+from app.llm.ollama_client import OllamaClient
+from benchmarks.ollama_stub import OllamaStub, start_stub
+
+PROMPT = "You are Kratos. Speak in short, powerful sentences.\nUser: How do I keep going?\nKratos:"
+
+async def legacy_ttft(url: str) -> float:
+    start = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, json={"model": "stub", "prompt": PROMPT, "stream": True}) as resp:
+            ttft = None
+            async for line in resp.content:
+                data = json.loads(line)
+                if ttft is None and data.get("response"):
+                    ttft = time.perf_counter() - start
+                if data.get("done"):
+                    break
+    return ttft * 1000
+
+async def pooled_ttft(client: OllamaClient) -> float:
+    start = time.perf_counter()
+    ttft = None
+    async for data in client.stream({"model": "stub", "prompt": PROMPT}):
+        if ttft is None and data.get("response"):
+            ttft = time.perf_counter() - start
+    return ttft * 1000
+
+async def run_phase(name: str, measure, turns: int, gap: float):
+    timings = []
+    for i in range(turns):
+        if i and gap:
+            await asyncio.sleep(gap)
+        timings.append(await measure())
+    warm = timings[1:] or timings
+    print(f"{name:<34} | {timings[0]:>8.1f} | {np.percentile(warm, 50):>8.1f} | {np.percentile(warm, 99):>8.1f}")
+
+async def main(turns: int, load_ms: float, idle_turns: int):
+    default_keep_alive = 1.0
+    gap = default_keep_alive * 1.5
+    print(f"{'mode / phase':<34} | {'cold ms':>8} | {'p50 ms':>8} | {'p99 ms':>8}")
+    for name in ("per-request session", "pooled client"):
+        stub = OllamaStub(load_ms=load_ms, token_ms=5, default_keep_alive=default_keep_alive)
+        runner, base_url = await start_stub(stub)
+        url = f"{base_url}/api/generate"
+        client = OllamaClient(url)
+        measure = (lambda: legacy_ttft(url)) if name == "per-request session" else (lambda: pooled_ttft(client))
+        try:
+            await run_phase(f"{name} / back-to-back", measure, turns, 0)
+            await run_phase(f"{name} / idle {gap:.1f}s", measure, idle_turns, gap)
+            print(f"{'':<34}   {stub.requests} requests over {len(stub.connections)} connections")
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--idle-turns", type=int, default=4)
+    parser.add_argument("--load-ms", type=float, default=800, help="Simulated model load time")
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.load_ms, args.idle_turns))
@@ -0,0 +1,133 @@
+"""
+Journal compression cost, the old way and with hierarchical rollups:
+
+    single     the old _compress: the last 25 raw entries joined into one
+               weekly-summary prompt (num_ctx 1024, so most of it is cut off)
+    rollups    RollupBuilder.update: the changed days from the entries' short
+               summaries, then their weeks from the days and, once a month
+               is over, the month from its weeks, chunked to
+               ROLLUP_PROMPT_TOKENS (map-reduce)
+
+A synthetic journal (--per-day entries of about --words words, each with a
+one-line summary as the summarize job would leave it) is written day by day
+into a temporary SQLite database. Whenever the insert trigger's counter
+reaches JOURNAL_COMPRESSION_THRESHOLD, both are run against the Ollama stub
+(benchmarks/ollama_stub.py), which charges --prompt-ms per prompt token it
+keeps and --token-ms per generated token. Reported per compression: Ollama
+calls, prompt tokens sent, tokens past num_ctx (dropped unread), wall time.
+
+    python benchmarks/bench_rollups.py --days 90 --per-day 3 --prompt-ms 2 --token-ms 20
+"""
+import sys
+import os
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_tmp.name) / 'bench.db'}"
+
+import numpy as np
+from app.config import settings
+from app.memory.database import init_db, run_db
+from app.memory.models import JournalEntry
+from app.memory.summarizer import Summarizer
+from app.journal.journal_service import JournalService
+from app.journal.rollups import RollupBuilder
+from app.llm.ollama_client import get_ollama_client
+from benchmarks.ollama_stub import OllamaStub, start_stub
+
+LEGACY_NUM_CTX = 1024
+LEGACY_PROMPT = ("Provide a powerful weekly summary for these journal entries. Highlight progress and areas of "
+                 "struggle. Keep it short (2-3 sentences):\n\n")
+WORDS = ("today trained hard slept badly argued with my son about the garden kept temper work was long debt "
+         "letter came knee hurts ran five miles read at night father called grief came back cooked dinner "
+         "boxing class promotion talk drank too much missed church quiet morning").split()
+
+def make_entry(rng: np.random.Generator, words: int) -> tuple[str, str]:
+    """(raw text, summary) for one synthetic entry."""
+    text = " ".join(rng.choice(WORDS, max(20, int(rng.normal(words, words / 4)))))
+    summary = " ".join(rng.choice(WORDS, 12)).capitalize() + "."
+    return text[0].upper() + text[1:] + ".", summary
+
+def record(db, text: str, summary: str, timestamp: datetime) -> bool:
+    """Insert an entry the way add_entries_bulk does; True if it queued a compression."""
+    entry = JournalService._insert_entries(db, [text], [timestamp])[0]
+    JournalService._set_summaries(db, [entry.id], [summary])
+    queued = JournalService._queue_compression(db, entry.id)
+    db.commit()
+    return queued
+
+def recent_entries(db, limit: int) -> list[JournalEntry]:
+    return db.query(JournalEntry).order_by(JournalEntry.timestamp.desc()).limit(limit).all()
+
+async def summarize_weekly(summarizer: Summarizer, texts: list[str]) -> str:
+    """The old weekly summary: every text in one prompt."""
+    return await summarizer._call_ollama(LEGACY_PROMPT + "\n---\n".join(texts), num_ctx=LEGACY_NUM_CTX)
+
+async def measure(summarizer: Summarizer, run) -> tuple[int, int, float]:
+    calls, tokens, start = summarizer.calls, summarizer.prompt_tokens, time.perf_counter()
+    await run()
+    return summarizer.calls - calls, summarizer.prompt_tokens - tokens, time.perf_counter() - start
+
+async def main(days: int, per_day: int, words: int, prompt_ms: float, token_ms: float, tokens: int):
+    stub = OllamaStub(load_ms=0, prompt_ms_per_token=prompt_ms, token_ms=token_ms, tokens=tokens)
+    runner, base_url = await start_stub(stub)
+    settings.OLLAMA_URL = f"{base_url}/api/generate"
+    init_db()
+    rng = np.random.default_rng(0)
+    legacy, summarizer = Summarizer(), Summarizer()
+    builder = RollupBuilder(summarizer)
+
+    print(f"{days} days x {per_day} entries of ~{words} words, compression every "
+          f"{settings.JOURNAL_COMPRESSION_THRESHOLD} entries; stub {prompt_ms:g} ms/prompt token, "
+          f"{token_ms:g} ms x {tokens} generated tokens")
+    print(f"{'#':>3} | {'single calls':>12} | {'tokens':>6} | {'dropped':>7} | {'s':>5} || "
+          f"{'rollup calls':>12} | {'tokens':>6} | {'s':>5}")
+    start_day = datetime(2026, 1, 1)
+    rows = []
+    for day in range(days):
+        for n in range(per_day):
+            timestamp = start_day + timedelta(days=day, hours=8 + n * 12 / per_day)
+            text, summary = make_entry(rng, words)
+            if not await run_db(record, text, summary, timestamp):
+                continue
+
+            async def single():
+                entries = await run_db(recent_entries, 25)
+                await summarize_weekly(legacy, [e.raw_text for e in entries])
+            old = await measure(legacy, single)
+            new = await measure(summarizer, builder.update)
+            dropped = max(0, old[1] - LEGACY_NUM_CTX)
+            rows.append((*old, dropped, *new))
+            print(f"{len(rows):>3} | {old[0]:>12} | {old[1]:>6} | {dropped:>7} | {old[2]:>5.2f} || "
+                  f"{new[0]:>12} | {new[1]:>6} | {new[2]:>5.2f}")
+
+    if rows:
+        mean = np.mean(rows, axis=0)
+        print(f"{'avg':>3} | {mean[0]:>12.1f} | {mean[1]:>6.0f} | {mean[3]:>7.0f} | {mean[2]:>5.2f} || "
+              f"{mean[4]:>12.1f} | {mean[5]:>6.0f} | {mean[6]:>5.2f}")
+    week = await run_db(RollupBuilder.latest, "week")
+    month = await run_db(RollupBuilder.latest, "month")
+    print(f"latest week rollup covers {week.entry_count} entries, latest finished month "
+          f"{month.entry_count if month else 0}")
+    await get_ollama_client().close()
+    await runner.cleanup()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--per-day", type=int, default=3)
+    parser.add_argument("--words", type=int, default=150, help="Mean words per raw entry")
+    parser.add_argument("--prompt-ms", type=float, default=2.0, help="Prompt evaluation per token")
+    parser.add_argument("--token-ms", type=float, default=20.0, help="Generation per token")
+    parser.add_argument("--tokens", type=int, default=60, help="Tokens generated per call")
+    args = parser.parse_args()
+    asyncio.run(main(args.days, args.per_day, args.words, args.prompt_ms, args.token_ms, args.tokens))
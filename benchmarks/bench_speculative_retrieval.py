@@ -0,0 +1,175 @@
+"""
+End-of-speech -> first LLM request for a conversation turn, with retrieval
+done three ways:
+
+    sequential    the old handle_conversation: search memories, then read the
+                  weekly summary from SQLite, one after the other
+    concurrent    KratosOrchestrator.retrieve_context (both at once, weekly
+                  summary held in memory)
+    speculative   as above, but started from UtteranceTranscriber partials while
+                  the user is still talking and reused when the final
+                  transcript matches
+
+Runs the real JournalService (hybrid retrieval over a synthetic journal in a
+temporary SQLite database and FAISS index) and the real orchestrator
+respond() path; the LLM is a stand-in that records when its request would be
+sent. The embedding model is replaced by a stand-in that takes --embed-ms per
+batch behind the real AsyncEmbeddingService queue. Utterances are replayed on
+the clock: a word every 0.3 s, a partial decode every STT_PARTIAL_INTERVAL
+taking --stt-ms, one more pass when speech stops, and the endpoint
+VAD_HANGOVER_SECONDS later. In --mismatch of the turns the user keeps talking
+after the speech-end pass, so the speculative result has to be thrown away.
+
+    python benchmarks/bench_speculative_retrieval.py --entries 20000 --turns 40
+"""
+import sys
+import argparse
+import asyncio
+import time
+import zlib
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+# Imported first: points DATABASE_URL at a temporary database
+from benchmarks.bench_hybrid_retrieval import DIM, TOPICS, _tmp, load, make_journal, unit
+import numpy as np
+from app.config import settings
+from app.agent.orchestrator import KratosOrchestrator
+from app.journal.journal_service import JournalService
+from app.memory.database import run_db
+from app.memory.models import WeeklySummary
+from app.memory.embedding_worker import AsyncEmbeddingService
+
+WORD_SECONDS = 0.3
+
+def insert_weekly_summary(db, week_start, summary_text: str):
+    db.add(WeeklySummary(week_start=week_start, summary_text=summary_text))
+    db.commit()
+
+class SlowEmbeddingModel:
+    """EmbeddingService stand-in: a fixed cost per batch, a stable vector per text."""
+
+    def __init__(self, batch_ms: float):
+        self.batch_s = batch_ms / 1000
+
+    def embed_batch(self, texts: list[str]) -> np.ndarray:
+        time.sleep(self.batch_s)
+        return np.vstack([unit(np.random.default_rng(zlib.crc32(t.encode())).standard_normal(DIM)) for t in texts])
+
+class RecordingChat:
+    """ChatSession stand-in: notes when the request would go to Ollama."""
+
+    def __init__(self):
+        self.sent_at = None
+
+    async def stream(self, user_input: str, memories: list = None, weekly_summary: str = ""):
+        self.sent_at = time.perf_counter()
+        return
+        yield
+
+class SilentTTS:
+    async def stream_sentences(self, token_generator):
+        async for _ in token_generator:
+            pass
+
+def make_turns(j: dict, n: int, mismatch: float, rng: np.random.Generator):
+    """(words heard by the speech-end pass, final transcript) per turn."""
+    turns = []
+    for _ in range(n):
+        i = int(rng.integers(len(j["texts"])))
+        words = f"What did {j['names'][j['person'][i]]} say about {TOPICS[j['topic'][i]]} on {j['dates'][i]}?".split()
+        final = " ".join(words)
+        if rng.random() < mismatch:
+            final += " And what did I do about it afterwards?"  # Talked on after the pause
+        turns.append((" ".join(words), final))
+    return turns
+
+async def sequential(orch: KratosOrchestrator, text: str):
+    """The old handle_conversation retrieval."""
+    memories = await orch.journal.search_memory_scored(text)
+    orch.journal._weekly_summary = None
+    weekly = await orch.journal.get_latest_weekly_summary()
+    await orch.tts.stream_sentences(orch.chat.stream(text, memories, weekly))
+
+async def replay_speech(orch: KratosOrchestrator, heard: str, stt_s: float):
+    """Partial passes as UtteranceTranscriber would make them; returns when speech stops."""
+    words = heard.split()
+    start = time.perf_counter()
+    passes = []
+    elapsed = settings.STT_PARTIAL_INTERVAL
+    while elapsed < len(words) * WORD_SECONDS:
+        passes.append((elapsed, " ".join(words[:int(elapsed / WORD_SECONDS)])))
+        elapsed += settings.STT_PARTIAL_INTERVAL
+    passes.append((len(words) * WORD_SECONDS, heard))  # Speech-end pass
+
+    async def decode(at: float, text: str):
+        await asyncio.sleep(max(0.0, start + at - time.perf_counter()) + stt_s)
+        stable, _, partial = text.rpartition(" ")
+        orch._speculate(stable, partial)
+
+    tasks = [asyncio.create_task(decode(at, text)) for at, text in passes]
+    await asyncio.sleep(len(words) * WORD_SECONDS)
+    return tasks
+
+async def run_turn(orch: KratosOrchestrator, method: str, heard: str, final: str, stt_s: float):
+    """Milliseconds from the endpoint to the LLM request, and whether a speculative run was reused."""
+    context = None
+    if method == "speculative":
+        tasks = await replay_speech(orch, heard, stt_s)
+        await asyncio.sleep(settings.VAD_HANGOVER_SECONDS)
+        await asyncio.gather(*tasks)
+        context = orch._claim_speculation(final)
+    else:
+        await asyncio.sleep(len(heard.split()) * WORD_SECONDS + settings.VAD_HANGOVER_SECONDS)
+    endpoint = time.perf_counter()
+    if method == "sequential":
+        await sequential(orch, final)
+    else:
+        await orch.respond(final, context)
+    return (orch.chat.sent_at - endpoint) * 1000, context is not None
+
+async def main(entries: int, turns: int, embed_ms: float, stt_ms: float, mismatch: float):
+    rng = np.random.default_rng(0)
+    j = make_journal(entries, rng)
+    store = load(j, str(Path(_tmp.name) / "faiss.index"))
+    await run_db(insert_weekly_summary, j["stamps"][0],
+                 "You trained hard and slept badly. Your temper held, mostly.")
+
+    journal = JournalService.__new__(JournalService)
+    journal.vector_store = store
+    journal.embeddings = AsyncEmbeddingService(SlowEmbeddingModel(embed_ms))
+    journal._weekly_summary = None
+    orch = KratosOrchestrator.__new__(KratosOrchestrator)
+    orch.journal, orch.chat, orch.tts = journal, RecordingChat(), SilentTTS()
+    orch._speculation = None
+
+    script = make_turns(j, turns, mismatch, rng)
+    print(f"{entries} entries, {settings.RETRIEVAL_MODE} retrieval, embed {embed_ms:g} ms, STT pass {stt_ms:g} ms, "
+          f"hangover {settings.VAD_HANGOVER_SECONDS * 1000:.0f} ms, {mismatch:.0%} of turns continue after the pause")
+    print(f"{'method':<12} | {'mean ms':>7} | {'p50 ms':>7} | {'p95 ms':>7} | {'reused':>6}")
+    baseline = None
+    for method in ("sequential", "concurrent", "speculative"):
+        timings, reused = [], 0
+        for heard, final in script:
+            ms, hit = await run_turn(orch, method, heard, final, stt_ms / 1000)
+            timings.append(ms)
+            reused += hit
+        mean = np.mean(timings)
+        baseline = baseline or mean
+        print(f"{method:<12} | {mean:>7.1f} | {np.percentile(timings, 50):>7.1f} | {np.percentile(timings, 95):>7.1f} | "
+              f"{reused if method == 'speculative' else '-':>6}   saves {baseline - mean:.1f} ms")
+    journal.embeddings.close()
+    store.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=20_000)
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--embed-ms", type=float, default=15.0, help="Embedding model time per batch")
+    parser.add_argument("--stt-ms", type=float, default=150.0, help="Whisper time per partial pass")
+    parser.add_argument("--mismatch", type=float, default=0.1)
+    args = parser.parse_args()
+    asyncio.run(main(args.entries, args.turns, args.embed_ms, args.stt_ms, args.mismatch))
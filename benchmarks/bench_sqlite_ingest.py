@@ -0,0 +1,96 @@
+"""
+Journal ingest rate and ordered-lookup latency on SQLite.
+
+Runs against a throwaway database: per-row commits (the add_entry path) versus
+one-transaction bulk inserts (add_entries_bulk), then the latest weekly summary
+and most-recent-entries lookups with and without their ordering indexes.
+
+    python benchmarks/bench_sqlite_ingest.py --entries 200000
+"""
+import sys
+import os
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_tmp.name) / 'bench.db'}"
+
+import numpy as np
+from sqlalchemy import text
+from app.memory.database import SessionLocal, engine, init_db
+from app.memory.models import JournalEntry, WeeklySummary
+from app.journal.journal_service import JournalService
+
+BULK_BATCH = 5_000
+
+def insert_entry(db, text: str):
+    """One entry in its own transaction, as add_entry commits it."""
+    db.add(JournalEntry(raw_text=text))
+    db.commit()
+
+def ingest(entries: int, per_row_sample: int):
+    db = SessionLocal()
+    start = time.perf_counter()
+    for i in range(per_row_sample):
+        insert_entry(db, f"Per-row entry {i}: trained, ate, slept.")
+    per_row = per_row_sample / (time.perf_counter() - start)
+
+    base = datetime(2020, 1, 1)
+    start = time.perf_counter()
+    for offset in range(0, entries, BULK_BATCH):
+        n = min(BULK_BATCH, entries - offset)
+        texts = [f"Bulk entry {offset + i}: trained, ate, slept." for i in range(n)]
+        stamps = [base + timedelta(minutes=offset + i) for i in range(n)]
+        JournalService._insert_entries(db, texts, stamps)
+    bulk = entries / (time.perf_counter() - start)
+
+    weeks = [WeeklySummary(week_start=base + timedelta(days=i), summary_text=f"Week {i}",
+                           created_at=base + timedelta(hours=i)) for i in range(entries)]
+    db.add_all(weeks)
+    db.commit()
+    db.close()
+    print(f"ingest per-row commit : {per_row:>10.0f} entries/s")
+    print(f"ingest bulk ({BULK_BATCH}/txn): {bulk:>10.0f} entries/s")
+
+def recent_entries(db, limit: int) -> list[JournalEntry]:
+    return db.query(JournalEntry).order_by(JournalEntry.timestamp.desc()).limit(limit).all()
+
+def time_lookups(label: str, repeats: int):
+    db = SessionLocal()
+    for name, fn in (("latest weekly summary", JournalService._latest_weekly_summary),
+                     ("25 most recent entries", lambda s: recent_entries(s, 25))):
+        timings = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            fn(db)
+            timings.append((time.perf_counter() - t0) * 1000)
+        print(f"{name:<24} {label:<12} p50 {np.percentile(timings, 50):>8.3f} ms")
+    db.close()
+
+def run(entries: int, per_row_sample: int, repeats: int):
+    init_db()
+    ingest(entries, per_row_sample)
+    time_lookups("(indexed)", repeats)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_journal_entries_timestamp"))
+        conn.execute(text("DROP INDEX ix_weekly_summaries_created_at"))
+    time_lookups("(no index)", repeats)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--per-row-sample", type=int, default=2_000, help="Entries timed on the per-row commit path")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+    try:
+        run(args.entries, args.per_row_sample, args.repeats)
+    finally:
+        engine.dispose()
+        _tmp.cleanup()
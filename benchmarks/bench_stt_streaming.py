@@ -0,0 +1,92 @@
+"""
+End-of-speech-to-text latency: one decode after the endpoint (old path) versus
+UtteranceTranscriber decoding while the utterance is replayed.
+
+Each WAV (mono; resampled to SAMPLE_RATE if needed) is played back in real
+time in CHUNK_SIZE blocks, with SILENCE_DURATION of trailing silence, and the
+same RMS silence test the microphone stream uses. Latency is measured from
+the endpoint (the moment the orchestrator would start transcribing) to the
+final text, and from the end of speech to the final text.
+
+    python benchmarks/bench_stt_streaming.py path/to/utterances/*.wav
+"""
+import sys
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+import numpy as np
+import soundfile as sf
+from app.config import settings
+
+def load_wav(path: Path) -> np.ndarray:
+    audio, rate = sf.read(str(path), dtype="float32", always_2d=True)
+    audio = audio.mean(axis=1)
+    if rate != settings.SAMPLE_RATE:
+        positions = np.arange(0, len(audio), rate / settings.SAMPLE_RATE)
+        audio = np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+    return audio
+
+async def replay(audio: np.ndarray, on_chunk):
+    """Feed chunks at real-time pace; returns (speech end, endpoint) wall-clock times."""
+    padded = np.concatenate([audio, np.zeros(int(settings.SILENCE_DURATION * settings.SAMPLE_RATE) + settings.CHUNK_SIZE, np.float32)])
+    chunk_seconds = settings.CHUNK_SIZE / settings.SAMPLE_RATE
+    start = time.perf_counter()
+    silence, speech_end = 0.0, None
+    for i, offset in enumerate(range(0, len(padded), settings.CHUNK_SIZE)):
+        chunk = padded[offset:offset + settings.CHUNK_SIZE].reshape(-1, 1)
+        await asyncio.sleep(max(0.0, start + (i + 1) * chunk_seconds - time.perf_counter()))
+        is_silent = float(np.sqrt(np.mean(chunk ** 2))) < settings.SILENCE_THRESHOLD
+        silence = silence + chunk_seconds if is_silent else 0.0
+        if is_silent and speech_end is None:
+            speech_end = time.perf_counter()
+        elif not is_silent:
+            speech_end = None
+        on_chunk(chunk, is_silent)
+        if silence >= settings.SILENCE_DURATION:
+            return speech_end or time.perf_counter(), time.perf_counter()
+    return speech_end or time.perf_counter(), time.perf_counter()
+
+async def run(paths: list[Path]):
+    from app.voice.stt_stream import get_stt_service, UtteranceTranscriber
+    from app.voice.ring_buffer import AudioRingBuffer
+    stt = get_stt_service()
+    await stt.transcribe_chunk(np.zeros(settings.SAMPLE_RATE, np.float32))  # Warm up
+
+    rows = []
+    print(f"{'file':<28} | {'mode':>9} | {'endpoint->text ms':>17} | {'speech end->text ms':>19} | text")
+    for path in paths:
+        audio = load_wav(path)
+        for mode in ("batch", "streaming"):
+            ring = AudioRingBuffer(len(audio) + 2 * settings.SAMPLE_RATE * int(settings.SILENCE_DURATION + 1))
+            utterance = UtteranceTranscriber(stt)
+
+            def on_chunk(chunk, is_silent):
+                ring.write(chunk.ravel())
+                if mode == "streaming":
+                    utterance.push(ring.view(0), is_silent)
+
+            speech_end, endpoint = await replay(audio, on_chunk)
+            if mode == "batch":
+                text = await stt.transcribe_chunk(ring.view(0))
+            else:
+                text = await utterance.finalize(ring.view(0))
+            done = time.perf_counter()
+            rows.append((mode, (done - endpoint) * 1000, (done - speech_end) * 1000))
+            print(f"{path.name[:28]:<28} | {mode:>9} | {rows[-1][1]:>17.0f} | {rows[-1][2]:>19.0f} | {text[:50]}")
+
+    for mode in ("batch", "streaming"):
+        endpoint_ms = [r[1] for r in rows if r[0] == mode]
+        print(f"{mode:>9}: endpoint->text p50 {np.percentile(endpoint_ms, 50):.0f} ms, "
+              f"p90 {np.percentile(endpoint_ms, 90):.0f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("wavs", nargs="+", type=Path)
+    args = parser.parse_args()
+    asyncio.run(run(args.wavs))
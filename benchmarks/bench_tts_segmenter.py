@@ -0,0 +1,198 @@
+"""
+Time-to-first-audio of the LLM -> TTS sentence split on recorded token streams:
+the old regex loop (re-scans the buffer, releases one sentence per token)
+versus SentenceSegmenter with and without the first-chunk-early rule.
+
+A recording is a JSONL file per reply, one {"t": seconds since the request,
+"token": "..."} line per streamed chunk. --record captures them from a live
+Ollama (OLLAMA_URL); --make-fixtures writes synthetic ones (Kratos-style
+replies cut into BPE-sized pieces at a steady decode rate, some with decimals
+and abbreviations; a few chunks carry several tokens, as when the reader
+falls behind a burst). Replay is offline: a chunk is "ready" at the timestamp of
+the token that completed it, so TTFA here excludes the engine's own synthesis
+latency, which is the same for every method. Per method it reports:
+
+    first ms     mean time the first chunk is handed to TTS
+    first chars  its mean length (shorter chunks also synthesize sooner)
+    lag ms       mean time a sentence waits after its text is complete
+    bad splits   chunks ending inside a decimal or after an abbreviation
+
+    python benchmarks/bench_tts_segmenter.py --make-fixtures /tmp/token_streams
+    python benchmarks/bench_tts_segmenter.py --record /tmp/token_streams --replies 10
+    python benchmarks/bench_tts_segmenter.py /tmp/token_streams
+"""
+import sys
+import argparse
+import asyncio
+import json
+import re
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+import numpy as np
+from app.config import settings
+from app.voice.segmenter import SentenceSegmenter, ABBREVIATIONS
+
+PROMPTS = [
+    "I failed again today. How do I keep going?",
+    "My father said I would amount to nothing.",
+    "I ran 3.5 miles this morning and my legs are done.",
+    "Dr. Smith says I need to rest for two weeks.",
+    "Should I forgive my brother?",
+    "I want to give up.",
+]
+
+REPLIES = [
+    "Failure is not the end, boy. It is the forge. Rise, and strike again.",
+    "Your father's words are not your fate, and you will not carry them forever. Prove him wrong with your hands. Then forget him.",
+    "Good. 3.5 miles today, 4.5 tomorrow. Pain is a teacher, and you are still its student. Eat, sleep, return.",
+    "Dr. Smith is wise to warn you, though warriors rarely listen. Rest. A blade that is never sheathed grows dull.",
+    "Forgiveness is a burden I carried for a long time, and it nearly broke me. Speak with him. See if he has changed. Then decide.",
+    "Enough. Stand. Breathe. Now fight, and do not look back.",
+    "Listen. The gods are dead. What remains is choice, and the choice is yours: stand, or kneel.",
+]
+
+def legacy_split(tokens):
+    """The old stream_sentences loop: yields (token index, sentence)."""
+    regex = re.compile(r'[^.!?]+[.!?]')
+    buffer = ""
+    for k, token in enumerate(tokens):
+        buffer += token
+        match = regex.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            if match.group(0).strip():
+                yield k, match.group(0).strip()
+    if buffer.strip():
+        yield len(tokens) - 1, buffer.strip()
+
+def segmenter_split(tokens, early: bool):
+    segmenter = SentenceSegmenter(first_chunk_early=early)
+    for k, token in enumerate(tokens):
+        for chunk in segmenter.feed(token):
+            yield k, chunk
+    tail = segmenter.flush()
+    if tail:
+        yield len(tokens) - 1, tail
+
+def bad_split(text: str, end: int) -> bool:
+    """A split at `end` falls inside a number ("3.|5") or right after an abbreviation ("Dr.|")."""
+    if end < len(text) and text[end - 1] in ".," and text[end - 2:end - 1].isdigit() and text[end].isdigit():
+        return True
+    words = text[:end].split()
+    return text[end - 1] == "." and bool(words) and words[-1][:-1].lower() in ABBREVIATIONS
+
+def evaluate(streams, method):
+    first_ms, first_chars, lags, bad = [], [], [], 0
+    for tokens, times in streams:
+        chunks = list(method(tokens))
+        first_ms.append(times[chunks[0][0]] * 1000)
+        first_chars.append(len(chunks[0][1]))
+
+        # Where each chunk ends in the reply text, and when it was released
+        text = "".join(tokens)
+        released, consumed = [], 0
+        for k, chunk in chunks:
+            consumed = text.index(chunk, consumed) + len(chunk)
+            released.append((consumed, times[k]))
+            bad += bad_split(text, consumed)
+
+        # Lag: a sentence is complete once its terminator has streamed, and
+        # released by the first chunk that reaches its end
+        ends = [m.end() for m in re.finditer(r"[.!?](?=\s|$)", text) if not bad_split(text, m.end())]
+        for end in ends:
+            complete_at = times[_token_at(tokens, end)]
+            release = next(t for pos, t in released if pos >= end)
+            lags.append((release - complete_at) * 1000)
+    return np.mean(first_ms), np.mean(first_chars), np.mean(lags), bad
+
+def _token_at(tokens, char_end):
+    """Index of the token whose text contains the character just before `char_end`."""
+    n = 0
+    for k, token in enumerate(tokens):
+        n += len(token)
+        if n >= char_end:
+            return k
+    return len(tokens) - 1
+
+def load_streams(directory: Path):
+    streams = []
+    for path in sorted(directory.glob("*.jsonl")):
+        rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+        streams.append(([r["token"] for r in rows], [r["t"] for r in rows]))
+    return streams
+
+def make_fixtures(out_dir: Path, seed: int = 0, token_ms: float = 35, ttft_ms: float = 250, coalesce: float = 0.25):
+    rng = np.random.default_rng(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for i, reply in enumerate(REPLIES):
+        tokens = []
+        for piece in re.findall(r"\s*\w+|\s*[^\w\s]+", reply):
+            # Long words are split into sub-word pieces like a BPE vocabulary would
+            while len(piece.strip()) > 6:
+                cut = int(rng.integers(3, 6)) + (len(piece) - len(piece.lstrip()))
+                tokens.append(piece[:cut])
+                piece = piece[cut:]
+            tokens.append(piece)
+        for k in range(len(tokens) - 1, 0, -1):
+            if rng.random() < coalesce:
+                tokens[k - 1:k + 1] = [tokens[k - 1] + tokens[k]]
+        t = ttft_ms / 1000
+        with open(out_dir / f"reply_{i:02d}.jsonl", "w", encoding="utf-8") as f:
+            for token in tokens:
+                f.write(json.dumps({"t": round(t, 4), "token": token}) + "\n")
+                t += rng.gamma(4, token_ms / 4) / 1000
+    print(f"Wrote {len(REPLIES)} token streams to {out_dir}")
+
+async def record(out_dir: Path, replies: int):
+    from app.llm.ollama_client import get_ollama_client
+    from app.llm.prompt_builder import build_prompt
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    client = get_ollama_client()
+    try:
+        for i in range(replies):
+            payload = {"model": settings.OLLAMA_MODEL, "prompt": build_prompt(PROMPTS[i % len(PROMPTS)]),
+                       "options": {"temperature": settings.TEMPERATURE, "num_predict": settings.MAX_TOKENS}}
+            start = time.perf_counter()
+            with open(out_dir / f"recorded_{i:02d}.jsonl", "w", encoding="utf-8") as f:
+                async for data in client.stream(payload):
+                    if data.get("response"):
+                        f.write(json.dumps({"t": round(time.perf_counter() - start, 4),
+                                            "token": data["response"]}) + "\n")
+    finally:
+        await client.close()
+    print(f"Recorded {replies} replies to {out_dir}")
+
+def main(directory: Path):
+    streams = load_streams(directory)
+    if not streams:
+        sys.exit(f"No *.jsonl token streams in {directory}")
+    methods = {
+        "regex (old)": legacy_split,
+        "segmenter": lambda tokens: segmenter_split(tokens, early=False),
+        "segmenter + early": lambda tokens: segmenter_split(tokens, early=True),
+    }
+    print(f"{len(streams)} streams; first-chunk-early min chars = {settings.TTS_FIRST_CHUNK_MIN_CHARS}")
+    print(f"{'method':<18} | {'first ms':>8} | {'first chars':>11} | {'lag ms':>7} | {'bad splits':>10}")
+    for name, method in methods.items():
+        first_ms, first_chars, lag, bad = evaluate(streams, method)
+        print(f"{name:<18} | {first_ms:>8.0f} | {first_chars:>11.0f} | {lag:>7.1f} | {bad:>10}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("streams", nargs="?", type=Path, help="Directory of recorded *.jsonl token streams")
+    parser.add_argument("--make-fixtures", type=Path, metavar="DIR")
+    parser.add_argument("--record", type=Path, metavar="DIR")
+    parser.add_argument("--replies", type=int, default=10)
+    args = parser.parse_args()
+    if args.make_fixtures:
+        make_fixtures(args.make_fixtures)
+    elif args.record:
+        asyncio.run(record(args.record, args.replies))
+    else:
+        main(args.streams)
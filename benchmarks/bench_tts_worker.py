@@ -0,0 +1,73 @@
+"""
+Per-sentence TTS overhead: a fresh pyttsx3 engine + voice lookup per sentence
+(the old StreamingTTS._speak) versus the persistent StreamingTTS worker.
+
+For each path, reports the wall time per sentence and, for the old path, the
+part spent in init + voice enumeration alone. Needs a real speech driver
+(sapi5, nsss or espeak); pyttsx3's dummy driver hangs on a reused engine.
+
+    python benchmarks/bench_tts_worker.py --sentences 10
+    python benchmarks/bench_tts_worker.py --driver espeak
+"""
+import sys
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+import numpy as np
+import pyttsx3
+from app.config import settings
+
+SENTENCES = [f"Sentence {i}. Stand firm." for i in range(100)]
+
+def old_speak(text: str, setup_times: list):
+    t0 = time.perf_counter()
+    engine = pyttsx3.init(settings.TTS_DRIVER or None)
+    engine.setProperty('rate', settings.TTS_RATE)
+    engine.setProperty('volume', settings.TTS_VOLUME)
+    for voice in engine.getProperty('voices'):
+        if "male" in voice.name.lower() or "david" in voice.name.lower():
+            engine.setProperty('voice', voice.id)
+            break
+    setup_times.append(time.perf_counter() - t0)
+    engine.say(text)
+    engine.runAndWait()
+
+async def main(sentences: int):
+    from app.voice.tts_stream import StreamingTTS
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    loop = asyncio.get_running_loop()
+    setup_times, old_times = [], []
+    for text in SENTENCES[:sentences]:
+        t0 = time.perf_counter()
+        await loop.run_in_executor(executor, old_speak, text, setup_times)
+        old_times.append(time.perf_counter() - t0)
+
+    tts = StreamingTTS()
+    tts.wait_until_ready()
+    new_times = []
+    for text in SENTENCES[:sentences]:
+        t0 = time.perf_counter()
+        await tts.speak_sentence(text)
+        new_times.append(time.perf_counter() - t0)
+    tts.close()
+
+    print(f"{'path':>10} | {'ms/sentence p50':>15} | {'init+voice ms p50':>17}")
+    print(f"{'per-call':>10} | {np.median(old_times) * 1000:>15.1f} | {np.median(setup_times) * 1000:>17.1f}")
+    print(f"{'worker':>10} | {np.median(new_times) * 1000:>15.1f} | {0.0:>17.1f}")
+    print(f"overhead removed per sentence: {(np.median(old_times) - np.median(new_times)) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=10)
+    parser.add_argument("--driver", default=settings.TTS_DRIVER, help="pyttsx3 driver (e.g. sapi5, nsss, espeak)")
+    args = parser.parse_args()
+    settings.TTS_DRIVER = args.driver
+    asyncio.run(main(args.sentences))
@@ -0,0 +1,148 @@
+"""
+Replay labelled WAV fixtures through each VAD backend and the Endpointer.
+
+Fixtures are mono WAVs with a sidecar JSON (`<name>.json`) holding the labelled
+utterance spans: {"speech": [[start_s, end_s], ...]}; short pauses inside an
+utterance belong to it. Per backend it reports:
+
+    detected     labelled utterances overlapped by a detected one
+    delay        endpoint time ("end" event) minus the labelled end of speech
+    cut-offs     "end" events fired while a labelled utterance was still going
+    false/min    detected utterances that overlap no labelled speech, per minute
+
+--make-fixtures writes a synthetic set (harmonic "voiced" bursts with
+syllable-rate modulation and intra-utterance pauses over quiet, moderate, loud
+and rising noise beds, plus clicks) for when no recorded set is at hand.
+
+    python benchmarks/bench_vad_replay.py --make-fixtures /tmp/vad_fixtures
+    python benchmarks/bench_vad_replay.py /tmp/vad_fixtures
+"""
+import sys
+import argparse
+import json
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+import numpy as np
+import soundfile as sf
+from app.config import settings
+from app.voice.vad import Endpointer, create_vad
+
+SR = 16000
+
+def voiced(seconds: float, rng: np.random.Generator, level_db: float) -> np.ndarray:
+    t = np.arange(int(seconds * SR)) / SR
+    f0 = rng.uniform(95, 180) * (1 + 0.05 * np.sin(2 * np.pi * 0.7 * t))
+    phase = 2 * np.pi * np.cumsum(f0) / SR
+    signal = sum(np.sin(k * phase) / k for k in range(1, 12))
+    syllables = 0.55 + 0.45 * np.sin(2 * np.pi * rng.uniform(3.5, 5.5) * t) ** 2
+    signal = signal * syllables
+    return (signal / np.sqrt(np.mean(signal ** 2)) * 10 ** (level_db / 20)).astype(np.float32)
+
+def make_fixtures(out_dir: Path, count: int = 12, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    beds = [("quiet", -60.0), ("moderate", -45.0), ("loud", -32.0), ("rising", None)]
+    for i in range(count):
+        name, noise_db = beds[i % len(beds)]
+        duration = rng.uniform(14, 20)
+        n = int(duration * SR)
+        if noise_db is None:
+            # Fan switching on: -60 dBFS ramping to -35 dBFS over a few seconds
+            ramp = np.clip((np.arange(n) / SR - 4) / 3, 0, 1)
+            noise_level = 10 ** ((-60 + 25 * ramp) / 20)
+        else:
+            noise_level = 10 ** (noise_db / 20)
+        audio = (rng.standard_normal(n) * noise_level).astype(np.float32)
+
+        labels, cursor = [], rng.uniform(1.0, 2.0)
+        while cursor < duration - 4:
+            start = cursor
+            for _ in range(rng.integers(1, 4)):  # Phrases separated by short pauses
+                length = rng.uniform(0.6, 2.0)
+                s = int(cursor * SR)
+                burst = voiced(length, rng, rng.uniform(-26, -18))
+                audio[s:s + len(burst)] += burst[:n - s]
+                cursor += length + rng.uniform(0.15, 0.35)
+            labels.append([round(start, 3), round(cursor - 0.25, 3)])
+            cursor += rng.uniform(2.0, 4.0)
+        for _ in range(3):  # Desk knocks / clicks
+            s = int(rng.uniform(0, duration - 0.1) * SR)
+            audio[s:s + 80] += rng.standard_normal(80).astype(np.float32) * 0.3
+
+        stem = f"{i:02d}_{name}"
+        sf.write(str(out_dir / f"{stem}.wav"), np.clip(audio, -1, 1), SR)
+        with open(out_dir / f"{stem}.json", "w") as f:
+            json.dump({"speech": labels}, f)
+    print(f"Wrote {count} fixtures to {out_dir}")
+
+def replay(audio: np.ndarray, backend: str) -> list[tuple[float, float]]:
+    """Detected utterances as (start_s, endpoint_event_s)."""
+    vad = create_vad(backend)
+    hangover = settings.SILENCE_DURATION if backend == "rms" else settings.VAD_HANGOVER_SECONDS
+    endpointer = Endpointer(hangover_seconds=hangover)
+    detected, start = [], None
+    for offset in range(0, len(audio) - settings.CHUNK_SIZE + 1, settings.CHUNK_SIZE):
+        chunk = audio[offset:offset + settings.CHUNK_SIZE]
+        position = offset + len(chunk)
+        event = endpointer.update(vad.is_speech(chunk), position, len(chunk))
+        if event == "start":
+            start = endpointer.start_position / SR
+        elif event == "end":
+            detected.append((start, position / SR))
+    if endpointer.in_utterance:
+        detected.append((start, len(audio) / SR))
+    return detected
+
+def score(detected, labels):
+    delays, cutoffs, false_triggers, hit = [], 0, 0, set()
+    for start, end in detected:
+        overlapping = [i for i, (s, e) in enumerate(labels) if start < e and end > s]
+        if not overlapping:
+            false_triggers += 1
+            continue
+        hit.update(overlapping)
+        for i in overlapping:
+            s, e = labels[i]
+            if end < e:
+                cutoffs += 1
+        s, e = labels[overlapping[-1]]
+        if end >= e:
+            delays.append(end - e)
+    return delays, cutoffs, false_triggers, len(hit)
+
+def run(fixture_dir: Path, backends: list[str]):
+    fixtures = sorted(fixture_dir.glob("*.wav"))
+    print(f"{'backend':>8} | {'detected':>9} | {'delay p50 ms':>12} | {'delay p90 ms':>12} | {'cut-offs':>8} | {'false/min':>9}")
+    for backend in backends:
+        delays, cutoffs, false_triggers, hits, labelled, minutes = [], 0, 0, 0, 0, 0.0
+        for wav in fixtures:
+            audio, rate = sf.read(str(wav), dtype="float32")
+            assert rate == SR, f"{wav.name}: expected {SR} Hz"
+            with open(wav.with_suffix(".json")) as f:
+                labels = json.load(f)["speech"]
+            d, c, ft, h = score(replay(audio, backend), labels)
+            delays += d
+            cutoffs += c
+            false_triggers += ft
+            hits += h
+            labelled += len(labels)
+            minutes += len(audio) / SR / 60
+        p50, p90 = (np.percentile(delays, [50, 90]) * 1000) if delays else (float("nan"),) * 2
+        print(f"{backend:>8} | {hits:>4}/{labelled:<4} | {p50:>12.0f} | {p90:>12.0f} | {cutoffs:>8} | {false_triggers / minutes:>9.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fixtures", type=Path, nargs="?")
+    parser.add_argument("--make-fixtures", type=Path, help="Write a synthetic labelled fixture set here and exit")
+    parser.add_argument("--backends", default="rms,energy,silero")
+    args = parser.parse_args()
+    if args.make_fixtures:
+        make_fixtures(args.make_fixtures)
+    else:
+        backends = [b for b in args.backends.split(",")
+                    if b != "silero" or Path(settings.VAD_SILERO_MODEL).exists()]
+        run(args.fixtures, backends)
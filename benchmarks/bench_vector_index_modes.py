@@ -0,0 +1,75 @@
+"""
+Recall@k versus search latency for each VectorStore index mode.
+
+Builds every mode over the same synthetic clustered corpus (unit-normalised,
+like MiniLM embeddings) and compares single-query searches against exact
+results from the flat index.
+
+    python benchmarks/bench_vector_index_modes.py --entries 1000000 --queries 500
+"""
+import sys
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+import numpy as np
+from app.config import settings
+from app.memory.vector_store import VectorStore, INDEX_MODES
+
+DIM = 384
+BUILD_BATCH = 50_000
+
+def make_corpus(entries: int, queries: int, clusters: int = 256) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((clusters, DIM), dtype=np.float32)
+    data = centers[rng.integers(0, clusters, entries + queries)]
+    data += 0.6 * rng.standard_normal(data.shape, dtype=np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    return data[:entries], data[entries:]
+
+def build(mode: str, corpus: np.ndarray, path: str) -> tuple[VectorStore, float]:
+    settings.VECTOR_INDEX_MODE = mode
+    start = time.perf_counter()
+    store = VectorStore(DIM, index_path=path)
+    for offset in range(0, len(corpus), BUILD_BATCH):
+        chunk = corpus[offset:offset + BUILD_BATCH]
+        store.add_batch(list(range(offset, offset + len(chunk))), chunk)
+    store.save()
+    return store, time.perf_counter() - start
+
+def run(entries: int, queries: int, k: int):
+    corpus, query_set = make_corpus(entries, queries)
+    settings.VECTOR_INDEX_TRAIN_THRESHOLD = min(settings.VECTOR_INDEX_TRAIN_THRESHOLD, entries)
+
+    truth = None
+    print(f"{entries} entries, {queries} queries, k={k}")
+    print(f"{'mode':>9} | {'build s':>8} | {'recall@k':>8} | {'p50 ms':>7} | {'p99 ms':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in INDEX_MODES:
+            store, build_time = build(mode, corpus, str(Path(tmp) / f"{mode}.index"))
+
+            results = []
+            timings = np.empty(queries)
+            for i, query in enumerate(query_set):
+                t0 = time.perf_counter()
+                results.append(store.search(query, k))
+                timings[i] = (time.perf_counter() - t0) * 1000
+
+            if truth is None:
+                truth = [set(r) for r in results]
+            recall = np.mean([len(truth[i] & set(r)) / k for i, r in enumerate(results)])
+            print(f"{mode:>9} | {build_time:>8.2f} | {recall:>8.3f} | "
+                  f"{np.percentile(timings, 50):>7.3f} | {np.percentile(timings, 99):>7.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+    run(args.entries, args.queries, args.k)
@@ -0,0 +1,89 @@
+"""
+Resident memory of VectorStore for each storage mode, with and without mmap.
+
+Builds one snapshot per storage mode, then loads it in a fresh interpreter and
+reports RSS after load and after a round of searches (mmap pages fault in on
+demand, so the second number is the realistic steady state).
+
+    python benchmarks/bench_vector_storage_rss.py --entries 1000000
+"""
+import sys
+import argparse
+import json
+import subprocess
+import tempfile
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+import numpy as np
+from app.config import settings
+from app.memory.vector_store import VectorStore, STORAGE_MODES
+
+DIM = 384
+BUILD_BATCH = 50_000
+
+def rss_mb() -> float:
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    return float("nan")
+
+def build(storage: str, entries: int, path: str):
+    settings.VECTOR_STORAGE = storage
+    settings.VECTOR_INDEX_TRAIN_THRESHOLD = min(settings.VECTOR_INDEX_TRAIN_THRESHOLD, entries)
+    rng = np.random.default_rng(0)
+    store = VectorStore(DIM, index_path=path)
+    for offset in range(0, entries, BUILD_BATCH):
+        n = min(BUILD_BATCH, entries - offset)
+        store.add_batch(list(range(offset, offset + n)), rng.standard_normal((n, DIM), dtype=np.float32))
+    store.save()
+    store.close()  # Releases the index lock for the child processes
+
+def measure(storage: str, mmap: bool, path: str, queries: int):
+    """Runs in a child process so each measurement starts from a clean heap."""
+    settings.VECTOR_STORAGE = storage
+    settings.VECTOR_MMAP = mmap
+    baseline = rss_mb()
+    store = VectorStore(DIM, index_path=path)
+    loaded = rss_mb()
+    rng = np.random.default_rng(1)
+    for query in rng.standard_normal((queries, DIM), dtype=np.float32):
+        store.search(query, 5)
+    searched = rss_mb()
+    print(json.dumps({"load": loaded - baseline, "search": searched - baseline}))
+
+def run(entries: int, queries: int):
+    print(f"{entries} entries, {queries} queries")
+    print(f"{'storage':>8} | {'mmap':>5} | {'file MB':>8} | {'RSS load MB':>11} | {'RSS search MB':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for storage in STORAGE_MODES:
+            path = str(Path(tmp) / f"{storage}.index")
+            build(storage, entries, path)
+            file_mb = Path(path).stat().st_size / 2**20
+            for mmap in (False, True):
+                out = subprocess.run(
+                    [sys.executable, __file__, "--child", storage, str(int(mmap)), path, str(queries)],
+                    check=True, capture_output=True, text=True,
+                ).stdout.strip().splitlines()[-1]
+                result = json.loads(out)
+                print(f"{storage:>8} | {str(mmap):>5} | {file_mb:>8.1f} | "
+                      f"{result['load']:>11.1f} | {result['search']:>13.1f}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        measure(sys.argv[2], bool(int(sys.argv[3])), sys.argv[4], int(sys.argv[5]))
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    run(args.entries, args.queries)
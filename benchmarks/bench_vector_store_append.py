@@ -0,0 +1,65 @@
+"""
+Add latency of VectorStore as the journal grows.
+
+Prefills a store in a temp directory to each checkpoint size, then times single
+`add` calls (including their share of segment-log flushes). With the append-only
+log the per-add cost should stay flat; `--legacy` also times the old behaviour of
+rewriting the whole snapshot on every add.
+
+    python benchmarks/bench_vector_store_append.py --sizes 1000 10000 100000 1000000
+"""
+import sys
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+import numpy as np
+from app.memory.vector_store import VectorStore
+
+DIM = 384
+PREFILL_BATCH = 50_000
+
+def time_adds(store: VectorStore, start_id: int, samples: int, legacy: bool) -> np.ndarray:
+    rng = np.random.default_rng(start_id)
+    vectors = rng.standard_normal((samples, DIM), dtype=np.float32)
+    timings = np.empty(samples)
+    for i in range(samples):
+        t0 = time.perf_counter()
+        store.add(start_id + i, vectors[i])
+        if legacy:
+            store.save()
+        timings[i] = time.perf_counter() - t0
+    store.flush()
+    return timings * 1000
+
+def run(sizes: list[int], samples: int, legacy: bool):
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VectorStore(DIM, index_path=str(Path(tmp) / "bench.index"))
+        filled = 0
+        print(f"{'entries':>10} | {'mode':>7} | {'mean ms':>8} | {'p50 ms':>7} | {'p99 ms':>7}")
+        for size in sorted(sizes):
+            while filled < size:
+                n = min(PREFILL_BATCH, size - filled)
+                store.add_batch(list(range(filled, filled + n)), rng.standard_normal((n, DIM), dtype=np.float32))
+                filled += n
+            store.save()
+
+            modes = ["append"] + (["legacy"] if legacy else [])
+            for m, mode in enumerate(modes):
+                timings = time_adds(store, 10_000_000 * (m + 1) + filled, samples, mode == "legacy")
+                print(f"{size:>10} | {mode:>7} | {timings.mean():>8.3f} | "
+                      f"{np.percentile(timings, 50):>7.3f} | {np.percentile(timings, 99):>7.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--samples", type=int, default=500, help="Timed adds per checkpoint")
+    parser.add_argument("--legacy", action="store_true", help="Also time a full snapshot per add")
+    args = parser.parse_args()
+    run(args.sizes, args.samples, args.legacy)
@@ -0,0 +1,102 @@
+"""
+Latency and WER of Whisper decoding: the old fixed options (beam_size=5, no
+language pin, no VAD filter) versus the per-utterance decoding profiles, on
+CPU int8.
+
+Fixtures are mono WAVs with a sidecar `<name>.txt` reference transcript; mix
+short commands ("log this", "stop") with longer dictation. Rows are grouped
+by the profile each clip falls into.
+
+    python benchmarks/bench_whisper_profiles.py path/to/fixtures --repeats 3
+    python benchmarks/bench_whisper_profiles.py path/to/fixtures --fast-model base.en
+"""
+import sys
+import argparse
+import re
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+import numpy as np
+import soundfile as sf
+from app.config import settings
+
+def normalize(text: str) -> list[str]:
+    return re.sub(r"[^a-z0-9' ]+", " ", text.lower()).split()
+
+def word_errors(reference: list[str], hypothesis: list[str]) -> int:
+    """Word-level Levenshtein distance."""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1]
+
+def load_fixtures(fixture_dir: Path):
+    fixtures = []
+    for wav in sorted(fixture_dir.glob("*.wav")):
+        audio, rate = sf.read(str(wav), dtype="float32", always_2d=True)
+        audio = audio.mean(axis=1)
+        if rate != settings.SAMPLE_RATE:
+            positions = np.arange(0, len(audio), rate / settings.SAMPLE_RATE)
+            audio = np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+        fixtures.append((wav.stem, audio, wav.with_suffix(".txt").read_text(encoding="utf-8")))
+    return fixtures
+
+def run(fixture_dir: Path, repeats: int, fast_model: str, language: str):
+    settings.WHISPER_DEVICE = "cpu"
+    settings.WHISPER_COMPUTE_TYPE = "int8"
+    settings.WHISPER_FAST_MODEL = fast_model
+    settings.WHISPER_LANGUAGE = language
+    from app.voice.stt_stream import decoding_profile, StreamingTranscriber
+
+    stt = StreamingTranscriber()
+    baseline = stt.model
+    fixtures = load_fixtures(fixture_dir)
+
+    def decode(model, audio, options):
+        segments, _ = model.transcribe(audio, **options)
+        return "".join(s.text for s in segments)
+
+    results = {}
+    for name, audio, reference in fixtures:
+        seconds = len(audio) / settings.SAMPLE_RATE
+        profile, options = decoding_profile(seconds)
+        model = stt._model_for(seconds)
+        for mode, run_model, run_options in (("baseline", baseline, {"beam_size": 5}),
+                                             ("profiles", model, options)):
+            decode(run_model, audio, run_options)  # Warm up this model/shape
+            timings = []
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                text = decode(run_model, audio, run_options)
+                timings.append(time.perf_counter() - t0)
+            ref_words = normalize(reference)
+            stats = results.setdefault((profile, mode), {"ms": [], "errors": 0, "words": 0, "rtf": []})
+            stats["ms"].append(np.median(timings) * 1000)
+            stats["rtf"].append(np.median(timings) / seconds)
+            stats["errors"] += word_errors(ref_words, normalize(text))
+            stats["words"] += len(ref_words)
+
+    print(f"{'profile':>8} | {'mode':>9} | {'clips':>5} | {'p50 ms':>8} | {'RTF':>6} | {'WER':>6}")
+    for profile in ("short", "medium", "long"):
+        for mode in ("baseline", "profiles"):
+            stats = results.get((profile, mode))
+            if not stats:
+                continue
+            print(f"{profile:>8} | {mode:>9} | {len(stats['ms']):>5} | {np.percentile(stats['ms'], 50):>8.0f} | "
+                  f"{np.mean(stats['rtf']):>6.3f} | {stats['errors'] / max(stats['words'], 1):>6.1%}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fixtures", type=Path)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--fast-model", default=settings.WHISPER_FAST_MODEL, help="Small-model tier for very short clips")
+    parser.add_argument("--language", default="en", help="WHISPER_LANGUAGE for the profiles; empty = auto-detect")
+    args = parser.parse_args()
+    run(args.fixtures, args.repeats, args.fast_model, args.language)
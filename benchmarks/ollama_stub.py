@@ -0,0 +1,140 @@
+"""
+Local stand-in for the Ollama HTTP API, for benchmarks and manual testing.
+
+Implements /api/generate and /api/chat (streaming and not) with simulated
+model load, prompt evaluation and per-token decode delays. Like llama.cpp's
+slot cache, the stub remembers the last evaluated prompt and only "evaluates"
+the tokens after the longest common prefix. The model is "unloaded" once its
+keep_alive expires (Ollama's default is 5m when a request does not send one),
+so the next request pays the load time again. A failure rate can be injected
+to exercise client retries.
+
+    python benchmarks/ollama_stub.py --port 11435 --load-ms 1500
+    OLLAMA_URL=http://127.0.0.1:11435/api/generate python app/main.py
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from aiohttp import web
+
+_DURATION = re.compile(r"(-?\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+def parse_keep_alive(value) -> float:
+    """Seconds the model stays loaded; negative means forever."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    parts = _DURATION.findall(str(value))
+    if not parts:
+        return float(value)
+    return sum(float(n) * _UNITS[unit] for n, unit in parts)
+
+class OllamaStub:
+    def __init__(self, load_ms: float = 1500, prompt_ms_per_token: float = 0.2,
+                 token_ms: float = 20, tokens: int = 40, fail_rate: float = 0.0,
+                 default_keep_alive: float = 300.0, sentence_words: int = 0):
+        self.load_ms = load_ms
+        self.prompt_ms_per_token = prompt_ms_per_token
+        self.token_ms = token_ms
+        self.tokens = tokens
+        self.fail_rate = fail_rate
+        self.default_keep_alive = default_keep_alive
+        self.sentence_words = sentence_words  # End a sentence every N words (0 = never)
+        self.loaded_until = 0.0
+        self.cached_prompt = ""
+        self.requests = 0
+        self.aborted = 0
+        self.connections = set()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/generate", self.generate)
+        app.router.add_post("/api/chat", self.chat)
+        return app
+
+    async def _prepare(self, request: web.Request, body: dict, prompt: str) -> dict:
+        """Simulate load + prompt eval; returns Ollama-style timing stats."""
+        self.requests += 1
+        self.connections.add(request.transport.get_extra_info("peername"))
+        now = time.monotonic()
+        load = 0.0
+        if now > self.loaded_until:
+            load = self.load_ms
+            self.cached_prompt = ""
+            await asyncio.sleep(load / 1000)
+        keep_alive = parse_keep_alive(body.get("keep_alive", self.default_keep_alive))
+        self.loaded_until = float("inf") if keep_alive < 0 else time.monotonic() + keep_alive
+
+        # ~4 characters per token; only the part after the cached prefix is evaluated
+        common = len(os.path.commonprefix([self.cached_prompt, prompt]))
+        self.cached_prompt = prompt
+        prompt_tokens = (len(prompt) - common) // 4
+        # Ollama drops whatever does not fit in the context window
+        num_ctx = body.get("options", {}).get("num_ctx")
+        if num_ctx:
+            prompt_tokens = min(prompt_tokens, num_ctx)
+        prompt_ms = prompt_tokens * self.prompt_ms_per_token
+        await asyncio.sleep(prompt_ms / 1000)
+        return {"load_duration": int(load * 1e6), "prompt_eval_count": prompt_tokens,
+                "prompt_eval_duration": int(prompt_ms * 1e6), "eval_count": self.tokens}
+
+    async def generate(self, request: web.Request):
+        if random.random() < self.fail_rate:
+            return web.Response(status=503, text="stub: injected failure")
+        body = await request.json()
+        stats = await self._prepare(request, body, body.get("prompt", ""))
+        return await self._respond(request, body, stats, lambda text: {"response": text})
+
+    async def chat(self, request: web.Request):
+        if random.random() < self.fail_rate:
+            return web.Response(status=503, text="stub: injected failure")
+        body = await request.json()
+        prompt = "".join(f"<|{m['role']}|>\n{m['content']}\n" for m in body.get("messages", []))
+        stats = await self._prepare(request, body, prompt + "<|assistant|>\n")
+        return await self._respond(request, body, stats,
+                                   lambda text: {"message": {"role": "assistant", "content": text}})
+
+    async def _respond(self, request: web.Request, body: dict, stats: dict, wrap):
+        n = self.sentence_words
+        words = [f"word{i}{'.' if n and (i + 1) % n == 0 else ''} " for i in range(self.tokens)]
+        if not body.get("stream", True):
+            await asyncio.sleep(self.tokens * self.token_ms / 1000)
+            return web.json_response({**wrap("".join(words).strip()), "done": True, **stats})
+
+        resp = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await resp.prepare(request)
+        try:
+            for word in words:
+                await asyncio.sleep(self.token_ms / 1000)
+                await resp.write(json.dumps({**wrap(word), "done": False}).encode() + b"\n")
+            await resp.write(json.dumps({**wrap(""), "done": True, **stats}).encode() + b"\n")
+            await resp.write_eof()
+        except ConnectionResetError:
+            # The client hung up mid-stream (e.g. a cancelled reply); Ollama stops generating
+            self.aborted += 1
+        return resp
+
+async def start_stub(stub: OllamaStub, host: str = "127.0.0.1", port: int = 0):
+    """Start the stub on the running loop; returns (runner, base_url)."""
+    runner = web.AppRunner(stub.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://{host}:{port}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--load-ms", type=float, default=1500)
+    parser.add_argument("--prompt-ms-per-token", type=float, default=0.2)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    stub = OllamaStub(args.load_ms, args.prompt_ms_per_token, args.token_ms, args.tokens, args.fail_rate)
+    web.run_app(stub.app(), host="127.0.0.1", port=args.port, access_log=None)